@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+標註存儲後端
+JSON: 沿用 processed/annotations.json 快照 + annotations.journal 變更日誌
+SQLite: processed/annotations.db (WAL 模式, 單個區域的更新只寫一行)
+
+兩個後端的接口相同, QuickVerifier 和 ReceiptDatasetCreator 仍在記憶體中使用
+{image_name: annotation} 字典, 只把寫入交給存儲後端
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STORE_BACKENDS = ('json', 'sqlite')
+
+ANNOTATIONS_JSON = 'annotations.json'
+ANNOTATIONS_DB = 'annotations.db'
+
+
+class _WriteObserved:
+    """
+    寫入觀察回調 (用於指標)
+
+    on_write(backend, op, seconds, nbytes) 在每次寫入完成後於寫入線程中呼叫
+    """
+
+    backend = ''
+    on_write: Optional[Callable[[str, str, float, int], None]] = None
+
+    def _report_write(self, op: str, start: float, nbytes: int) -> None:
+        if self.on_write is not None:
+            self.on_write(self.backend, op, time.perf_counter() - start, nbytes)
+
+
+class JsonAnnotationStore(_WriteObserved):
+    """
+    JSON 文件存儲 (原有 annotations.json 格式) + 追加式變更日誌
+
+    單個區域的驗證/刪除只在 annotations.journal 追加一行變更記錄,
+    不再重寫和備份整個 annotations.json; 啟動時重放日誌,
+    記錄累積到 COMPACT_EVERY 條後在背景線程合併為新的快照。
+
+    日誌第一行記錄所屬快照的大小和修改時間, 與當前快照不符的日誌
+    (已被合併或快照被整體替換) 在載入時忽略。所有記錄都是賦值語義,
+    重複重放結果不變。
+    """
+
+    backend = 'json'
+
+    # 累積多少條變更後觸發背景合併
+    COMPACT_EVERY = 500
+
+    # 驗證時可能修改的區域欄位 (日誌只記錄這些欄位)
+    REGION_FIELDS = ('text', 'verified', 'corrected_text')
+
+    def __init__(self, json_path: Path):
+        self.json_path = Path(json_path)
+        self.journal_path = self.json_path.with_suffix('.journal')
+        self._lock = threading.RLock()
+        self._journal = None
+        self._pending = 0
+        self._generation = 0
+        self._compactor: threading.Thread = None
+
+    def exists(self) -> bool:
+        return self.json_path.exists()
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        載入快照並重放變更日誌
+
+        Raises:
+            json.JSONDecodeError: 標註文件格式錯誤
+        """
+        with self._lock:
+            if not self.json_path.exists():
+                return {}
+            with open(self.json_path, 'r', encoding='utf-8') as f:
+                annotations = json.load(f)
+
+            records, good_offset, bases = self._read_journal()
+            if records is None:
+                return annotations
+
+            if self._snapshot_base() not in bases:
+                if records:
+                    logger.warning(f"變更日誌與快照不符, 已忽略: {self.journal_path}")
+                self._start_journal()
+                return annotations
+
+            if good_offset < self.journal_path.stat().st_size:
+                # 崩潰時寫了一半的最後一行
+                logger.warning(f"變更日誌末尾不完整, 已截斷: {self.journal_path}")
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(good_offset)
+
+            for record in records:
+                self._apply(annotations, record)
+            self._pending = len(records)
+
+        if records:
+            logger.info(f"已重放 {len(records)} 條標註變更")
+            self._compact_in_background()
+        return annotations
+
+    def _read_journal(self, end: int = None):
+        """
+        讀取日誌
+
+        Returns:
+            (records, good_offset, bases); bases 為日誌適用的快照 (大小, 修改時間) 列表;
+            日誌不存在時 records 為 None
+        """
+        if not self.journal_path.exists():
+            return None, 0, []
+
+        records: List[Dict] = []
+        bases: List[Tuple] = []
+        offset = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                if end is not None and offset + len(line) > end:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                offset += len(line)
+                if record.get('op') == 'base':
+                    bases = [(record.get('size'), record.get('mtime_ns'))]
+                    bases.extend(tuple(alt) for alt in record.get('alternates', []))
+                else:
+                    records.append(record)
+        return records, offset, bases
+
+    @staticmethod
+    def _tmp_path(path: Path) -> Path:
+        # 每個進程/線程使用各自的臨時文件, 寫完後用 os.replace 原子替換
+        return path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    def _snapshot_base(self, path: Path = None) -> Tuple:
+        stat = (path or self.json_path).stat()
+        return (stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _base_line(base: Tuple, *alternates: Tuple) -> bytes:
+        record = {'op': 'base', 'size': base[0], 'mtime_ns': base[1]}
+        if alternates:
+            # 同時適用於其他快照 (合併替換快照期間)
+            record['alternates'] = [list(alt) for alt in alternates]
+        return (json.dumps(record) + '\n').encode()
+
+    def _write_journal(self, content: bytes) -> None:
+        """原子替換日誌文件"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        tmp_path = self._tmp_path(self.journal_path)
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _start_journal(self, tail: bytes = b'') -> None:
+        """以當前快照為基準開始新日誌 (可附帶未合併的記錄)"""
+        self._write_journal(self._base_line(self._snapshot_base()) + tail)
+
+    def _write_snapshot(self, annotations: Dict[str, Dict]) -> int:
+        """原子寫入快照 (先寫臨時文件再替換), 返回寫入的字節數"""
+        self.json_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._tmp_path(self.json_path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(annotations, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+            nbytes = os.fstat(f.fileno()).st_size
+        os.replace(tmp_path, self.json_path)
+        return nbytes
+
+    def save(self, annotations: Dict[str, Dict]) -> None:
+        """寫入完整快照並清空日誌"""
+        with self._lock:
+            start = time.perf_counter()
+            self._generation += 1
+            nbytes = self._write_snapshot(annotations)
+            self._start_journal()
+            self._pending = 0
+            self._report_write('snapshot', start, nbytes)
+
+    def _append(self, records: List[Dict]) -> None:
+        """追加變更記錄 (fsync 後返回)"""
+        if not records:
+            return
+        with self._lock:
+            start = time.perf_counter()
+            if not self.json_path.exists():
+                # 還沒有快照, 不需要日誌
+                self._write_snapshot({})
+                self._start_journal()
+            if self._journal is None:
+                if not self.journal_path.exists():
+                    self._start_journal()
+                self._journal = open(self.journal_path, 'ab')
+
+            payload = b''.join(
+                (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+                for record in records)
+            self._journal.write(payload)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._report_write('journal', start, len(payload))
+
+            self._pending += len(records)
+            if self._pending >= self.COMPACT_EVERY:
+                self._compact_in_background()
+
+    def _region_record(self, op: str, image_name: str, region: Dict,
+                       annotations: Dict[str, Dict]) -> Dict:
+        crop_filename = region.get('crop_filename')
+        if not crop_filename:
+            # 沒有 crop_filename 無法定位區域, 記錄整張圖片
+            if image_name in annotations:
+                return {'op': 'put_image', 'image': image_name, 'data': annotations[image_name]}
+            return {'op': 'delete_image', 'image': image_name}
+        if op == 'delete_region':
+            return {'op': op, 'image': image_name, 'crop': crop_filename}
+        return {'op': op, 'image': image_name, 'crop': crop_filename,
+                'set': {k: region[k] for k in self.REGION_FIELDS if k in region}}
+
+    @staticmethod
+    def _apply(annotations: Dict[str, Dict], record: Dict) -> None:
+        """把一條變更記錄套用到標註字典"""
+        op = record.get('op')
+        image_name = record.get('image')
+
+        if op == 'put_image':
+            annotations[image_name] = record['data']
+        elif op == 'delete_image':
+            annotations.pop(image_name, None)
+        elif op in ('update_region', 'delete_region'):
+            anno = annotations.get(image_name)
+            if anno is None:
+                return
+            results = anno.get('ocr_results', [])
+            crop_filename = record.get('crop')
+            if op == 'update_region':
+                for region in results:
+                    if region.get('crop_filename') == crop_filename:
+                        region.update(record.get('set', {}))
+                        break
+            else:
+                anno['ocr_results'] = [r for r in results
+                                       if r.get('crop_filename') != crop_filename]
+        else:
+            logger.warning(f"未知的變更記錄: {record}")
+
+    def upsert_images(self, annotations: Dict[str, Dict], image_names: Iterable[str]) -> None:
+        self._append([{'op': 'put_image', 'image': name, 'data': annotations[name]}
+                      for name in image_names if name in annotations])
+
+    def delete_image(self, annotations: Dict[str, Dict], image_name: str) -> None:
+        self._append([{'op': 'delete_image', 'image': image_name}])
+
+    def update_regions(self, annotations: Dict[str, Dict],
+                       changes: List[Tuple[str, Dict]]) -> None:
+        self._append([self._region_record('update_region', image_name, region, annotations)
+                      for image_name, region in changes])
+
+    def delete_regions(self, annotations: Dict[str, Dict],
+                       deletions: List[Tuple[str, Dict]]) -> None:
+        records = [self._region_record('delete_region', image_name, region, annotations)
+                   for image_name, region in deletions]
+        for image_name in dict.fromkeys(image_name for image_name, _ in deletions):
+            if image_name not in annotations:
+                records.append({'op': 'delete_image', 'image': image_name})
+        self._append(records)
+
+    def _compact_in_background(self) -> None:
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, daemon=True)
+            self._compactor.start()
+
+    def compact(self) -> None:
+        """
+        把日誌合併進新的快照
+
+        讀取和序列化在鎖外進行, 只有替換文件時持鎖;
+        合併期間追加的記錄搬到新日誌中。
+        """
+        try:
+            start = time.perf_counter()
+            with self._lock:
+                if self._journal is not None:
+                    self._journal.flush()
+                generation = self._generation
+                end = self.journal_path.stat().st_size if self.journal_path.exists() else 0
+                if not self.json_path.exists():
+                    return
+
+            with open(self.json_path, 'r', encoding='utf-8') as f:
+                annotations = json.load(f)
+            records, offset, _ = self._read_journal(end)
+            if not records:
+                return
+            for record in records:
+                self._apply(annotations, record)
+
+            tmp_path = self._tmp_path(self.json_path)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(annotations, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+                nbytes = os.fstat(f.fileno()).st_size
+
+            with self._lock:
+                if generation != self._generation:
+                    # 合併期間快照已被整體替換
+                    tmp_path.unlink()
+                    return
+                if self._journal is not None:
+                    self._journal.flush()
+                with open(self.journal_path, 'rb') as f:
+                    f.readline()
+                    body_start = f.tell()
+                    body = f.read()
+                tail = body[offset - body_start:]
+
+                # 先把全部記錄寫入同時適用於新舊快照的日誌, 再替換快照:
+                # 任何一步之間崩潰, 載入時都能重放到正確結果 (記錄為賦值語義, 可重複重放)
+                self._write_journal(self._base_line(self._snapshot_base(),
+                                                    self._snapshot_base(tmp_path)) + body)
+                os.replace(tmp_path, self.json_path)
+                self._start_journal(tail)
+                self._pending = tail.count(b'\n')
+            self._report_write('compact', start, nbytes)
+
+            logger.info(f"已合併 {len(records)} 條標註變更到 {self.json_path}")
+
+        except Exception as e:
+            logger.error(f"合併標註日誌失敗: {e}")
+
+    def close(self) -> None:
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+class SqliteAnnotationStore(_WriteObserved):
+    """
+    SQLite 存儲 (WAL 模式)
+
+    images 表保存圖片層級欄位, regions 表每個文字區域一行;
+    兩者都保留完整 JSON (data 欄位), 匯出時可以無損還原為 annotations.json
+    """
+
+    backend = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS images (
+            image_name TEXT PRIMARY KEY,
+            md5 TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS regions (
+            image_name TEXT NOT NULL REFERENCES images(image_name) ON DELETE CASCADE,
+            seq INTEGER NOT NULL,
+            crop_filename TEXT,
+            text TEXT,
+            confidence REAL,
+            verified INTEGER NOT NULL DEFAULT 0,
+            corrected_text TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (image_name, seq)
+        );
+        CREATE INDEX IF NOT EXISTS idx_regions_crop ON regions(image_name, crop_filename);
+        CREATE INDEX IF NOT EXISTS idx_regions_confidence ON regions(confidence);
+    """
+
+    def __init__(self, db_path: Path, json_path: Path = None):
+        """
+        Args:
+            db_path: 數據庫路徑
+            json_path: 現有的 annotations.json; 數據庫為新建時自動匯入
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.db_path.exists()
+
+        self._lock = threading.RLock()
+        # 已寫入的 JSON 數據字節數 (寫入指標用的近似值, 不含索引和頁面開銷)
+        self._payload_bytes = 0
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(self.SCHEMA)
+
+        if is_new and json_path is not None and Path(json_path).exists():
+            count = self.import_json(json_path)
+            logger.info(f"已從 {json_path} 匯入 {count} 個標註到 {self.db_path}")
+
+    def exists(self) -> bool:
+        return self.db_path.exists()
+
+    @staticmethod
+    def _image_row(image_name: str, annotation: Dict) -> Tuple:
+        # ocr_results 留空佔位, 保持匯出時的欄位順序
+        image_data = dict(annotation)
+        image_data['ocr_results'] = []
+        return (image_name, annotation.get('md5'),
+                json.dumps(image_data, ensure_ascii=False))
+
+    @staticmethod
+    def _region_values(region: Dict) -> Tuple:
+        return (region.get('text'), region.get('confidence'),
+                1 if region.get('verified', False) else 0,
+                region.get('corrected_text'),
+                json.dumps(region, ensure_ascii=False))
+
+    def _insert_image(self, image_name: str, annotation: Dict) -> None:
+        image_row = self._image_row(image_name, annotation)
+        region_rows = [(image_name, seq, region.get('crop_filename')) + self._region_values(region)
+                       for seq, region in enumerate(annotation.get('ocr_results', []))]
+        self._conn.execute(
+            'INSERT INTO images (image_name, md5, data) VALUES (?, ?, ?) '
+            'ON CONFLICT(image_name) DO UPDATE SET md5 = excluded.md5, data = excluded.data',
+            image_row)
+        self._conn.execute('DELETE FROM regions WHERE image_name = ?', (image_name,))
+        self._conn.executemany(
+            'INSERT INTO regions (image_name, seq, crop_filename, text, confidence, '
+            'verified, corrected_text, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', region_rows)
+        self._payload_bytes += len(image_row[-1].encode('utf-8')) + sum(
+            len(row[-1].encode('utf-8')) for row in region_rows)
+
+    @contextmanager
+    def _write(self, op: str):
+        """持鎖的寫入事務, 提交後回報耗時和寫入量"""
+        with self._lock:
+            start = time.perf_counter()
+            before = self._payload_bytes
+            with self._conn:
+                yield
+            self._report_write(op, start, self._payload_bytes - before)
+
+    def load(self) -> Dict[str, Dict]:
+        """載入所有標註 (圖片按加入順序, 區域按原始順序)"""
+        with self._lock:
+            annotations: Dict[str, Dict] = {}
+            for image_name, data in self._conn.execute(
+                    'SELECT image_name, data FROM images ORDER BY rowid'):
+                annotations[image_name] = json.loads(data)
+
+            for image_name, data in self._conn.execute(
+                    'SELECT image_name, data FROM regions ORDER BY image_name, seq'):
+                anno = annotations.get(image_name)
+                if anno is not None:
+                    anno['ocr_results'].append(json.loads(data))
+
+            return annotations
+
+    def save(self, annotations: Dict[str, Dict]) -> None:
+        """以完整標註替換數據庫內容 (單一事務)"""
+        with self._write('save'):
+            self._conn.execute('DELETE FROM regions')
+            self._conn.execute('DELETE FROM images')
+            for image_name, annotation in annotations.items():
+                self._insert_image(image_name, annotation)
+
+    def upsert_images(self, annotations: Dict[str, Dict], image_names: Iterable[str]) -> None:
+        """新增或替換指定圖片的標註"""
+        with self._write('upsert_images'):
+            for image_name in image_names:
+                if image_name in annotations:
+                    self._insert_image(image_name, annotations[image_name])
+
+    def delete_image(self, annotations: Dict[str, Dict], image_name: str) -> None:
+        """刪除圖片及其所有區域"""
+        with self._write('delete_image'):
+            self._conn.execute('DELETE FROM images WHERE image_name = ?', (image_name,))
+
+    def update_regions(self, annotations: Dict[str, Dict],
+                       changes: List[Tuple[str, Dict]]) -> None:
+        """更新指定區域 (每個區域一行 UPDATE)"""
+        with self._write('update_regions'):
+            for image_name, region in changes:
+                crop_filename = region.get('crop_filename')
+                if not crop_filename:
+                    # 沒有 crop_filename 無法定位, 重寫整張圖片
+                    if image_name in annotations:
+                        self._insert_image(image_name, annotations[image_name])
+                    continue
+
+                values = self._region_values(region)
+                self._conn.execute(
+                    'UPDATE regions SET text = ?, confidence = ?, verified = ?, '
+                    'corrected_text = ?, data = ? WHERE image_name = ? AND crop_filename = ?',
+                    values + (image_name, crop_filename))
+                self._payload_bytes += len(values[-1].encode('utf-8'))
+
+    def delete_regions(self, annotations: Dict[str, Dict],
+                       deletions: List[Tuple[str, Dict]]) -> None:
+        """刪除指定區域; 已從標註中移除的圖片一併刪除"""
+        with self._write('delete_regions'):
+            for image_name, region in deletions:
+                crop_filename = region.get('crop_filename')
+                if crop_filename:
+                    self._conn.execute(
+                        'DELETE FROM regions WHERE image_name = ? AND crop_filename = ?',
+                        (image_name, crop_filename))
+                elif image_name in annotations:
+                    self._insert_image(image_name, annotations[image_name])
+
+            for image_name in {image_name for image_name, _ in deletions}:
+                if image_name not in annotations:
+                    self._conn.execute('DELETE FROM images WHERE image_name = ?', (image_name,))
+
+    def import_json(self, json_path: Path) -> int:
+        """從 annotations.json 匯入 (替換現有內容, 包括尚未合併的變更日誌), 返回圖片數量"""
+        source = JsonAnnotationStore(json_path)
+        try:
+            annotations = source.load()
+        finally:
+            source.close()
+        self.save(annotations)
+        return len(annotations)
+
+    def export_json(self, json_path: Path) -> int:
+        """匯出為 annotations.json 格式, 返回圖片數量"""
+        annotations = self.load()
+        JsonAnnotationStore(json_path).save(annotations)
+        return len(annotations)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_annotation_store(processed_dir, backend: str = 'json'):
+    """
+    打開 processed/ 目錄下的標註存儲
+
+    Args:
+        processed_dir: 處理結果目錄
+        backend: 'json' 或 'sqlite'
+
+    Returns:
+        JsonAnnotationStore 或 SqliteAnnotationStore
+    """
+    processed_dir = Path(processed_dir)
+    json_path = processed_dir / ANNOTATIONS_JSON
+
+    if backend == 'json':
+        return JsonAnnotationStore(json_path)
+    if backend == 'sqlite':
+        return SqliteAnnotationStore(processed_dir / ANNOTATIONS_DB, json_path)
+    raise ValueError(f"Unknown annotation store backend: {backend}")
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description='標註存儲匯入/匯出工具')
+    parser.add_argument('action', choices=['import', 'export'],
+                        help='import: annotations.json → annotations.db; '
+                             'export: annotations.db → annotations.json')
+    parser.add_argument('--processed', default='processed', help='處理結果資料夾')
+
+    args = parser.parse_args()
+
+    processed_dir = Path(args.processed)
+    json_path = processed_dir / ANNOTATIONS_JSON
+    store = SqliteAnnotationStore(processed_dir / ANNOTATIONS_DB)
+
+    try:
+        if args.action == 'import':
+            if not json_path.exists():
+                print(f"❌ 標註文件不存在: {json_path}")
+                sys.exit(1)
+            count = store.import_json(json_path)
+            print(f"✅ 已匯入 {count} 個標註到 {store.db_path}")
+        else:
+            count = store.export_json(json_path)
+            print(f"✅ 已匯出 {count} 個標註到 {json_path}")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+enhance_image_quality 各階段耗時基準測試
+
+對 input/ 中的圖片 (或合成圖片) 分別使用每種去噪方式執行 enhance_image_quality,
+報告灰階、去噪、CLAHE、銳化各階段的毫秒數 (中位數 / p95)。
+
+使用方法:
+    python benchmarks/enhance_stages.py
+    python benchmarks/enhance_stages.py --images 5 --backends bilateral nlmeans_lowres --json
+    python benchmarks/enhance_stages.py --synthetic 4000x3000
+"""
+
+import sys
+import json
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from create_receipt_dataset import ReceiptDatasetCreator  # noqa: E402
+
+STAGES = ('gray', 'denoise', 'clahe', 'sharpen')
+
+
+def synthetic_receipt(height: int, width: int, seed: int = 0) -> np.ndarray:
+    """產生帶噪點的合成收據 (白底黑字)"""
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 235, dtype=np.uint8)
+    scale = width / 1000
+    for i, y in enumerate(range(int(80 * scale), height - int(40 * scale), int(45 * scale))):
+        cv2.putText(img, f'ITEM {i:03d}  HK$ {rng.integers(1, 999)}.{rng.integers(0, 99):02d}',
+                    (int(40 * scale), y), cv2.FONT_HERSHEY_SIMPLEX, scale, (30, 30, 30),
+                    max(1, int(2 * scale)))
+    noise = rng.normal(0, 8, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def load_images(args) -> List[np.ndarray]:
+    if args.synthetic:
+        width, height = (int(v) for v in args.synthetic.lower().split('x'))
+        return [synthetic_receipt(height, width, seed) for seed in range(args.images)]
+
+    paths = sorted(p for p in Path(args.input).glob('*')
+                   if p.suffix.lower() in ReceiptDatasetCreator.DATASET_IMAGE_SUFFIXES)
+    images = [cv2.imread(str(p)) for p in paths[:args.images]]
+    return [img for img in images if img is not None]
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='enhance_image_quality 各階段耗時')
+    parser.add_argument('--input', default=str(ROOT / 'input'), help='圖片資料夾')
+    parser.add_argument('--images', type=int, default=3, help='使用的圖片數量')
+    parser.add_argument('--synthetic', metavar='WxH', help='改用合成圖片 (如 4000x3000)')
+    parser.add_argument('--backends', nargs='+', choices=ReceiptDatasetCreator.DENOISE_BACKENDS,
+                        default=list(ReceiptDatasetCreator.DENOISE_BACKENDS), help='要測試的去噪方式')
+    parser.add_argument('--repeat', type=int, default=1, help='每張圖片重複次數')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    images = load_images(args)
+    if not images:
+        print(f"❌ 沒有可用的圖片: {args.input} (可使用 --synthetic 4000x3000)")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix='enhance-bench-') as work:
+        creator = ReceiptDatasetCreator(f'{work}/input', f'{work}/processed', f'{work}/crops',
+                                        f'{work}/dataset', use_ocr_cache=False, annotations={})
+
+        results: Dict[str, Dict] = {}
+        for backend in args.backends:
+            samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+            for img in images:
+                for _ in range(max(1, args.repeat)):
+                    timings: Dict[str, float] = {}
+                    creator.enhance_image_quality(img, denoise=backend, timings=timings)
+                    for stage in STAGES:
+                        samples[stage].append(timings.get(stage, 0.0))
+            totals = [sum(values) for values in zip(*samples.values())]
+            results[backend] = {
+                stage: {'p50_ms': percentile(values, 50), 'p95_ms': percentile(values, 95)}
+                for stage, values in samples.items()
+            }
+            results[backend]['total'] = {'p50_ms': percentile(totals, 50),
+                                         'p95_ms': percentile(totals, 95)}
+
+    shape = images[0].shape
+    if args.json:
+        print(json.dumps({'images': len(images), 'shape': list(shape[:2]), 'results': results},
+                         ensure_ascii=False, indent=2))
+        return
+
+    print(f"📸 {len(images)} 張圖片, {shape[1]}×{shape[0]} (p50 / p95 毫秒)")
+    header = f"{'backend':<16}" + ''.join(f"{stage:>18}" for stage in (*STAGES, 'total'))
+    print(header)
+    print('-' * len(header))
+    for backend, stages in results.items():
+        print(f"{backend:<16}" + ''.join(
+            f"{stages[stage]['p50_ms']:>9.1f} / {stages[stage]['p95_ms']:<6.1f}"
+            for stage in (*STAGES, 'total')))
+
+
+if __name__ == '__main__':
+    main()
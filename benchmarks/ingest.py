@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+ingest 路徑基準測試
+
+對 input/ 中的圖片 (或合成圖片) 執行 ReceiptDatasetCreator.ocr_image,
+報告吞吐量、各階段延遲百分位 (decode / detect / recognize / crop / write / copy) 和峰值 RSS。
+
+默認使用確定性的 stub reader (用形態學找出文字框, 不需要模型和網絡),
+所以結果只反映 OCR 以外的 ingest 開銷; --reader easyocr 使用真正的模型。
+
+使用方法:
+    python benchmarks/ingest.py --images 20
+    python benchmarks/ingest.py --synthetic 3000x4000 --images 10 --output bench.json
+    python benchmarks/ingest.py --baseline bench.json --tolerance 0.2   # p50 變慢超過 20% 時狀態碼 1
+"""
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import contextlib
+import io
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from create_receipt_dataset import ReceiptDatasetCreator  # noqa: E402
+from enhance_stages import synthetic_receipt  # noqa: E402
+
+STAGES = ('decode', 'detect', 'recognize', 'ocr', 'crop', 'write', 'copy')
+
+
+class StubReader:
+    """
+    確定性的 OCR 替身 (實現 EasyOCR Reader 的 readtext / detect / recognize)
+
+    檢測: 在縮小的灰度圖上找出比周圍深的像素, 水平相連的區域視為一個文字框;
+    識別: 文字和信心度由框坐標決定, 同一張圖片每次結果相同
+    """
+
+    DETECT_MAX_SIDE = 800
+    BLOCK_SIZE = 31
+    INK_CONTRAST = 15
+    LINE_KERNEL = (9, 1)  # (寬, 高)
+    MIN_BOX_WIDTH = 8
+    MIN_BOX_HEIGHT = 4
+    MAX_BOX_HEIGHT = 40
+
+    def __init__(self):
+        # ocr_image 只記錄 readtext 整體耗時, stub 自行記錄 detect / recognize
+        self.timings: Optional[Dict[str, float]] = None
+
+    def detect(self, img: np.ndarray, **kwargs):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        height, width = gray.shape
+        scale = min(1.0, self.DETECT_MAX_SIDE / max(height, width))
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        # 局部對比 (自適應閾值), 照片的光照不均不影響
+        ink = cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV,
+                                    self.BLOCK_SIZE, self.INK_CONTRAST)
+        # 水平膨脹把同一行的字連起來, 每個連通區域視為一個文字框
+        lines = cv2.dilate(ink, cv2.getStructuringElement(cv2.MORPH_RECT, self.LINE_KERNEL))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(lines)
+
+        boxes = []
+        for x, y, w, h, _ in stats[1:count]:
+            if w < self.MIN_BOX_WIDTH or not self.MIN_BOX_HEIGHT <= h <= self.MAX_BOX_HEIGHT:
+                continue
+            boxes.append([int(x / scale), int((x + w) / scale),
+                          int(y / scale), int((y + h) / scale)])
+        boxes.sort(key=lambda box: (box[2], box[0]))
+        return [boxes], [[]]
+
+    def recognize(self, img: np.ndarray, horizontal_list=None, free_list=None, **kwargs):
+        results = []
+        for x_min, x_max, y_min, y_max in horizontal_list or []:
+            bbox = [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+            confidence = 0.3 + ((x_min * 31 + y_min * 17) % 70) / 100
+            results.append((bbox, f'LINE {y_min}', confidence))
+        return results
+
+    def readtext(self, img: np.ndarray, **kwargs):
+        start = time.perf_counter()
+        horizontal_list, free_list = self.detect(img)
+        detected = time.perf_counter()
+        result = self.recognize(img, horizontal_list[0], free_list[0])
+        if self.timings is not None:
+            self.timings['detect'] = (detected - start) * 1000
+            self.timings['recognize'] = (time.perf_counter() - detected) * 1000
+        return result
+
+    def readtext_batched(self, images, **kwargs):
+        return [self.readtext(img) for img in images]
+
+
+def prepare_inputs(args, input_dir: Path) -> List[Path]:
+    """把基準測試用的圖片放入臨時 input 目錄"""
+    input_dir.mkdir(parents=True)
+    if args.synthetic:
+        width, height = (int(v) for v in args.synthetic.lower().split('x'))
+        paths = []
+        for seed in range(args.images):
+            path = input_dir / f'synthetic_{seed:03d}.jpg'
+            cv2.imwrite(str(path), synthetic_receipt(height, width, seed))
+            paths.append(path)
+        return paths
+
+    sources = sorted(p for p in Path(args.input).glob('*')
+                     if p.suffix.lower() in ReceiptDatasetCreator.DATASET_IMAGE_SUFFIXES)
+    paths = []
+    for source in sources[:args.images]:
+        shutil.copy(source, input_dir / source.name)
+        paths.append(input_dir / source.name)
+    return paths
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        'p50_ms': float(np.percentile(values, 50)),
+        'p90_ms': float(np.percentile(values, 90)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'mean_ms': float(np.mean(values)),
+    }
+
+
+def run(args) -> Dict:
+    with tempfile.TemporaryDirectory(prefix='ingest-bench-') as work:
+        work = Path(work)
+        paths = prepare_inputs(args, work / 'input')
+        if not paths:
+            raise SystemExit(f"❌ 沒有可用的圖片: {args.input} (可使用 --synthetic 3000x4000)")
+
+        creator = ReceiptDatasetCreator(str(work / 'input'), str(work / 'processed'),
+                                        str(work / 'processed' / 'crops'), str(work / 'dataset'),
+                                        use_ocr_cache=args.ocr_cache, annotations={},
+                                        detect_max_side=args.detect_max_side)
+        stub = None
+        if args.reader == 'stub':
+            stub = creator.reader = StubReader()
+
+        samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        totals: List[float] = []
+        regions = 0
+
+        # 不計時預熱一次 (模型載入、首次調用)
+        with contextlib.redirect_stdout(io.StringIO()):
+            creator.ocr_image(paths[0])
+
+        wall_start = time.perf_counter()
+        for _ in range(max(1, args.repeat)):
+            for path in paths:
+                timings: Dict[str, float] = {}
+                if stub is not None:
+                    stub.timings = timings
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    annotation = creator.ocr_image(path, timings=timings)
+                totals.append((time.perf_counter() - start) * 1000)
+                regions += len(annotation['ocr_results'])
+                for stage, ms in timings.items():
+                    if stage in samples:
+                        samples[stage].append(ms)
+        wall = time.perf_counter() - wall_start
+
+    return {
+        'reader': args.reader,
+        'images': len(totals),
+        'regions': regions,
+        'wall_seconds': wall,
+        'throughput_images_per_sec': len(totals) / wall if wall > 0 else 0.0,
+        'stages': {stage: summarize(values) for stage, values in samples.items() if values},
+        'total': summarize(totals),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """返回 p50 比基準慢超過 tolerance 的階段"""
+    regressions = []
+    current = dict(result['stages'], total=result['total'])
+    previous = dict(baseline.get('stages', {}), total=baseline.get('total', {}))
+    for stage, stats in current.items():
+        before = previous.get(stage, {}).get('p50_ms')
+        if before and stats['p50_ms'] > before * (1 + tolerance):
+            regressions.append(f"{stage}: {before:.1f} → {stats['p50_ms']:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ingest 路徑各階段基準測試')
+    parser.add_argument('--input', default=str(ROOT / 'input'), help='圖片資料夾')
+    parser.add_argument('--images', type=int, default=10, help='使用的圖片數量')
+    parser.add_argument('--synthetic', metavar='WxH', help='改用合成圖片 (如 3000x4000)')
+    parser.add_argument('--repeat', type=int, default=1, help='重複處理全部圖片的次數')
+    parser.add_argument('--reader', choices=('stub', 'easyocr'), default='stub',
+                        help='OCR 後端 (stub 不需要模型)')
+    parser.add_argument('--detect-max-side', type=int, default=None,
+                        help='縮小檢測 (與 create_receipt_dataset.py 相同)')
+    parser.add_argument('--ocr-cache', action='store_true', help='啟用 OCR 結果快取')
+    parser.add_argument('--output', help='把 JSON 結果寫入文件')
+    parser.add_argument('--baseline', help='與之前的 JSON 結果比較')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='p50 允許比基準慢的比例 (默認 0.2)')
+    args = parser.parse_args()
+
+    result = run(args)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ 性能退化:", file=sys.stderr)
+            for line in regressions:
+                print(f"   {line}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
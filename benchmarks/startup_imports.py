@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+啟動時間基準測試
+
+在獨立子進程中執行不需要 OCR 的命令, 記錄啟動時間和峰值 RSS,
+並確認這些命令從未嘗試導入 easyocr / torch (即使環境中已安裝)。
+
+使用方法:
+    python benchmarks/startup_imports.py
+    python benchmarks/startup_imports.py --repeat 5 --json
+
+任何命令導入了 OCR 後端時以狀態碼 1 結束。
+"""
+
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 不做 OCR 的命令不應導入的模組
+FORBIDDEN_MODULES = ('torch', 'easyocr')
+
+# 子進程前置代碼: 攔截對 FORBIDDEN_MODULES 的導入並在結束時回報
+PRELUDE = '''
+import sys, json, time, atexit, resource
+_t0 = time.perf_counter()
+_attempts = []
+
+class _Guard:
+    def find_spec(self, name, path=None, target=None):
+        if name.split('.')[0] in {forbidden!r}:
+            _attempts.append(name)
+            raise ImportError(f"{{name}} must not be imported by this command")
+        return None
+
+sys.meta_path.insert(0, _Guard())
+sys.path.insert(0, {root!r})
+
+@atexit.register
+def _report():
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with open({report!r}, 'w') as f:
+        json.dump({{'seconds': time.perf_counter() - _t0, 'max_rss_kb': rss_kb,
+                   'forbidden_imports': sorted(set(_attempts))}}, f)
+'''
+
+
+def build_commands(work: Path) -> Dict[str, str]:
+    """返回 {名稱: 子進程代碼}; 所有輸出都寫到臨時目錄"""
+    processed = work / 'processed'
+    args = ['--input', str(work / 'input'), '--processed', str(processed),
+            '--crops', str(processed / 'crops'), '--dataset', str(work / 'dataset_gt')]
+
+    def cli(*extra: str) -> str:
+        argv = ['create_receipt_dataset.py', *args, *extra]
+        return (f"sys.argv = {argv!r}\n"
+                "import runpy\n"
+                f"runpy.run_path({str(ROOT / 'create_receipt_dataset.py')!r}, run_name='__main__')\n")
+
+    return {
+        'create_receipt_dataset --mode stats': cli('--mode', 'stats'),
+        'create_receipt_dataset --mode generate': cli('--mode', 'generate'),
+        'verifier startup + /api/stats': (
+            "import verifier\n"
+            f"verifier.verifier = verifier.QuickVerifier({str(processed)!r}, {str(work / 'input')!r})\n"
+            "client = verifier.app.test_client()\n"
+            "assert client.get('/api/stats').status_code == 200\n"
+        ),
+        'export_lmdb import': "import export_lmdb\n",
+    }
+
+
+def run_command(name: str, code: str, work: Path) -> Dict:
+    report = work / 'report.json'
+    if report.exists():
+        report.unlink()
+    prelude = PRELUDE.format(forbidden=set(FORBIDDEN_MODULES), root=str(ROOT), report=str(report))
+
+    proc = subprocess.run([sys.executable, '-c', prelude + code], cwd=str(work),
+                          capture_output=True, text=True)
+    if not report.exists():
+        return {'command': name, 'ok': False, 'error': proc.stderr.strip()[-2000:]}
+
+    with open(report) as f:
+        result = json.load(f)
+    result.update({'command': name, 'returncode': proc.returncode,
+                   'ok': proc.returncode == 0 and not result['forbidden_imports']})
+    if proc.returncode != 0:
+        result['error'] = proc.stderr.strip()[-2000:]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='非 OCR 命令的啟動時間基準測試')
+    parser.add_argument('--repeat', type=int, default=3, help='每個命令執行次數 (取最快一次)')
+    parser.add_argument('--annotations', default=str(ROOT / 'processed' / 'annotations.json'),
+                        help='複製到臨時目錄的標註文件 (不存在時使用空標註)')
+    parser.add_argument('--json', action='store_true', help='以 JSON 輸出結果')
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix='startup-bench-'))
+    try:
+        (work / 'input').mkdir()
+        (work / 'processed').mkdir()
+        if Path(args.annotations).exists():
+            shutil.copy(args.annotations, work / 'processed' / 'annotations.json')
+
+        results: List[Dict] = []
+        for name, code in build_commands(work).items():
+            runs = [run_command(name, code, work) for _ in range(max(1, args.repeat))]
+            failed = [r for r in runs if not r['ok']]
+            results.append(failed[0] if failed else min(runs, key=lambda r: r['seconds']))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for r in results:
+            status = '✅' if r['ok'] else '❌'
+            if 'seconds' in r:
+                print(f"{status} {r['command']:<42} {r['seconds'] * 1000:8.1f} ms  "
+                      f"{r['max_rss_kb'] / 1024:7.1f} MB  "
+                      f"{'imports: ' + ', '.join(r['forbidden_imports']) if r['forbidden_imports'] else ''}")
+            else:
+                print(f"{status} {r['command']}")
+            if r.get('error'):
+                print(f"   {r['error'].splitlines()[-1]}")
+
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
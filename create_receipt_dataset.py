@@ -6,16 +6,35 @@
 支援彎曲收據的自動校正功能
 """
 
+import os
 import json
+import hashlib
+import importlib.metadata
 import cv2
-import easyocr
 import numpy as np
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import argparse
 
+from annotation_store import STORE_BACKENDS, open_annotation_store
+from digest_cache import DigestCache
+from ocr_cache import OCR_CACHE_DIR, OcrResultCache
+
+# Linux FICLONE ioctl (btrfs/xfs 等支援 reflink 的檔案系統)
+FICLONE = 0x40049409
+
+
+def _record_stage(timings: Optional[Dict[str, float]], stage: str, start: float) -> None:
+    """timings 不為 None 時記錄從 start 到現在的毫秒數"""
+    if timings is not None:
+        timings[stage] = (time.perf_counter() - start) * 1000
+
 
 class ReceiptDatasetCreator:
     """收據數據集創建器"""
@@ -25,24 +44,56 @@ class ReceiptDatasetCreator:
     MAX_DEVIATION_THRESHOLD = 50
     TILT_ANGLE_THRESHOLD = 2
     MIN_LINES_FOR_CURVE_DETECTION = 5
+    GEOMETRY_MAX_SIDE = 1024  # 幾何分析 (邊緣/直線檢測) 時圖片的最長邊
     CLAHE_CLIP_LIMIT = 2.0
     CLAHE_GRID_SIZE = (8, 8)
     DENOISE_H = 7
+    DENOISE_BACKENDS = ('nlmeans', 'nlmeans_lowres', 'bilateral', 'median', 'none')
+    DENOISE_BACKEND = 'bilateral'  # enhance_image_quality 的默認去噪方式
+    DENOISE_LOWRES_FACTOR = 2  # nlmeans_lowres 的縮小倍數
+    DENOISE_DETAIL_THRESHOLD = 21  # nlmeans_lowres: 幅度低於此值的高頻細節視為噪點
+    BILATERAL_DIAMETER = 5
+    BILATERAL_SIGMA_COLOR = 25
+    BILATERAL_SIGMA_SPACE = 5
     SHARPEN_STRENGTH = 0.5
+    INGEST_IO_WORKERS = 4  # 批量模式下解碼/寫入 crop 的線程數
+    DATASET_IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')  # 數據集目錄中由本工具管理的圖片
+    OCR_LANGS = ('ch_tra', 'en')
+    OCR_GPU = True
+    OCR_CACHE_MAX_BYTES = 256 * 1024 * 1024  # OCR 結果快取上限
+    TILE_BAND_ASPECT = 1.5  # 分塊 OCR 時每條橫帶的高度 (相對圖片寬度)
+    TILE_OVERLAP = 0.15  # 相鄰橫帶重疊的比例 (需大於最高的一行文字)
+    TILE_IOU_THRESHOLD = 0.5  # 重疊區域中 IoU 超過此值的框視為重複
+    TILE_CONTAINMENT_THRESHOLD = 0.8  # 被橫帶邊界截斷的框: 交集佔較小框面積超過此值視為重複
 
     # 模型快取 (單例模式)
     _reader_cache = {}
+    _reader_lock = threading.Lock()
     _doctr_cache = None
 
+    @classmethod
+    def create_reader(cls, langs=('ch_tra', 'en'), gpu=True):
+        """
+        建立新的 EasyOCR Reader (不經過快取, 供 Reader 池使用)
+
+        easyocr (以及 torch) 只在第一次需要 OCR 時才導入,
+        stats / generate 等不做 OCR 的模式不需要載入
+        """
+        import easyocr
+
+        print(f"🔄 Loading EasyOCR model ({', '.join(langs)})...")
+        reader = easyocr.Reader(list(langs), gpu=gpu)
+        print("✅ EasyOCR model loaded!")
+        return reader
+
     @classmethod
     def get_reader(cls, langs=('ch_tra', 'en'), gpu=True):
-        """獲取快取的 EasyOCR Reader (單例模式)"""
+        """獲取快取的 EasyOCR Reader (單例模式, 多線程同時呼叫只會載入一次)"""
         cache_key = (tuple(langs), gpu)
-        if cache_key not in cls._reader_cache:
-            print(f"🔄 Loading EasyOCR model ({', '.join(langs)})...")
-            cls._reader_cache[cache_key] = easyocr.Reader(list(langs), gpu=gpu)
-            print("✅ EasyOCR model loaded!")
-        return cls._reader_cache[cache_key]
+        with cls._reader_lock:
+            if cache_key not in cls._reader_cache:
+                cls._reader_cache[cache_key] = cls.create_reader(langs, gpu)
+            return cls._reader_cache[cache_key]
 
     @classmethod
     def get_doctr_model(cls):
@@ -58,7 +109,9 @@ class ReceiptDatasetCreator:
 
     def __init__(self, input_dir: str = "./input", processed_dir: str = "./processed",
                  crops_dir: str = "./processed/crops", dataset_dir: str = "./dataset_gt",
-                 enable_correction: bool = False):
+                 enable_correction: bool = False, store='json', use_ocr_cache: bool = True,
+                 reader_pool=None, annotations: Optional[Dict] = None,
+                 detect_max_side: Optional[int] = None, tile_max_aspect: Optional[float] = None):
         # 輸入驗證
         if not input_dir or not isinstance(input_dir, str):
             raise ValueError(f"Invalid input_dir: {input_dir}")
@@ -80,19 +133,43 @@ class ReceiptDatasetCreator:
                          self.crops_dir, self.train_dir, self.valid_dir, self.test_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
 
-        # 延遲載入 EasyOCR 模型 (只在需要 OCR 時才載入)
+        # 延遲載入 EasyOCR 模型 (只在需要 OCR 時才載入);
+        # 提供 reader_pool 時改為從預熱的 Reader 池借用
         self.reader = None
-
-        # 標註數據
-        self.annotations = {}
-        self.load_annotations()
+        self.reader_pool = reader_pool
+
+        # 文字檢測時圖片的最長邊 (None = 使用原圖檢測); 識別和切割仍使用原圖
+        if detect_max_side is not None and detect_max_side <= 0:
+            raise ValueError(f"detect_max_side must be positive, got {detect_max_side}")
+        self.detect_max_side = detect_max_side
+
+        # 高寬比超過 tile_max_aspect 的長收據切成重疊的橫帶分別 OCR (None = 不分塊)
+        if tile_max_aspect is not None and tile_max_aspect <= self.TILE_BAND_ASPECT:
+            raise ValueError(f"tile_max_aspect must be greater than {self.TILE_BAND_ASPECT}, "
+                             f"got {tile_max_aspect}")
+        self.tile_max_aspect = tile_max_aspect
+
+        # OCR 結果快取 (圖片和設定不變時跳過推理)
+        self.ocr_cache = (OcrResultCache(self.processed_dir / OCR_CACHE_DIR, self.OCR_CACHE_MAX_BYTES)
+                          if use_ocr_cache else None)
+        self._ocr_config = None
+
+        # 標註數據 (存儲後端: 'json' / 'sqlite', 或共用已打開的存儲)
+        if isinstance(store, str):
+            store = open_annotation_store(self.processed_dir, store)
+        self.store = store
+        if annotations is not None:
+            # 共用呼叫者已載入的標註, 不再從磁碟讀取
+            self.annotations = annotations
+        else:
+            self.annotations = {}
+            self.load_annotations()
 
     def load_annotations(self):
         """載入已有的標註"""
-        if self.annotations_file.exists():
+        if self.store.exists():
             try:
-                with open(self.annotations_file, 'r', encoding='utf-8') as f:
-                    self.annotations = json.load(f)
+                self.annotations = self.store.load()
                 print(f"📂 Loaded {len(self.annotations)} existing annotations")
             except (json.JSONDecodeError, IOError) as e:
                 print(f"⚠️  Failed to load annotations: {e}")
@@ -105,18 +182,81 @@ class ReceiptDatasetCreator:
     def save_annotations(self):
         """保存標註"""
         try:
-            with open(self.annotations_file, 'w', encoding='utf-8') as f:
-                json.dump(self.annotations, f, ensure_ascii=False, indent=2)
-            print(f"💾 Saved annotations to {self.annotations_file}")
+            self.store.save(self.annotations)
+            print(f"💾 Saved annotations ({self.store.backend})")
         except (IOError, OSError) as e:
             print(f"❌ Failed to save annotations: {e}")
         except Exception as e:
             print(
                 f"❌ Unexpected error saving annotations: {type(e).__name__}: {e}")
 
-    def correct_document_distortion(self, image: np.ndarray) -> Tuple[np.ndarray, bool]:
+    def analyze_geometry(self, image: np.ndarray) -> Dict:
+        """
+        幾何分析: 傾斜校正和彎曲檢測共用的邊緣/直線檢測
+
+        只在縮小到 GEOMETRY_MAX_SIDE 的灰度圖上執行一次 Canny 和 HoughLinesP
+        (INTER_AREA 縮小同時起到去噪作用), Hough 參數按比例縮放;
+        直線坐標換算回原圖後, 用向量化的 NumPy 計算傾斜角和偏差
+
+        Returns:
+            {'lines': (N, 4) 原圖坐標的線段 [x1, y1, x2, y2],
+             'tilt_angle': 線段角度中位數 (度, 沒有線段時為 None),
+             'max_deviation': 線段中點到主方向理想直線的最大偏差 (原圖像素)}
+        """
+        # 輸入驗證
+        if image is None or not isinstance(image, np.ndarray):
+            raise ValueError("Invalid image: expected numpy array")
+        if image.size == 0:
+            raise ValueError("Invalid image: empty array")
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+
+        # 1. 縮小 (最長邊 GEOMETRY_MAX_SIDE)
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.GEOMETRY_MAX_SIDE / max(height, width))
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+
+        # 2. 檢測邊緣和直線 (長度類參數按縮放比例調整)
+        edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+        lines = cv2.HoughLinesP(edges, 1, np.pi / 180,
+                                threshold=max(1, round(100 * scale)),
+                                minLineLength=max(1, round(100 * scale)),
+                                maxLineGap=max(1, round(10 * scale)))
+
+        if lines is None:
+            return {'lines': np.empty((0, 4)), 'tilt_angle': None, 'max_deviation': 0.0}
+
+        segments = lines.reshape(-1, 4).astype(np.float64) / scale
+        x1, y1, x2, y2 = segments.T
+
+        # 3. 傾斜角: 所有線段角度的中位數
+        angles = np.degrees(np.arctan2(y2 - y1, x2 - x1))
+        tilt_angle = float(np.median(angles))
+
+        # 4. 偏差: 沿主方向 (傾斜角) 的理想直線從線段起點出發, 線段中點到它的距離;
+        #    平整的文檔所有線段都與主方向平行, 彎曲的文檔線段角度隨位置變化
+        diff = np.radians((angles - tilt_angle + 90) % 180 - 90)
+        lengths = np.hypot(x2 - x1, y2 - y1)
+        along = np.abs(diff) < np.pi / 4  # 與主方向垂直的線段屬於其他結構, 不計入
+        deviations = np.abs(np.sin(diff[along])) * lengths[along] / 2
+
+        return {
+            'lines': segments,
+            'tilt_angle': tilt_angle,
+            'max_deviation': float(deviations.max()) if len(deviations) else 0.0,
+        }
+
+    def correct_document_distortion(self, image: np.ndarray, geometry: Optional[Dict] = None
+                                    ) -> Tuple[np.ndarray, bool]:
         """
         溫和的文檔校正 - 只修正明顯的透視傾斜,保留圖片細節
+
+        Args:
+            image: 輸入圖片
+            geometry: analyze_geometry 的結果 (未提供時自行計算)
+
         Returns: (校正後的圖像, 是否進行了校正)
         """
         # 輸入驗證
@@ -126,28 +266,14 @@ class ReceiptDatasetCreator:
             raise ValueError("Invalid image: empty array")
 
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(
-                image.shape) == 3 else image
-
-            # 1. 檢測邊緣
-            edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+            if geometry is None:
+                geometry = self.analyze_geometry(image)
 
-            # 2. 使用 Hough 變換檢測直線
-            lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=100,
-                                    minLineLength=100, maxLineGap=10)
-
-            if lines is None or len(lines) < 10:
+            if len(geometry['lines']) < 10:
                 return image, False
 
-            # 3. 計算主要角度(檢測是否傾斜)
-            angles = []
-            for line in lines:
-                x1, y1, x2, y2 = line[0]
-                angle = np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi
-                angles.append(angle)
-
-            # 找到主要角度
-            median_angle = np.median(angles)
+            # 主要角度
+            median_angle = geometry['tilt_angle']
 
             # 如果傾斜角度很小(<2度),不需要校正
             if abs(median_angle) < self.TILT_ANGLE_THRESHOLD:
@@ -193,10 +319,15 @@ class ReceiptDatasetCreator:
             print(f"   ❌  未預期的錯誤: {type(e).__name__}: {e}")
             return image, False
 
-    def dewarp_curved_document(self, img: np.ndarray) -> Tuple[np.ndarray, bool]:
+    def dewarp_curved_document(self, img: np.ndarray, geometry: Optional[Dict] = None
+                               ) -> Tuple[np.ndarray, bool]:
         """
         檢測並校正彎曲的文檔 (溫和處理,保留細節)
 
+        Args:
+            img: 輸入圖片
+            geometry: analyze_geometry 的結果 (未提供時自行計算)
+
         返回:
             (校正後的圖片, 是否檢測到彎曲)
         """
@@ -207,39 +338,14 @@ class ReceiptDatasetCreator:
             raise ValueError("Invalid image: empty array")
 
         try:
-            # 1. 先增強對比度
-            enhanced = self.enhance_image_quality(img)
+            if geometry is None:
+                geometry = self.analyze_geometry(img)
 
-            # 2. 轉為灰度圖進行邊緣檢測
-            # 檢查是否已經是灰度圖
-            if len(enhanced.shape) == 2:
-                gray = enhanced
-            else:
-                gray = cv2.cvtColor(enhanced, cv2.COLOR_BGR2GRAY)
-
-            # 3. 檢測水平線條
-            edges = cv2.Canny(gray, 50, 150)
-            lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100,
-                                    minLineLength=100, maxLineGap=10)
-
-            if lines is None or len(lines) < self.MIN_LINES_FOR_CURVE_DETECTION:
+            if len(geometry['lines']) < self.MIN_LINES_FOR_CURVE_DETECTION:
                 return img, False
 
-            # 4. 檢查線條是否有明顯彎曲
-            deviations = []
-            for line in lines:
-                x1, y1, x2, y2 = line[0]
-                # 計算線條中點到理想直線的偏差
-                mid_x = (x1 + x2) / 2
-                mid_y = (y1 + y2) / 2
-                ideal_y = y1 + (y2 - y1) * (mid_x - x1) / \
-                    (x2 - x1) if x2 != x1 else y1
-                deviation = abs(mid_y - ideal_y)
-                deviations.append(deviation)
-
-            max_deviation = max(deviations) if deviations else 0
-
-            # 5. 如果偏差超過閾值,標記為彎曲(但不做激進校正)
+            # 如果偏差超過閾值,標記為彎曲(但不做激進校正)
+            max_deviation = geometry['max_deviation']
             is_curved = max_deviation > self.MAX_DEVIATION_THRESHOLD
 
             if is_curved:
@@ -259,12 +365,29 @@ class ReceiptDatasetCreator:
             print(f"   ❌  未預期的錯誤: {type(e).__name__}: {e}")
             return img, False
 
-    def enhance_image_quality(self, image: np.ndarray) -> np.ndarray:
+    def correct_geometry(self, img: np.ndarray) -> np.ndarray:
+        """彎曲檢測和傾斜校正 (共用一次幾何分析)"""
+        try:
+            geometry = self.analyze_geometry(img)
+        except cv2.error as e:
+            print(f"   ⚠️  OpenCV 錯誤: {e}")
+            return img
+
+        self.dewarp_curved_document(img, geometry)
+        corrected, _ = self.correct_document_distortion(img, geometry)
+        return corrected
+
+    def enhance_image_quality(self, image: np.ndarray, denoise: Optional[str] = None,
+                              timings: Optional[Dict[str, float]] = None) -> np.ndarray:
         """
         溫和地增強圖像質量 - 保留細節,適合 OCR
 
+        流程: 灰階 → 去噪 → CLAHE → 銳化 (全程 uint8)
+
         Args:
             image: 輸入圖片 (BGR 彩色)
+            denoise: 去噪方式 (DENOISE_BACKENDS 之一, 默認 DENOISE_BACKEND)
+            timings: 提供時寫入各階段耗時 (毫秒)
 
         Returns:
             增強後的圖片 (灰度圖)
@@ -274,6 +397,19 @@ class ReceiptDatasetCreator:
             raise ValueError("Invalid image: expected numpy array")
         if image.size == 0:
             raise ValueError("Invalid image: empty array")
+        denoise = denoise or self.DENOISE_BACKEND
+        if denoise not in self.DENOISE_BACKENDS:
+            raise ValueError(f"Unknown denoise backend: {denoise} "
+                             f"(expected one of {', '.join(self.DENOISE_BACKENDS)})")
+
+        stage_start = time.perf_counter()
+
+        def lap(stage: str) -> None:
+            nonlocal stage_start
+            if timings is not None:
+                now = time.perf_counter()
+                timings[stage] = (now - stage_start) * 1000
+                stage_start = now
 
         try:
             # 1. 轉灰階
@@ -281,22 +417,24 @@ class ReceiptDatasetCreator:
                 gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             else:
                 gray = image.copy()
+            lap('gray')
 
             # 2. 輕微去噪 (保留文字邊緣)
-            denoised = cv2.fastNlMeansDenoising(gray, h=self.DENOISE_H)
+            denoised = self.denoise_gray(gray, denoise)
+            lap('denoise')
 
             # 3. 自適應直方圖均衡化 (CLAHE) - 增強對比度
             clahe = cv2.createCLAHE(clipLimit=self.CLAHE_CLIP_LIMIT,
                                     tileGridSize=self.CLAHE_GRID_SIZE)
             enhanced = clahe.apply(denoised)
+            lap('clahe')
 
-            # 4. 輕微銳化 (增強文字邊緣)
+            # 4. 輕微銳化 (增強文字邊緣); uint8 輸出由 filter2D 直接飽和, 不需要額外的 clip/astype
             kernel = np.array([[-1, -1, -1],
                               [-1, 9, -1],
-                              [-1, -1, -1]])
-            sharpened = cv2.filter2D(
-                enhanced, -1, kernel * self.SHARPEN_STRENGTH)
-            sharpened = np.clip(sharpened, 0, 255).astype(np.uint8)
+                              [-1, -1, -1]], dtype=np.float32) * self.SHARPEN_STRENGTH
+            sharpened = cv2.filter2D(enhanced, cv2.CV_8U, kernel)
+            lap('sharpen')
 
             return sharpened
 
@@ -310,9 +448,47 @@ class ReceiptDatasetCreator:
             print(f"   ❌  未預期的錯誤: {type(e).__name__}: {e}")
             return image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
+    def denoise_gray(self, gray: np.ndarray, backend: str) -> np.ndarray:
+        """
+        灰度圖去噪
+
+        - nlmeans: 原圖解析度 fastNlMeansDenoising (最慢, 12MP 需數秒)
+        - nlmeans_lowres: 在縮小 DENOISE_LOWRES_FACTOR 倍的圖上做 NL-means, 放大後作為基底;
+          原圖與縮小圖之間的細節中, 幅度超過 DENOISE_DETAIL_THRESHOLD 的 (文字邊緣) 保留,
+          其餘視為噪點去除
+        - bilateral: 雙邊濾波
+        - median: 3×3 中值濾波
+        - none: 不去噪
+        """
+        if backend == 'nlmeans':
+            return cv2.fastNlMeansDenoising(gray, h=self.DENOISE_H)
+        if backend == 'bilateral':
+            return cv2.bilateralFilter(gray, self.BILATERAL_DIAMETER,
+                                       self.BILATERAL_SIGMA_COLOR, self.BILATERAL_SIGMA_SPACE)
+        if backend == 'median':
+            return cv2.medianBlur(gray, 3)
+        if backend == 'none':
+            return gray
+
+        # nlmeans_lowres
+        height, width = gray.shape[:2]
+        factor = self.DENOISE_LOWRES_FACTOR
+        if min(height, width) < factor * 16:
+            return cv2.fastNlMeansDenoising(gray, h=self.DENOISE_H)
+
+        small = cv2.resize(gray, (width // factor, height // factor), interpolation=cv2.INTER_AREA)
+        small_denoised = cv2.fastNlMeansDenoising(small, h=self.DENOISE_H)
+        base = cv2.resize(small_denoised, (width, height), interpolation=cv2.INTER_LINEAR)
+        coarse = cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+        # 高頻細節: 小幅度的視為噪點, 大幅度的 (文字邊緣) 保留
+        detail = cv2.subtract(gray, coarse, dtype=cv2.CV_16S)
+        detail[np.abs(detail) < self.DENOISE_DETAIL_THRESHOLD] = 0
+        return cv2.add(base, detail, dtype=cv2.CV_8U)
+
     def preprocess_image(self, image_path: Path) -> np.ndarray:
         """
-        簡單讀取圖片 - 不做任何處理
+        簡單讀取圖片 - 不做任何處理 (enable_correction 時先做幾何校正)
 
         Returns:
             原始圖片
@@ -327,28 +503,97 @@ class ReceiptDatasetCreator:
         if img is None:
             raise ValueError(f"Cannot read image: {image_path}")
 
+        if self.enable_correction:
+            img = self.correct_geometry(img)
+
         return img
 
-    def ocr_image(self, image_path: Path) -> Dict:
-        """使用 EasyOCR 識別圖片並切割文字區域"""
-        print(f"\n🔍 Processing: {image_path.name}")
+    def ocr_config(self) -> Dict:
+        """影響 readtext 輸出的設定 (OCR 快取鍵的一部分)"""
+        if self._ocr_config is None:
+            try:
+                easyocr_version = importlib.metadata.version('easyocr')
+            except importlib.metadata.PackageNotFoundError:
+                easyocr_version = None
+            self._ocr_config = {
+                'langs': list(self.OCR_LANGS),
+                'gpu': self.OCR_GPU,
+                'easyocr': easyocr_version,
+                'confidence_threshold': self.CONFIDENCE_THRESHOLD,
+            }
+            # 只在啟用時加入, 原圖檢測的快取鍵保持不變
+            if self.detect_max_side:
+                self._ocr_config['detect_max_side'] = self.detect_max_side
+            if self.enable_correction:
+                self._ocr_config['geometry_correction'] = self.GEOMETRY_MAX_SIDE
+            if self.tile_max_aspect:
+                self._ocr_config['tile'] = [self.tile_max_aspect, self.TILE_BAND_ASPECT,
+                                            self.TILE_OVERLAP, self.TILE_IOU_THRESHOLD,
+                                            self.TILE_CONTAINMENT_THRESHOLD]
+        return self._ocr_config
+
+    def _ocr_cache_key(self, image_path: Path, content_digest: Optional[str] = None) -> Optional[str]:
+        if self.ocr_cache is None:
+            return None
+        if content_digest is None:
+            content_digest = DigestCache.compute(image_path)
+        return self.ocr_cache.make_key(content_digest, self.ocr_config())
 
-        # 確保模型已載入 (延遲載入)
-        if self.reader is None:
-            self.reader = self.get_reader()
+    def ocr_image(self, image_path: Path, content_digest: Optional[str] = None,
+                  timings: Optional[Dict[str, float]] = None) -> Dict:
+        """
+        使用 EasyOCR 識別圖片並切割文字區域
+
+        Args:
+            image_path: 圖片路徑
+            content_digest: 圖片的 MD5 (已知時傳入, 避免重新讀取文件)
+            timings: 提供時寫入各階段耗時 (毫秒): decode, cache, ocr
+                (縮小檢測時另有 detect / recognize), crop, write, copy
+        """
+        print(f"\n🔍 Processing: {image_path.name}")
 
         # 讀取原圖
+        start = time.perf_counter()
         img = self.preprocess_image(image_path)
+        _record_stage(timings, 'decode', start)
+
+        start = time.perf_counter()
+        cache_key = self._ocr_cache_key(image_path, content_digest)
+        result = self.ocr_cache.get(cache_key) if cache_key else None
+        _record_stage(timings, 'cache', start)
+        if result is None:
+            start = time.perf_counter()
+            with self.checkout_reader() as reader:
+                result = self.readtext(reader, img, timings=timings)
+            if cache_key:
+                self.ocr_cache.put(cache_key, result)
+            _record_stage(timings, 'ocr', start)
+        else:
+            print("   ⚡ OCR cache hit")
 
-        # 直接使用原圖進行 OCR
-        result = self.reader.readtext(img)
+        return self.build_annotation(image_path, img, result, timings=timings)
 
+    def build_annotation(self, image_path: Path, img: np.ndarray, result: List,
+                         timings: Optional[Dict[str, float]] = None) -> Dict:
+        """
+        根據 readtext 結果切割文字區域、保存原圖並生成標註
+
+        Args:
+            image_path: 圖片路徑
+            img: 已解碼的原圖
+            result: EasyOCR readtext 輸出 [(bbox, text, confidence), ...]
+            timings: 提供時寫入 crop / write / copy 階段耗時 (毫秒)
+
+        Returns:
+            標註字典
+        """
         # 整理結果 - 只保留高信心度的結果，並切割文字區域
         ocr_results = []
         full_text_lines = []
         filtered_count = 0
         base_name = Path(image_path).stem
 
+        kept = []
         for idx, (bbox, text, confidence) in enumerate(result):
             # 過濾低信心度結果
             if confidence < self.CONFIDENCE_THRESHOLD:
@@ -357,14 +602,20 @@ class ReceiptDatasetCreator:
 
             # 將 numpy 數組轉換為 Python list
             bbox_list = [[float(x), float(y)] for x, y in bbox]
+            kept.append((idx, bbox_list, text, confidence))
 
-            # 切割文字區域並保存到 crops/ 目錄
+        # 使用已解碼的原圖一次切割所有文字區域並保存到 crops/ 目錄
+        start = time.perf_counter()
+        crops = self.crop_text_regions_batch(img, [bbox_list for _, bbox_list, _, _ in kept])
+        _record_stage(timings, 'crop', start)
+
+        start = time.perf_counter()
+        for (idx, bbox_list, text, confidence), cropped_img in zip(kept, crops):
             try:
-                cropped_img = self.crop_text_regions(image_path, bbox_list)
                 if cropped_img is not None and cropped_img.size > 0:
                     crop_filename = f"{base_name}_crop_{idx:03d}.jpg"
                     crop_path = self.crops_dir / crop_filename
-                    cv2.imwrite(str(crop_path), cropped_img)
+                    self._write_crop(crop_path, cropped_img)
 
                     ocr_results.append({
                         'bbox': bbox_list,
@@ -377,13 +628,17 @@ class ReceiptDatasetCreator:
                 print(f"   ⚠️  切割區域 {idx} 失敗: {e}")
                 continue
 
+        _record_stage(timings, 'write', start)
+
         if filtered_count > 0:
             print(
                 f"   🔍 過濾掉 {filtered_count} 個低信心度結果 (< {self.CONFIDENCE_THRESHOLD})")
 
         # 保存原圖到 processed/original_images 目錄
+        start = time.perf_counter()
         processed_img_path = self.original_images_dir / image_path.name
         shutil.copy(str(image_path), str(processed_img_path))
+        _record_stage(timings, 'copy', start)
 
         return {
             'image_name': image_path.name,
@@ -395,8 +650,369 @@ class ReceiptDatasetCreator:
             'verified': False  # 標記是否已人工驗證
         }
 
-    def auto_generate_annotations(self, overwrite: bool = False):
-        """自動為 input/ 目錄中的所有圖片生成標註"""
+    @contextmanager
+    def checkout_reader(self) -> Iterator:
+        """借用 OCR Reader: 有 Reader 池時從池中借出, 否則使用 (延遲載入的) 共用 Reader"""
+        if self.reader_pool is not None:
+            with self.reader_pool.checkout() as reader:
+                yield reader
+            return
+
+        if self.reader is None:
+            self.reader = self.get_reader(self.OCR_LANGS, self.OCR_GPU)
+        yield self.reader
+
+    def readtext(self, reader, img: np.ndarray, batch_size: int = 1,
+                 timings: Optional[Dict[str, float]] = None) -> List:
+        """
+        對單張圖片執行 OCR
+
+        設定 tile_max_aspect 且圖片高寬比超過此值時改用分塊 OCR (見 _readtext_tiled)
+        """
+        height, width = img.shape[:2]
+        if self.tile_max_aspect and height > width * self.tile_max_aspect:
+            return self._readtext_tiled(reader, img, batch_size)
+        return self._readtext_single(reader, img, batch_size, timings)
+
+    def _readtext_single(self, reader, img: np.ndarray, batch_size: int = 1,
+                         timings: Optional[Dict[str, float]] = None) -> List:
+        """
+        設定 detect_max_side 時, 文字檢測在縮小的圖片上進行, 檢測框按比例映射回原圖坐標後
+        再用原圖識別, 所以識別結果和 crop 仍是原圖解析度; 否則直接使用原圖 readtext
+        """
+        height, width = img.shape[:2]
+        if not self.detect_max_side or max(height, width) <= self.detect_max_side:
+            return reader.readtext(img, batch_size=batch_size)
+
+        start = time.perf_counter()
+        scale = self.detect_max_side / max(height, width)
+        small = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        horizontal_list, free_list = reader.detect(small)
+        horizontal, free = self.remap_detections(horizontal_list[0], free_list[0],
+                                                 1.0 / scale, width, height)
+        _record_stage(timings, 'detect', start)
+
+        start = time.perf_counter()
+        result = reader.recognize(img, horizontal_list=horizontal, free_list=free,
+                                  batch_size=batch_size)
+        _record_stage(timings, 'recognize', start)
+        return result
+
+    def tile_offsets(self, height: int, width: int) -> Tuple[List[int], int]:
+        """
+        計算橫帶的起始 y 坐標和高度
+
+        所有橫帶高度相同 (最後一條與圖片底部對齊), 可以一起送入 readtext_batched
+        """
+        band_height = min(height, int(width * self.TILE_BAND_ASPECT))
+        stride = max(1, band_height - int(band_height * self.TILE_OVERLAP))
+        offsets = list(range(0, height - band_height, stride)) + [height - band_height]
+        return offsets, band_height
+
+    def _readtext_tiled(self, reader, img: np.ndarray, batch_size: int = 1) -> List:
+        """
+        分塊 OCR: 把長收據切成重疊的橫帶, 每條橫帶的文字保持原始大小
+
+        橫帶尺寸相同, 原圖檢測時一次送入 readtext_batched (GPU 上並行推理);
+        重疊區域中重複檢測到的文字由 merge_tile_results 去重
+        """
+        height, width = img.shape[:2]
+        offsets, band_height = self.tile_offsets(height, width)
+        # 切片只是原圖的視圖, 不複製像素
+        bands = [img[y:y + band_height] for y in offsets]
+
+        if self.detect_max_side:
+            band_results = [self._readtext_single(reader, band, batch_size) for band in bands]
+        else:
+            band_results = reader.readtext_batched(bands, batch_size=batch_size)
+
+        return self.merge_tile_results(band_results, offsets, band_height, height)
+
+    @classmethod
+    def merge_tile_results(cls, band_results: List[List], offsets: List[int],
+                           band_height: int, image_height: int) -> List:
+        """
+        合併各橫帶的 OCR 結果並去除重疊區域的重複框
+
+        框先平移回原圖坐標, 再用外接矩形向量化計算兩兩 IoU 和交集比例;
+        重複的框優先保留沒有被橫帶邊界截斷的, 其次信心度較高的
+
+        Args:
+            band_results: 每條橫帶的 readtext 輸出
+            offsets: 每條橫帶的起始 y 坐標
+            band_height: 橫帶高度
+            image_height: 原圖高度
+
+        Returns:
+            合併後的 readtext 輸出 (按橫帶和原始順序排列)
+        """
+        items = []
+        for band_idx, (result, y0) in enumerate(zip(band_results, offsets)):
+            for bbox, text, confidence in result:
+                points = [[float(x), float(y) + y0] for x, y in bbox]
+                items.append((band_idx, points, text, float(confidence)))
+        if len(items) <= 1:
+            return [(points, text, confidence) for _, points, text, confidence in items]
+
+        bands = np.array([band for band, _, _, _ in items])
+        points = np.array([p for _, p, _, _ in items], dtype=np.float64)
+        confidence = np.array([c for _, _, _, c in items])
+        rects = np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1)
+
+        # 碰到橫帶內部邊界 (不是圖片頂部/底部) 的框可能被截斷
+        band_top = np.asarray(offsets, dtype=np.float64)[bands]
+        band_bottom = band_top + band_height
+        margin = 2.0
+        truncated = (((rects[:, 1] <= band_top + margin) & (band_top > 0)) |
+                     ((rects[:, 3] >= band_bottom - margin) & (band_bottom < image_height)))
+
+        # 兩兩交集、IoU 和交集佔較小框面積的比例 (N×N)
+        area = np.prod(rects[:, 2:] - rects[:, :2], axis=1).clip(min=1e-6)
+        inter_w = (np.minimum(rects[:, None, 2], rects[None, :, 2]) -
+                   np.maximum(rects[:, None, 0], rects[None, :, 0])).clip(min=0)
+        inter_h = (np.minimum(rects[:, None, 3], rects[None, :, 3]) -
+                   np.maximum(rects[:, None, 1], rects[None, :, 1])).clip(min=0)
+        inter = inter_w * inter_h
+        iou = inter / (area[:, None] + area[None, :] - inter)
+        containment = inter / np.minimum(area[:, None], area[None, :])
+        # 同一橫帶內的框由檢測器自己處理, 只比較不同橫帶的框
+        duplicate = (((iou > cls.TILE_IOU_THRESHOLD) |
+                      (containment > cls.TILE_CONTAINMENT_THRESHOLD)) &
+                     (bands[:, None] != bands[None, :]))
+
+        # 優先順序: 未截斷 > 信心度
+        order = np.lexsort((-confidence, truncated))
+        keep = np.zeros(len(items), dtype=bool)
+        suppressed = np.zeros(len(items), dtype=bool)
+        for i in order:
+            if suppressed[i]:
+                continue
+            keep[i] = True
+            suppressed |= duplicate[i]
+
+        return [(points, text, conf) for (_, points, text, conf), kept in zip(items, keep) if kept]
+
+    @staticmethod
+    def remap_detections(horizontal_list: List, free_list: List, factor: float,
+                         width: int, height: int) -> Tuple[List, List]:
+        """
+        把 EasyOCR detect 的輸出按比例映射回原圖坐標
+
+        Args:
+            horizontal_list: 水平框 [[x_min, x_max, y_min, y_max], ...]
+            free_list: 任意四邊形 [[[x, y] * 4], ...]
+            factor: 坐標放大倍數 (原圖尺寸 / 檢測圖尺寸)
+            width, height: 原圖尺寸
+        """
+        horizontal = []
+        if len(horizontal_list):
+            boxes = np.rint(np.asarray(horizontal_list, dtype=np.float64) * factor).astype(np.int64)
+            boxes[:, :2] = np.clip(boxes[:, :2], 0, width)
+            boxes[:, 2:] = np.clip(boxes[:, 2:], 0, height)
+            horizontal = boxes.tolist()
+
+        free = []
+        if len(free_list):
+            points = np.asarray(free_list, dtype=np.float64) * factor
+            points[..., 0] = np.clip(points[..., 0], 0, width)
+            points[..., 1] = np.clip(points[..., 1], 0, height)
+            free = points.tolist()
+
+        return horizontal, free
+
+    def _readtext_grouped(self, reader, images: List[np.ndarray], batch_size: int) -> List[List]:
+        """
+        對一組圖片執行 OCR, 尺寸相同的圖片合併為一個批次送入檢測器
+
+        readtext_batched 要求同一批次的圖片尺寸一致, 尺寸獨特的圖片改用 readtext;
+        batch_size 同時作為識別階段的批次大小
+        """
+        if self.detect_max_side or self.tile_max_aspect:
+            # 縮小檢測和分塊 OCR 需要逐張處理坐標
+            return [self.readtext(reader, img, batch_size) for img in images]
+
+        results: List[Optional[List]] = [None] * len(images)
+
+        groups: Dict[Tuple, List[int]] = {}
+        for i, img in enumerate(images):
+            groups.setdefault(img.shape, []).append(i)
+
+        for indices in groups.values():
+            if len(indices) == 1:
+                i = indices[0]
+                results[i] = reader.readtext(images[i], batch_size=batch_size)
+                continue
+
+            batched = reader.readtext_batched(
+                [images[i] for i in indices], batch_size=batch_size)
+            for i, result in zip(indices, batched):
+                results[i] = result
+
+        return results
+
+    def ocr_images_batched(self, image_paths: List[Path], batch_size: int = 4,
+                           digests: Optional[List[Optional[str]]] = None
+                           ) -> Iterator[Tuple[Path, Optional[Dict], Optional[Exception]]]:
+        """
+        批量 OCR 多張圖片
+
+        下一批圖片的解碼和上一批 crop 的寫入在線程池中進行, 與當前批次的推理重疊
+
+        Args:
+            image_paths: 圖片路徑列表
+            batch_size: 每批圖片數量
+            digests: 與 image_paths 對應的 MD5 (已知時傳入, 避免重新讀取文件計算快取鍵)
+
+        Yields:
+            (圖片路徑, 標註 或 None, 錯誤 或 None), 順序與 image_paths 相同
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        if digests is None:
+            digests = [None] * len(image_paths)
+
+        batches = [list(zip(image_paths[i:i + batch_size], digests[i:i + batch_size]))
+                   for i in range(0, len(image_paths), batch_size)]
+        if not batches:
+            return
+
+        def submit_batch(batch):
+            return [(path, io_pool.submit(self.preprocess_image, path),
+                     io_pool.submit(self._ocr_cache_key, path, digest))
+                    for path, digest in batch]
+
+        with ThreadPoolExecutor(max_workers=self.INGEST_IO_WORKERS) as io_pool:
+            decoding = submit_batch(batches[0])
+            # 上一批每張圖片的 (路徑, 寫入 future 或 None, 錯誤 或 None), 按輸入順序
+            writing_prev: List[Tuple[Path, object, Optional[Exception]]] = []
+
+            for batch_idx in range(len(batches)):
+                # 收集本批解碼結果和快取鍵
+                paths, images, keys = [], [], []
+                errors: Dict[int, Exception] = {}
+                for pos, (path, future, key_future) in enumerate(decoding):
+                    try:
+                        images.append(future.result())
+                        keys.append(key_future.result())
+                        paths.append(path)
+                    except Exception as e:
+                        errors[pos] = e
+
+                # 提前解碼下一批
+                if batch_idx + 1 < len(batches):
+                    decoding_next = submit_batch(batches[batch_idx + 1])
+                else:
+                    decoding_next = []
+
+                # 快取命中的圖片不需要推理
+                results: List[Optional[List]] = [
+                    self.ocr_cache.get(key) if key else None for key in keys]
+                misses = [i for i, result in enumerate(results) if result is None]
+
+                print(f"\n🔍 Processing batch {batch_idx + 1}/{len(batches)} ({len(paths)} images"
+                      f"{', ' + str(len(paths) - len(misses)) + ' cached' if len(misses) < len(paths) else ''})")
+                futures: List[Optional[object]] = []
+                batch_error: Optional[Exception] = None
+                try:
+                    if misses:
+                        with self.checkout_reader() as reader:
+                            inferred = self._readtext_grouped(
+                                reader, [images[i] for i in misses], batch_size)
+                        for i, result in zip(misses, inferred):
+                            results[i] = result
+                            if keys[i]:
+                                self.ocr_cache.put(keys[i], result)
+                    futures = [io_pool.submit(self.build_annotation, path, img, result)
+                               for path, img, result in zip(paths, images, results)]
+                except Exception as e:
+                    futures = [None] * len(paths)
+                    batch_error = e
+                del images
+
+                # 失敗的圖片按原位置與成功的圖片合併, 保持輸入順序
+                writing = []
+                decoded = iter(futures)
+                for pos, (path, _, _) in enumerate(decoding):
+                    if pos in errors:
+                        writing.append((path, None, errors[pos]))
+                        continue
+                    future = next(decoded)
+                    writing.append((path, future, batch_error))
+                decoding = decoding_next
+
+                # 上一批的寫入應已在本批推理期間完成
+                yield from self._collect_batch(writing_prev)
+                writing_prev = writing
+
+            yield from self._collect_batch(writing_prev)
+
+    @staticmethod
+    def _collect_batch(writing: List[Tuple[Path, object, Optional[Exception]]]
+                       ) -> Iterator[Tuple[Path, Optional[Dict], Optional[Exception]]]:
+        """按順序取出一批圖片的標註或錯誤"""
+        for path, future, error in writing:
+            if future is None:
+                yield path, None, error
+                continue
+            try:
+                yield path, future.result(), None
+            except Exception as e:
+                yield path, None, e
+
+    def _print_annotation_preview(self, annotation: Dict):
+        """顯示識別結果"""
+        print(
+            f"✅ Detected {len(annotation['ocr_results'])} text regions")
+        print(f"📝 Preview:")
+        print("-" * 60)
+        print(annotation['full_text'][:500])  # 顯示前 500 字符
+        if len(annotation['full_text']) > 500:
+            print("...")
+        print("-" * 60)
+
+    def ocr_worker_args(self) -> Dict:
+        """工作進程中建立 ReceiptDatasetCreator 的參數 (共用相同的目錄和快取設定)"""
+        return {
+            'input_dir': str(self.input_dir),
+            'processed_dir': str(self.processed_dir),
+            'crops_dir': str(self.crops_dir),
+            'dataset_dir': str(self.dataset_dir),
+            'use_ocr_cache': self.ocr_cache is not None,
+            'detect_max_side': self.detect_max_side,
+            'tile_max_aspect': self.tile_max_aspect,
+        }
+
+    def ocr_images_multiprocess(self, image_paths: List[Path], workers: int,
+                                threads_per_worker: int = 1, batch_size: int = 1
+                                ) -> Iterator[Tuple[Path, Optional[Dict], Optional[Exception]]]:
+        """
+        使用多個工作進程 OCR 多張圖片 (每個進程一個 Reader), 按完成順序返回結果
+
+        Args:
+            image_paths: 圖片路徑列表
+            workers: 工作進程數
+            threads_per_worker: 每個進程的 torch / OpenCV 線程數
+            batch_size: 每個進程每批 OCR 的圖片數量
+        """
+        from ocr_workers import OcrProcessPool
+
+        with OcrProcessPool(self.ocr_worker_args(), workers, threads_per_worker,
+                            batch_size) as pool:
+            for path, annotation, error, _ in pool.map(image_paths):
+                yield path, annotation, error
+
+    def auto_generate_annotations(self, overwrite: bool = False, batch_size: int = 1,
+                                  workers: int = 1, threads_per_worker: int = 1):
+        """
+        自動為 input/ 目錄中的所有圖片生成標註
+
+        Args:
+            overwrite: 是否覆蓋已有的標註
+            batch_size: 每批 OCR 的圖片數量 (1 = 逐張處理)
+            workers: OCR 工作進程數 (>1 啟用多進程模式)
+            threads_per_worker: 多進程模式下每個進程的 torch / OpenCV 線程數
+        """
         import gc  # 垃圾回收
 
         image_files = list(self.input_dir.glob('*.jpg')) + \
@@ -405,37 +1021,62 @@ class ReceiptDatasetCreator:
 
         print(f"\n📸 Found {len(image_files)} images in {self.input_dir}")
 
-        for idx, img_path in enumerate(image_files, 1):
-            print(f"\n[{idx}/{len(image_files)}] Processing {img_path.name}")
+        if batch_size > 1 or workers > 1:
+            pending = []
+            for img_path in image_files:
+                # 跳過已處理的圖片
+                if img_path.name in self.annotations and not overwrite:
+                    print(f"⏭️  Skipping {img_path.name} (already processed)")
+                    continue
+                pending.append(img_path)
+
+            if workers > 1:
+                print(f"⚡ Multi-process mode: {len(pending)} images, {workers} workers × "
+                      f"{threads_per_worker} threads, batch size {batch_size}")
+                results = self.ocr_images_multiprocess(pending, workers, threads_per_worker,
+                                                       batch_size)
+            else:
+                print(f"⚡ Batched mode: {len(pending)} images, batch size {batch_size}")
+                results = self.ocr_images_batched(pending, batch_size)
 
-            # 跳過已處理的圖片
-            if img_path.name in self.annotations and not overwrite:
-                print(f"⏭️  Skipping (already processed)")
-                continue
+            for idx, (img_path, annotation, error) in enumerate(results, 1):
+                print(f"\n[{idx}/{len(pending)}] {img_path.name}")
+                if error is not None:
+                    print(f"❌ Error processing {img_path.name}: {error}")
+                    continue
 
-            try:
-                annotation = self.ocr_image(img_path)
                 self.annotations[img_path.name] = annotation
+                self._print_annotation_preview(annotation)
 
-                # 顯示識別結果
-                print(
-                    f"✅ Detected {len(annotation['ocr_results'])} text regions")
-                print(f"📝 Preview:")
-                print("-" * 60)
-                print(annotation['full_text'][:500])  # 顯示前 500 字符
-                if len(annotation['full_text']) > 500:
-                    print("...")
-                print("-" * 60)
-
-            except Exception as e:
-                print(f"❌ Error processing {img_path.name}: {e}")
-
-            finally:
                 # 記憶體管理: 每處理 10 張圖片後執行垃圾回收
                 if idx % 10 == 0:
                     gc.collect()
-                    print(
-                        f"   🧹 Memory cleanup (processed {idx}/{len(image_files)})")
+
+        else:
+            for idx, img_path in enumerate(image_files, 1):
+                print(f"\n[{idx}/{len(image_files)}] Processing {img_path.name}")
+
+                # 跳過已處理的圖片
+                if img_path.name in self.annotations and not overwrite:
+                    print(f"⏭️  Skipping (already processed)")
+                    continue
+
+                try:
+                    annotation = self.ocr_image(img_path)
+                    self.annotations[img_path.name] = annotation
+
+                    # 顯示識別結果
+                    self._print_annotation_preview(annotation)
+
+                except Exception as e:
+                    print(f"❌ Error processing {img_path.name}: {e}")
+
+                finally:
+                    # 記憶體管理: 每處理 10 張圖片後執行垃圾回收
+                    if idx % 10 == 0:
+                        gc.collect()
+                        print(
+                            f"   🧹 Memory cleanup (processed {idx}/{len(image_files)})")
 
         # 保存標註
         self.save_annotations()
@@ -445,6 +1086,46 @@ class ReceiptDatasetCreator:
         # 最終記憶體清理
         gc.collect()
 
+    def watch_input_folder(self, batch_size: int = 1):
+        """
+        監聽 input/ 目錄, 新圖片寫入完成後自動 OCR (Ctrl+C 結束)
+
+        Args:
+            batch_size: 每批 OCR 的圖片數量
+        """
+        import queue
+        from input_watcher import InputWatcher
+
+        ready: "queue.Queue[List[Path]]" = queue.Queue()
+        watcher = InputWatcher(self.input_dir, ready.put)
+        watcher.start()
+        print(f"\n👀 Watching {self.input_dir} ({watcher.backend}), press Ctrl+C to stop")
+
+        try:
+            while True:
+                pending = [p for p in ready.get() if p.name not in self.annotations]
+                if not pending:
+                    continue
+
+                print(f"\n📥 {len(pending)} new image(s)")
+                added = []
+                for img_path, annotation, error in self.ocr_images_batched(
+                        pending, max(1, batch_size)):
+                    if error is not None:
+                        print(f"❌ Error processing {img_path.name}: {error}")
+                        continue
+                    self.annotations[img_path.name] = annotation
+                    added.append(img_path.name)
+                    self._print_annotation_preview(annotation)
+
+                self.store.upsert_images(self.annotations, added)
+                print(f"💾 Saved {len(added)} new annotation(s)")
+
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+        finally:
+            watcher.stop()
+
     def crop_text_regions(self, image_path: Path, bbox, padding: int = 5):
         """
         根據 bbox 切割文字區域
@@ -474,33 +1155,71 @@ class ReceiptDatasetCreator:
         if img is None:
             raise FileNotFoundError(f"Cannot read image: {image_path}")
 
-        try:
-            # 獲取 bbox 的最小外接矩形
-            points = np.array(bbox, dtype=np.float32)
-            x_min = max(0, int(np.min(points[:, 0])) - padding)
-            y_min = max(0, int(np.min(points[:, 1])) - padding)
-            x_max = min(img.shape[1], int(np.max(points[:, 0])) + padding)
-            y_max = min(img.shape[0], int(np.max(points[:, 1])) + padding)
-
-            # 驗證裁切區域
-            if x_max <= x_min or y_max <= y_min:
-                raise ValueError(
-                    f"Invalid crop region: x({x_min},{x_max}), y({y_min},{y_max})")
+        return self.crop_text_regions_batch(img, [bbox], padding)[0]
 
-            # 切割圖片
-            cropped = img[y_min:y_max, x_min:x_max]
+    def crop_text_regions_batch(self, img: np.ndarray, bboxes: List, padding: int = 5
+                                ) -> List[Optional[np.ndarray]]:
+        """
+        從已解碼的圖片一次切割多個文字區域
+
+        所有 bbox 疊成 (N, 4, 2) 數組, 用向量化的 min/max 一次計算裁切邊界,
+        圖片只需解碼一次
+
+        Args:
+            img: 已解碼的圖片 (numpy array)
+            bboxes: 文字框坐標列表, 每個為 [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
+            padding: 邊界填充像素
+
+        Returns:
+            切割後的圖片列表 (與 bboxes 一一對應, 無效區域為 None)
+        """
+        # 輸入驗證
+        if img is None or not isinstance(img, np.ndarray):
+            raise ValueError("Invalid image: expected numpy array")
+        if img.size == 0:
+            raise ValueError("Invalid image: empty array")
+        if padding < 0:
+            raise ValueError(f"Padding must be non-negative, got {padding}")
 
-            return cropped
+        if len(bboxes) == 0:
+            return []
 
+        try:
+            points = np.asarray(bboxes, dtype=np.float32)
         except (ValueError, TypeError) as e:
             print(f"   ⚠️  裁切失敗: {e}")
-            return None
-        except Exception as e:
-            print(f"   ❌  未預期的錯誤: {type(e).__name__}: {e}")
-            return None
+            return [None] * len(bboxes)
+
+        if points.ndim != 3 or points.shape[1:] != (4, 2):
+            raise ValueError(
+                f"Invalid bbox format: expected (N, 4, 2), got {points.shape}")
+
+        # 獲取每個 bbox 的最小外接矩形 (向量化)
+        height, width = img.shape[:2]
+        mins = points.min(axis=1).astype(np.int64) - padding
+        maxs = points.max(axis=1).astype(np.int64) + padding
+        x_min = np.maximum(mins[:, 0], 0)
+        y_min = np.maximum(mins[:, 1], 0)
+        x_max = np.minimum(maxs[:, 0], width)
+        y_max = np.minimum(maxs[:, 1], height)
+        valid = (x_max > x_min) & (y_max > y_min)
+
+        crops: List[Optional[np.ndarray]] = []
+        for i in range(len(points)):
+            if not valid[i]:
+                print(
+                    f"   ⚠️  裁切失敗: Invalid crop region: x({x_min[i]},{x_max[i]}), y({y_min[i]},{y_max[i]})")
+                crops.append(None)
+                continue
+
+            # 切割圖片
+            crops.append(img[y_min[i]:y_max[i], x_min[i]:x_max[i]])
+
+        return crops
 
     def generate_training_dataset(self, train_ratio: float = 0.8, valid_ratio: float = 0.1,
-                                  test_ratio: float = 0.1, crop_text_regions: bool = True):
+                                  test_ratio: float = 0.1, crop_text_regions: bool = True,
+                                  incremental: bool = True):
         """
         生成訓練數據集 - gt.txt 格式 (用於 deep-text-recognition-benchmark)
 
@@ -509,6 +1228,8 @@ class ReceiptDatasetCreator:
             valid_ratio: 驗證集比例 (預設 0.1)
             test_ratio: 測試集比例 (預設 0.1)
             crop_text_regions: 是否切割文字區域 (True=訓練Recognition, False=訓練完整OCR)
+            incremental: 增量更新 (只新增/移除有變化的圖片, 使用硬連結);
+                False 時清空後重新複製
 
         目錄結構 (crop_text_regions=True):
         dataset_gt/
@@ -572,59 +1293,33 @@ class ReceiptDatasetCreator:
 
         if crop_text_regions:
             # 模式 1: 按 crop (文字區域) 分割數據集
-            # 收集所有已驗證的 crop
-            all_crops = []
-            for image_name, anno in verified.items():
-                for ocr_result in anno.get('ocr_results', []):
-                    if ocr_result.get('verified', False):
-                        all_crops.append({
-                            'image_name': image_name,
-                            'anno': anno,
-                            'ocr_result': ocr_result
-                        })
-
-            # 打亂並分割
-            np.random.seed(42)
-            np.random.shuffle(all_crops)
+            # 每個 crop 按檔名的雜湊值固定分配到 split, 新增 crop 不會改變已有樣本的分配
+            # {split: {image_name: (anno, crop_indices)}}
+            split_groups: Dict[str, Dict[str, Tuple[Dict, List[int]]]] = {
+                'train': {}, 'valid': {}, 'test': {}}
 
-            n_total = len(all_crops)
-            n_train = int(n_total * train_ratio)
-            n_valid = int(n_total * valid_ratio)
-            n_test = int(n_total * test_ratio)
-
-            # 確保所有數據都被使用 (處理四捨五入誤差)
-            if n_train + n_valid + n_test < n_total:
-                n_test = n_total - n_train - n_valid
-
-            train_crops = all_crops[:n_train]
-            valid_crops = all_crops[n_train:n_train + n_valid]
-            test_crops = all_crops[n_train +
-                                   n_valid:n_train + n_valid + n_test]
+            for image_name, anno in verified.items():
+                for idx, ocr_result in enumerate(anno.get('ocr_results', [])):
+                    if not ocr_result.get('verified', False):
+                        continue
+                    crop_id = ocr_result.get('crop_filename') or f"{image_name}#{idx}"
+                    split = self.assign_split(crop_id, train_ratio, valid_ratio)
+                    group = split_groups[split].get(image_name)
+                    if group is None:
+                        group = split_groups[split][image_name] = (anno, [])
+                    group[1].append(idx)
+
+            def to_items(groups):
+                return [(k, anno, indices) for k, (anno, indices) in groups.items()]
+
+            train_items = to_items(split_groups['train'])
+            valid_items = to_items(split_groups['valid'])
+            test_items = to_items(split_groups['test'])
 
             print(
-                f"📈 Split by crops: Train={len(train_crops)}, Valid={len(valid_crops)}, Test={len(test_crops)}")
-
-            # 轉換為舊格式 (為了相容後續代碼)
-            def crops_to_items(crops):
-                # 將 crop 列表轉換為 {image_name: anno} 格式，但標記哪些 ocr_result 屬於這個 split
-                items_dict = {}
-                for crop in crops:
-                    img_name = crop['image_name']
-                    if img_name not in items_dict:
-                        items_dict[img_name] = {
-                            'anno': crop['anno'],
-                            'crop_indices': []
-                        }
-                    # 找到這個 ocr_result 在原始列表中的索引
-                    ocr_idx = crop['anno']['ocr_results'].index(
-                        crop['ocr_result'])
-                    items_dict[img_name]['crop_indices'].append(ocr_idx)
-
-                return [(k, v['anno'], v['crop_indices']) for k, v in items_dict.items()]
-
-            train_items = crops_to_items(train_crops)
-            valid_items = crops_to_items(valid_crops)
-            test_items = crops_to_items(test_crops)
+                f"📈 Split by crops: Train={sum(len(i[2]) for i in train_items)}, "
+                f"Valid={sum(len(i[2]) for i in valid_items)}, "
+                f"Test={sum(len(i[2]) for i in test_items)}")
 
         else:
             # 模式 2: 按圖片分割數據集 (完整 OCR 訓練)
@@ -665,134 +1360,213 @@ class ReceiptDatasetCreator:
             ('valid', valid_items),
             ('test', test_items)
         ]:
-            if not split_items:
-                continue
-
             split_dir = self.dataset_dir / split_name
             split_dir.mkdir(exist_ok=True)
 
-            # 創建 gt.txt (tab 分隔格式)
-            gt_file = split_dir / 'gt.txt'
-
-            print(f"\n📝 Creating {split_name} dataset...")
-
-            total_samples = 0
-
+            samples = self._collect_split_samples(split_items, crop_text_regions)
             try:
-                with open(gt_file, 'w', encoding='utf-8') as f:
-
-                    for item in split_items:
-                        # 解包新格式: (image_name, anno, crop_indices)
-                        if len(item) == 3:
-                            image_name, anno, crop_indices = item
-                        else:
-                            # 向後兼容舊格式 (實際上所有項目都是3元組)
-                            image_name, anno = item[:2]  # type: ignore
-                            crop_indices = None
-
-                        src_img = Path(anno['processed_image_path'])
-
-                        if not src_img.exists():
-                            print(f"  ⚠️  Image not found: {src_img}")
-                            continue
-
-                        if crop_text_regions:
-                            # 模式 1: 使用已切割的文字區域 (從 crops/ 目錄)
-                            # 如果有 crop_indices，只處理這些索引的 OCR 結果
-                            ocr_results = anno['ocr_results']
-
-                            if crop_indices is not None:
-                                # 只處理指定的 crop
-                                ocr_results_to_process = [
-                                    ocr_results[i] for i in crop_indices if i < len(ocr_results)]
-                            else:
-                                # 處理所有已驗證的 crop
-                                ocr_results_to_process = [
-                                    ocr for ocr in ocr_results if ocr.get('verified', False)]
-
-                            for ocr_result in ocr_results_to_process:
-                                text = ocr_result['text'].strip()
-                                crop_filename = ocr_result.get('crop_filename')
-                                confidence = ocr_result['confidence']
-
-                                if not text or not crop_filename:
-                                    continue
-
-                                # 清理文字 (移除換行符和 tab)
-                                text = text.replace('\n', ' ').replace(
-                                    '\r', '').replace('\t', ' ')
-                                text = ' '.join(text.split())
-
-                                if not text:
-                                    continue
-
-                                # 從 crops/ 目錄複製到對應的 split 目錄
-                                try:
-                                    src_crop = self.crops_dir / crop_filename
-                                    if not src_crop.exists():
-                                        print(
-                                            f"  ⚠️  Crop not found: {crop_filename}")
-                                        continue
-
-                                    dst_crop = split_dir / crop_filename
-                                    shutil.copy(src_crop, dst_crop)
-
-                                    # 寫入 gt.txt (tab 分隔: filename\ttext)
-                                    f.write(f"{crop_filename}\t{text}\n")
-                                    total_samples += 1
-                                    print(
-                                        f"  ✓ {crop_filename}: {text} (信心度: {confidence:.2f})")
-
-                                except Exception as e:
-                                    print(
-                                        f"  ⚠️  處理 {crop_filename} 失敗: {e}")
-                                    continue
-
-                        else:
-                            # 模式 2: 完整圖片 (訓練完整 OCR)
-                            try:
-                                dst_img = split_dir / image_name
-                                shutil.copy(src_img, dst_img)
-
-                                # 準備標註文字 (單行,移除換行符和 tab)
-                                label_text = anno.get(
-                                    'corrected_text') or anno['full_text']
-
-                                # 清理文字
-                                label_text = label_text.replace(
-                                    '\n', ' ').replace('\r', '').replace('\t', ' ')
-                                label_text = ' '.join(label_text.split())
-
-                                if not label_text:
-                                    print(f"  ⚠️  跳過空標籤: {image_name}")
-                                    continue
-
-                                # 寫入 gt.txt (tab 分隔: filename\ttext)
-                                f.write(f"{image_name}\t{label_text}\n")
-                                total_samples += 1
-
-                                print(f"  ✓ {image_name}")
-
-                            except Exception as e:
-                                print(f"  ⚠️  處理 {image_name} 失敗: {e}")
-                                continue
-
-                print(f"✅ Created {split_name} set: {total_samples} samples")
-                print(f"   📄 gt.txt: {gt_file}")
-                print(f"   📂 Images: {split_dir}")
-
+                stats = self._sync_split(split_dir, samples, incremental=incremental)
             except (IOError, OSError) as e:
-                print(f"❌ 無法創建 gt.txt 文件 {gt_file}: {e}")
-                continue
-            except Exception as e:
-                print(f"❌ 未預期的錯誤: {type(e).__name__}: {e}")
+                print(f"❌ 無法更新 {split_name} 數據集 {split_dir}: {e}")
                 continue
 
+            print(f"✅ {split_name}: {stats['total']} samples "
+                  f"(+{stats['added']} / -{stats['removed']} / "
+                  f"{stats['relabeled']} relabeled / {stats['kept']} unchanged"
+                  f"{', ' + str(stats['missing']) + ' missing' if stats['missing'] else ''})")
+
         print(f"\n{'='*70}")
         print(f"✅ Training dataset generated in {self.dataset_dir}")
         print(f"📄 Format: gt.txt (tab-separated)")
         print(f"{'='*70}\n")
 
+    @staticmethod
+    def assign_split(key: str, train_ratio: float, valid_ratio: float) -> str:
+        """
+        按 key 的雜湊值決定 split (與其他樣本無關, 同一個 key 永遠得到同一結果)
+
+        Returns:
+            'train', 'valid' 或 'test'
+        """
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        u = int.from_bytes(digest, 'big') / 2 ** 64
+        if u < train_ratio:
+            return 'train'
+        if u < train_ratio + valid_ratio:
+            return 'valid'
+        return 'test'
+
+    @staticmethod
+    def _clean_label(text: str) -> str:
+        """清理標籤文字 (單行, 移除換行符和 tab)"""
+        text = text.replace('\n', ' ').replace('\r', '').replace('\t', ' ')
+        return ' '.join(text.split())
+
+    def _collect_split_samples(self, split_items, crop_text_regions: bool) -> List[Tuple[str, Path, str]]:
+        """
+        收集一個 split 的樣本
+
+        Returns:
+            [(數據集內檔名, 來源圖片路徑, 標籤), ...]
+        """
+        samples = []
+        for image_name, anno, crop_indices in split_items:
+            src_img = Path(anno['processed_image_path'])
+
+            if not src_img.exists():
+                print(f"  ⚠️  Image not found: {src_img}")
+                continue
+
+            if crop_text_regions:
+                # 模式 1: 使用已切割的文字區域 (從 crops/ 目錄)
+                # 如果有 crop_indices，只處理這些索引的 OCR 結果
+                ocr_results = anno['ocr_results']
+
+                if crop_indices is not None:
+                    ocr_results_to_process = [
+                        ocr_results[i] for i in crop_indices if i < len(ocr_results)]
+                else:
+                    ocr_results_to_process = [
+                        ocr for ocr in ocr_results if ocr.get('verified', False)]
+
+                for ocr_result in ocr_results_to_process:
+                    crop_filename = ocr_result.get('crop_filename')
+                    text = self._clean_label(ocr_result['text'].strip())
+                    if not text or not crop_filename:
+                        continue
+                    samples.append((crop_filename, self.crops_dir / crop_filename, text))
+
+            else:
+                # 模式 2: 完整圖片 (訓練完整 OCR)
+                label_text = self._clean_label(
+                    anno.get('corrected_text') or anno['full_text'])
+                if not label_text:
+                    print(f"  ⚠️  跳過空標籤: {image_name}")
+                    continue
+                samples.append((image_name, src_img, label_text))
+
+        return samples
+
+    @staticmethod
+    def _write_crop(crop_path: Path, cropped_img: np.ndarray) -> None:
+        """
+        寫入 crop (先寫臨時文件再替換)
+
+        dataset_gt 中的圖片是 crop 的硬連結, 原地覆寫會連帶改變已生成的訓練圖片;
+        替換為新文件後舊連結保持原內容, 重新生成數據集時按修改時間識別為已變化
+        """
+        ok, encoded = cv2.imencode('.jpg', cropped_img)
+        if not ok:
+            raise ValueError(f"JPEG 編碼失敗: {crop_path.name}")
+        tmp_path = crop_path.with_name(f'.{crop_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(encoded.tobytes())
+            os.replace(tmp_path, crop_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _link_or_copy(src: Path, dst: Path) -> None:
+        """建立硬連結; 不支援時 (跨檔案系統等) 退回 reflink, 再退回複製"""
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+
+        try:
+            import fcntl
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return
+        except (ImportError, OSError):
+            pass
+
+        shutil.copy2(src, dst)
+
+    @staticmethod
+    def _same_content(src: Path, dst: Path) -> bool:
+        """dst 是 src 的硬連結, 或大小和修改時間相同 (視為同一份 crop)"""
+        try:
+            if os.path.samefile(src, dst):
+                return True
+            s, d = src.stat(), dst.stat()
+        except OSError:
+            return False
+        return s.st_size == d.st_size and s.st_mtime_ns == d.st_mtime_ns
+
+    def _sync_split(self, split_dir: Path, samples: List[Tuple[str, Path, str]],
+                    incremental: bool = True) -> Dict[str, int]:
+        """
+        讓 split 目錄與樣本列表一致
+
+        只新增缺少或內容已變的圖片, 移除不再屬於此 split 的圖片,
+        gt.txt 只在內容有變化時重寫
+
+        Returns:
+            統計: total, added, removed, kept, relabeled, missing
+        """
+        stats = {'total': 0, 'added': 0, 'removed': 0, 'kept': 0, 'relabeled': 0, 'missing': 0}
+        gt_file = split_dir / 'gt.txt'
+
+        old_labels = {}
+        if incremental and gt_file.exists():
+            with open(gt_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    filename, sep, label = line.rstrip('\n').partition('\t')
+                    if sep:
+                        old_labels[filename] = label
+
+        existing = {p.name for p in split_dir.iterdir()
+                    if p.is_file() and p.suffix.lower() in self.DATASET_IMAGE_SUFFIXES}
+        if not incremental:
+            for name in existing:
+                (split_dir / name).unlink()
+            existing = set()
+
+        gt_lines = []
+        wanted = set()
+        for filename, src, label in samples:
+            if filename in wanted:
+                continue
+            if not src.exists():
+                print(f"  ⚠️  Crop not found: {filename}")
+                stats['missing'] += 1
+                continue
+
+            dst = split_dir / filename
+            if filename in existing and self._same_content(src, dst):
+                stats['kept'] += 1
+            else:
+                if filename in existing:
+                    dst.unlink()
+                if incremental:
+                    self._link_or_copy(src, dst)
+                else:
+                    shutil.copy(src, dst)
+                stats['added'] += 1
+
+            if filename in old_labels and old_labels[filename] != label:
+                stats['relabeled'] += 1
+
+            wanted.add(filename)
+            gt_lines.append(f"{filename}\t{label}\n")
+
+        for name in existing - wanted:
+            (split_dir / name).unlink()
+            stats['removed'] += 1
+
+        gt_content = ''.join(gt_lines)
+        if not gt_file.exists() or gt_file.read_text(encoding='utf-8') != gt_content:
+            tmp_file = gt_file.with_suffix('.txt.tmp')
+            tmp_file.write_text(gt_content, encoding='utf-8')
+            os.replace(tmp_file, gt_file)
+
+        stats['total'] = len(gt_lines)
+        return stats
+
     def show_statistics(self):
         """顯示統計資訊"""
         total = len(self.annotations)
@@ -819,17 +1593,33 @@ def main():
     parser.add_argument('--crops', default='crops', help='切割區域資料夾')
     parser.add_argument('--dataset', default='dataset_gt',
                         help='最終數據集資料夾(gt.txt格式)')
-    parser.add_argument('--mode', choices=['auto', 'generate', 'stats', 'all'],
-                        default='auto', help='運行模式')
+    parser.add_argument('--mode', choices=['auto', 'generate', 'stats', 'all', 'watch'],
+                        default='auto', help='運行模式 (watch: 持續監聽 input 目錄)')
     parser.add_argument('--overwrite', action='store_true', help='覆蓋已有的標註')
     parser.add_argument('--auto-verify', action='store_true',
                         help='自動驗證所有標註(跳過手動檢查)')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='每批 OCR 的圖片數量 (>1 啟用批量模式)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='OCR 工作進程數 (>1 啟用多進程模式, 每個進程載入一個模型)')
+    parser.add_argument('--threads-per-worker', type=int, default=1,
+                        help='多進程模式下每個進程的 torch / OpenCV 線程數')
+    parser.add_argument('--detect-max-side', type=int, default=None,
+                        help='文字檢測時把圖片縮小到此最長邊 (如 1280), 識別和切割仍使用原圖')
+    parser.add_argument('--tile-max-aspect', type=float, default=None,
+                        help='高寬比超過此值的長收據 (如 3) 切成重疊的橫帶分塊 OCR')
+    parser.add_argument('--store', choices=STORE_BACKENDS, default='json',
+                        help='標註存儲後端 (json 或 sqlite)')
+    parser.add_argument('--full-copy', action='store_true',
+                        help='清空數據集後重新複製全部圖片 (預設為增量更新, 使用硬連結)')
 
     args = parser.parse_args()
 
     # 創建數據集創建器
     creator = ReceiptDatasetCreator(
-        args.input, args.processed, args.crops, args.dataset, enable_correction=False)
+        args.input, args.processed, args.crops, args.dataset, enable_correction=False,
+        store=args.store, detect_max_side=args.detect_max_side,
+        tile_max_aspect=args.tile_max_aspect)
 
     print("✨ 模式: 使用原圖直接進行 OCR")
     print("   - 不做任何圖像預處理")
@@ -838,7 +1628,9 @@ def main():
 
     if args.mode == 'auto':
         print("\n🤖 Mode: Auto-generate annotations")
-        creator.auto_generate_annotations(overwrite=args.overwrite)
+        creator.auto_generate_annotations(
+            overwrite=args.overwrite, batch_size=args.batch_size,
+            workers=args.workers, threads_per_worker=args.threads_per_worker)
         creator.show_statistics()
         print("\n💡 Next step:")
         print("  Run with --mode generate --auto-verify to create training dataset")
@@ -854,7 +1646,7 @@ def main():
             creator.save_annotations()
 
         creator.show_statistics()
-        creator.generate_training_dataset()
+        creator.generate_training_dataset(incremental=not args.full_copy)
 
     elif args.mode == 'all':
         print("\n🚀 Mode: Complete pipeline (auto + generate)")
@@ -863,7 +1655,9 @@ def main():
         print("\n" + "="*70)
         print("Step 1/2: Auto-generate annotations")
         print("="*70)
-        creator.auto_generate_annotations(overwrite=args.overwrite)
+        creator.auto_generate_annotations(
+            overwrite=args.overwrite, batch_size=args.batch_size,
+            workers=args.workers, threads_per_worker=args.threads_per_worker)
 
         # Step 2: 自動驗證並生成數據集
         print("\n⚡ Auto-verify: marking all annotations as verified")
@@ -875,7 +1669,7 @@ def main():
         print("\n" + "="*70)
         print("Step 2/2: Generate training dataset")
         print("="*70)
-        creator.generate_training_dataset()
+        creator.generate_training_dataset(incremental=not args.full_copy)
 
         print("\n" + "="*70)
         print("✅ Complete pipeline finished!")
@@ -884,6 +1678,13 @@ def main():
     elif args.mode == 'stats':
         creator.show_statistics()
 
+    elif args.mode == 'watch':
+        print("\n👀 Mode: Watch input folder")
+        # 先處理已存在的新圖片, 再監聽新加入的圖片
+        creator.auto_generate_annotations(batch_size=args.batch_size, workers=args.workers,
+                                          threads_per_worker=args.threads_per_worker)
+        creator.watch_input_folder(batch_size=args.batch_size)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+圖片內容摘要快取
+
+以 (路徑, 大小, 修改時間) 為鍵保存文件的 MD5, 持久化到 processed/digest_cache.json。
+文件沒有變化時只需要一次 stat, 不必重新讀取整個文件。
+
+摘要沿用 MD5, 因為它會寫入 annotations.json 的 md5 欄位並用於比對重複圖片。
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+DIGEST_CACHE_FILE = 'digest_cache.json'
+
+
+class DigestCache:
+    """(路徑, 大小, 修改時間) → MD5 的持久化快取"""
+
+    # 計算摘要時每次讀取的大小
+    READ_BUFFER_SIZE = 1024 * 1024
+
+    VERSION = 1
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = Path(cache_file)
+        self._lock = threading.Lock()
+        self._dirty = False
+        # 絕對路徑 -> [size, mtime_ns, digest]
+        self._entries: Dict[str, List] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self._entries = data.get('entries', {})
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"摘要快取無法讀取, 將重新建立: {e}")
+
+    @classmethod
+    def compute(cls, file_path: Path) -> str:
+        """直接計算文件的 MD5 (不使用快取)"""
+        md5_hash = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(cls.READ_BUFFER_SIZE), b""):
+                md5_hash.update(chunk)
+        return md5_hash.hexdigest()
+
+    def digest(self, file_path: Path) -> str:
+        """返回文件的 MD5; 大小和修改時間與快取相同時不讀取文件"""
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                self.hits += 1
+                return entry[2]
+
+        digest = self.compute(key)
+
+        with self._lock:
+            self._entries[key] = [stat.st_size, stat.st_mtime_ns, digest]
+            self._dirty = True
+            self.misses += 1
+        return digest
+
+    def save(self) -> None:
+        """有新項目時寫回快取文件, 同時移除已不存在的文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._entries = {path: entry for path, entry in self._entries.items()
+                             if os.path.exists(path)}
+            self._dirty = False
+
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = self.cache_file.with_suffix('.json.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump({'version': self.VERSION, 'entries': self._entries}, f,
+                              ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_file, self.cache_file)
+            except OSError as e:
+                logger.warning(f"保存摘要快取失敗: {e}")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+將 dataset_gt 轉換為 LMDB 數據集 (deep-text-recognition-benchmark 格式)
+
+直接從 processed/crops 讀取 crop 的原始 JPEG 位元組寫入 LMDB,
+不需要再讀取 dataset_gt 中的副本, 也不需要呼叫外部腳本。
+鍵名與 create_lmdb_dataset.py / validate_lmdb.py 相同:
+    image-%09d, label-%09d (從 1 開始), num-samples
+"""
+
+import os
+import sys
+import shutil
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import lmdb
+import numpy as np
+
+SPLITS = ('train', 'valid', 'test')
+
+# 每個寫入事務包含的樣本數
+WRITE_BATCH_SIZE = 1000
+
+# 自動估算 map size 時的額外空間 (B+ 樹頁面和鍵名)
+MAP_SIZE_FACTOR = 2
+MIN_MAP_SIZE = 64 * 1024 * 1024
+
+
+def read_gt_file(gt_file: Path, crops_dir: Optional[Path] = None) -> List[Tuple[Path, str]]:
+    """
+    讀取 gt.txt, 返回 (圖片路徑, 標籤) 列表
+
+    crops_dir 中存在同名 crop 時優先使用, 否則使用 gt.txt 旁邊的圖片
+
+    Args:
+        gt_file: gt.txt 路徑 (tab 分隔: filename\\tlabel)
+        crops_dir: processed/crops 目錄
+    """
+    gt_file = Path(gt_file)
+    split_dir = gt_file.parent
+    samples = []
+
+    with open(gt_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line or '\t' not in line:
+                continue
+            filename, label = line.split('\t', 1)
+
+            path = crops_dir / filename if crops_dir is not None else None
+            if path is None or not path.exists():
+                path = split_dir / filename
+            samples.append((path, label))
+
+    return samples
+
+
+def estimate_map_size(samples: List[Tuple[Path, str]]) -> int:
+    """按樣本大小估算 LMDB map size"""
+    total = 0
+    for path, label in samples:
+        try:
+            total += path.stat().st_size
+        except OSError:
+            continue
+        total += len(label.encode('utf-8')) + 64
+    return max(total * MAP_SIZE_FACTOR, MIN_MAP_SIZE)
+
+
+def check_image_is_valid(image_bin: bytes) -> bool:
+    """圖片能否解碼且尺寸非零 (與 create_lmdb_dataset.py 的 checkImageIsValid 相同)"""
+    if not image_bin:
+        return False
+    img = cv2.imdecode(np.frombuffer(image_bin, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    return img is not None and img.shape[0] * img.shape[1] > 0
+
+
+def write_lmdb(samples: List[Tuple[Path, str]], output_path: Path,
+               batch_size: int = WRITE_BATCH_SIZE) -> Dict[str, int]:
+    """
+    把樣本寫入 LMDB
+
+    先寫到臨時目錄, 完成後替換 output_path, 不會留下舊數據或寫了一半的數據庫。
+    每 batch_size 個樣本提交一次事務; map 空間不足時自動擴大後重試該批。
+    無法讀取或解碼的圖片跳過不寫入。
+
+    Args:
+        samples: (圖片路徑, 標籤) 列表
+        output_path: LMDB 輸出目錄
+        batch_size: 每個事務的樣本數
+
+    Returns:
+        統計: written (寫入的樣本數), skipped (跳過的無效圖片數)
+    """
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    map_size = estimate_map_size(samples)
+    env = lmdb.open(str(tmp_path), map_size=map_size)
+
+    try:
+        n_written = 0
+        n_skipped = 0
+        batch: List[Tuple[bytes, bytes]] = []
+
+        def commit(items: List[Tuple[bytes, bytes]]) -> None:
+            nonlocal map_size
+            while True:
+                try:
+                    with env.begin(write=True) as txn:
+                        for key, value in items:
+                            txn.put(key, value)
+                    return
+                except lmdb.MapFullError:
+                    map_size *= 2
+                    env.set_mapsize(map_size)
+
+        for path, label in samples:
+            try:
+                with open(path, 'rb') as f:
+                    image_bin = f.read()
+            except OSError as e:
+                print(f"  ⚠️  無法讀取 {path}: {e}")
+                n_skipped += 1
+                continue
+            if not check_image_is_valid(image_bin):
+                print(f"  ⚠️  無效圖片 (無法解碼): {path}")
+                n_skipped += 1
+                continue
+
+            n_written += 1
+            batch.append((f'image-{n_written:09d}'.encode(), image_bin))
+            batch.append((f'label-{n_written:09d}'.encode(), label.encode('utf-8')))
+
+            if n_written % batch_size == 0:
+                commit(batch)
+                batch = []
+
+        batch.append(('num-samples'.encode(), str(n_written).encode()))
+        commit(batch)
+    finally:
+        env.close()
+
+    if output_path.exists():
+        shutil.rmtree(output_path)
+    os.replace(tmp_path, output_path)
+
+    return {'written': n_written, 'skipped': n_skipped}
+
+
+def convert_dataset(dataset_dir: Path, output_dir: Path, crops_dir: Optional[Path] = None,
+                    splits=SPLITS, workers: int = len(SPLITS)) -> Dict[str, Dict[str, int]]:
+    """
+    並行轉換 dataset_gt 的各個 split
+
+    Args:
+        dataset_dir: dataset_gt 目錄 (讀取 {split}/gt.txt)
+        output_dir: dataset_lmdb 目錄 (寫入 {split}/)
+        crops_dir: processed/crops 目錄 (圖片來源)
+        splits: 要轉換的 split
+        workers: 並行寫入的 split 數
+
+    Returns:
+        {split: write_lmdb 的統計}; 沒有 gt.txt 的 split 不包含在內
+    """
+    dataset_dir = Path(dataset_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = {}
+    for split in splits:
+        gt_file = dataset_dir / split / 'gt.txt'
+        if gt_file.exists():
+            jobs[split] = read_gt_file(gt_file, Path(crops_dir) if crops_dir else None)
+
+    if not jobs:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        futures = {split: pool.submit(write_lmdb, samples, output_dir / split)
+                   for split, samples in jobs.items()}
+        return {split: future.result() for split, future in futures.items()}
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description='將 dataset_gt 轉換為 LMDB 數據集')
+    parser.add_argument('--dataset', default='dataset_gt', help='gt.txt 數據集資料夾')
+    parser.add_argument('--output', default='dataset_lmdb', help='LMDB 輸出資料夾')
+    parser.add_argument('--crops', default='processed/crops',
+                        help='crop 圖片資料夾 (找不到時使用 dataset_gt 中的圖片)')
+
+    args = parser.parse_args()
+
+    results = convert_dataset(Path(args.dataset), Path(args.output), Path(args.crops))
+    if not results:
+        print(f"❌ 沒有找到任何 gt.txt: {args.dataset}")
+        sys.exit(1)
+
+    for split, stats in results.items():
+        skipped = f" (跳過 {stats['skipped']} 個無效圖片)" if stats['skipped'] else ''
+        print(f"✅ {split}: {stats['written']} 個樣本{skipped} → {Path(args.output) / split}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+監聽 input/ 目錄中的新圖片
+
+Linux 上使用 inotify (IN_CLOSE_WRITE / IN_MOVED_TO, 即文件寫入完成或移入目錄),
+其他平台退回定期掃描 (大小和修改時間連續兩次不變才視為寫入完成)。
+新圖片在 settle_seconds 內沒有更多事件後批量交給回調。
+"""
+
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_inotify():
+    """返回 libc (支援 inotify 時), 否則 None"""
+    if not sys.platform.startswith('linux') or not hasattr(select, 'poll'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, 'inotify_init1') else None
+
+
+class InputWatcher:
+    """
+    監聽目錄, 圖片寫入完成後回調 on_ready(paths)
+
+    on_ready 返回 False 表示暫時無法接收 (例如 OCR 隊列已滿),
+    這些圖片會在下一輪重新交付
+    """
+
+    def __init__(self, input_dir, on_ready: Callable[[List[Path]], bool],
+                 settle_seconds: float = 0.5, poll_interval: float = 2.0,
+                 use_inotify: bool = True):
+        self.input_dir = Path(input_dir)
+        self.on_ready = on_ready
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self._libc = _load_inotify() if use_inotify else None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def backend(self) -> str:
+        return 'inotify' if self._libc is not None else 'polling'
+
+    @staticmethod
+    def is_image(name: str) -> bool:
+        return not name.startswith('.') and Path(name).suffix.lower() in IMAGE_SUFFIXES
+
+    def start(self) -> None:
+        """在背景線程開始監聽"""
+        self._thread = threading.Thread(target=self.run, name='input-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"開始監聽 {self.input_dir} ({self.backend})")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run(self) -> None:
+        """監聽直到 stop() (阻塞)"""
+        self.input_dir.mkdir(parents=True, exist_ok=True)
+        if self._libc is not None:
+            try:
+                self._run_inotify()
+                return
+            except OSError as e:
+                logger.warning(f"inotify 不可用, 改為定期掃描: {e}")
+        self._run_polling()
+
+    def _deliver(self, names) -> List[str]:
+        """交付圖片, 返回未被接收 (需要重試) 的檔名"""
+        paths = [self.input_dir / name for name in sorted(names)
+                 if (self.input_dir / name).is_file()]
+        if not paths:
+            return []
+        try:
+            if self.on_ready(paths) is False:
+                return [p.name for p in paths]
+        except Exception as e:
+            logger.error(f"處理新圖片失敗: {e}")
+        return []
+
+    def _scan_all(self) -> List[str]:
+        try:
+            return [entry.name for entry in os.scandir(self.input_dir)
+                    if entry.is_file() and self.is_image(entry.name)]
+        except OSError:
+            return []
+
+    def _run_inotify(self) -> None:
+        libc = self._libc
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        try:
+            wd = libc.inotify_add_watch(fd, os.fsencode(str(self.input_dir)),
+                                        IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed: {self.input_dir}')
+
+            poller = select.poll()
+            poller.register(fd, select.POLLIN)
+            pending = set()
+            # 下次交付的時間: 最後一個事件後 settle_seconds; 被拒絕時 poll_interval 後重試
+            deliver_at = 0.0
+
+            while not self._stop.is_set():
+                timeout = max(0.0, deliver_at - time.monotonic()) if pending else self.poll_interval
+                if poller.poll(int(timeout * 1000)):
+                    data = os.read(fd, 64 * 1024)
+                    for mask, name in self._parse_events(data):
+                        if mask & IN_Q_OVERFLOW:
+                            # 事件溢出: 重新掃描整個目錄
+                            pending.update(self._scan_all())
+                        elif name and self.is_image(name):
+                            pending.add(name)
+                    deliver_at = time.monotonic() + self.settle_seconds
+                    continue
+
+                if pending and time.monotonic() >= deliver_at:
+                    pending = set(self._deliver(pending))
+                    deliver_at = time.monotonic() + self.poll_interval
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _parse_events(data: bytes) -> List[Tuple[int, str]]:
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def _run_polling(self) -> None:
+        # 檔名 -> (size, mtime_ns); 已交付的文件不再重複交付, 除非內容改變
+        seen: Dict[str, Tuple[int, int]] = {}
+        delivered: Dict[str, Tuple[int, int]] = {}
+
+        while not self._stop.is_set():
+            current = {}
+            for name in self._scan_all():
+                try:
+                    stat = os.stat(self.input_dir / name)
+                except OSError:
+                    continue
+                current[name] = (stat.st_size, stat.st_mtime_ns)
+
+            # 連續兩次掃描大小和修改時間相同, 且尚未交付過
+            ready = [name for name, sig in current.items()
+                     if seen.get(name) == sig and delivered.get(name) != sig]
+            if ready:
+                retry = set(self._deliver(ready))
+                for name in ready:
+                    if name not in retry:
+                        delivered[name] = current[name]
+
+            delivered = {name: sig for name, sig in delivered.items() if name in current}
+            seen = current
+            self._stop.wait(self.poll_interval)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+進程內指標 (Prometheus 文本格式)
+
+提供 Counter / Gauge / Histogram 三種指標, 不依賴 prometheus_client。
+每個指標一把鎖, 記錄一次只需要字典查找和 bisect, 開銷很低;
+Counter 和 Gauge 可以傳入回調函數, 在抓取 (render) 時才讀取當前值。
+"""
+
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 默認的延遲分桶 (秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"'
+                          for name, value in zip(names, values)) + '}'
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """返回 [(後綴, 標籤名, 標籤值, 值), ...]"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for suffix, names, values, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class _ValueMetric(_Metric):
+    """
+    每組標籤一個數值
+
+    傳入 fn 時每次抓取都呼叫 fn(): 無標籤時返回數值, 有標籤時返回 {標籤值元組: 數值};
+    返回 None 表示暫時沒有數據。用於讀取其他物件已維護的計數, 記錄時沒有額外開銷
+    """
+
+    def __init__(self, name, documentation, labelnames=(), fn: Optional[Callable] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._fn = fn
+
+    def _samples(self):
+        if self._fn is not None:
+            current = self._fn()
+            if current is None:
+                return []
+            if not self.labelnames:
+                return [('', (), (), current)]
+            return [('', self.labelnames, tuple(str(v) for v in key), value)
+                    for key, value in current.items()]
+        with self._lock:
+            return [('', self.labelnames, key, value) for key, value in self._values.items()]
+
+
+class Counter(_ValueMetric):
+    """只增不減的計數器"""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError('Counter can only increase')
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_ValueMetric):
+    """可增可減的數值"""
+
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """分桶直方圖 (輸出累積的 _bucket、_sum 和 _count)"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 標籤值 -> [各桶計數 (非累積), 總和]
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """計時 with 區塊"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels) -> Callable:
+        """計時函數的裝飾器"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _samples(self):
+        with self._lock:
+            entries = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+
+        samples = []
+        names = self.labelnames + ('le',)
+        for key, counts, total in entries:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(('_bucket', names, key + (_format_value(bound),), cumulative))
+            samples.append(('_sum', self.labelnames, key, total))
+            samples.append(('_count', self.labelnames, key, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """指標集合"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                fn: Optional[Callable] = None) -> Counter:
+        return self._register(Counter(name, documentation, labelnames, fn))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              fn: Optional[Callable] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, fn))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """輸出 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+OCR 結果快取
+
+以 (圖片內容摘要, 語言, reader 設定, 信心度門檻) 為鍵保存 EasyOCR readtext 的原始輸出,
+圖片和模型都沒變時重新處理可以跳過推理, 只需用快取結果重新切割 crop。
+
+每個結果一個 JSON 文件 (processed/ocr_cache/<前 2 位>/<key>.json),
+總大小超過上限時按最近使用時間淘汰 (LRU, 使用時間以文件 mtime 保存)。
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_DIR = 'ocr_cache'
+
+
+class OcrResultCache:
+    """readtext 原始輸出的磁碟快取 (大小上限 + LRU 淘汰)"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> 文件大小, 按最近使用排序 (最舊的在前)
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._scan()
+
+    def _scan(self) -> None:
+        """從磁碟重建索引 (按 mtime 排序)"""
+        if not self.cache_dir.exists():
+            return
+        found = []
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((stat.st_mtime_ns, path.stem, stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(digest: str, config: Dict) -> str:
+        """由圖片摘要和 OCR 設定產生快取鍵"""
+        payload = json.dumps({'digest': digest, 'config': config},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, key: str) -> Optional[List]:
+        """
+        返回快取的 readtext 輸出 [(bbox, text, confidence), ...]; 未命中返回 None
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"OCR 快取項目無法讀取, 已移除: {path} ({e})")
+            self._discard(key)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return [(bbox, text, confidence) for bbox, text, confidence in data]
+
+    def put(self, key: str, result: List) -> None:
+        """保存 readtext 輸出"""
+        data = [[[[float(x), float(y)] for x, y in bbox], text, float(confidence)]
+                for bbox, text, confidence in result]
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 多個進程可能同時寫入同一個鍵 (內容相同的圖片)
+            tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            logger.warning(f"保存 OCR 快取失敗: {e}")
+            return
+
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            evicted = self._evict()
+
+        for old_key in evicted:
+            try:
+                self._path(old_key).unlink()
+            except OSError:
+                pass
+
+    def _evict(self) -> List[str]:
+        """超過大小上限時淘汰最久未使用的項目 (需持鎖), 返回被淘汰的鍵"""
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _discard(self, key: str) -> None:
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+多進程 OCR
+
+每個工作進程持有自己的 EasyOCR Reader, 並把 torch / OpenCV 的線程數固定為 threads_per_worker,
+避免多個進程各自開滿所有核心而互相爭搶。工作進程只負責 OCR 和寫入 crop,
+標註由父進程合併並保存 (工作進程不讀寫標註存儲)。
+
+CPU 主機上 workers × threads_per_worker 一般設為核心數。
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 影響 torch / OpenMP / MKL 線程池大小的環境變量 (必須在導入 torch 之前設定)
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+# 工作進程內的 ReceiptDatasetCreator (由 _init_worker 建立)
+_creator = None
+
+
+def _init_worker(creator_args: Dict, threads_per_worker: int) -> None:
+    """工作進程初始化: 固定線程數並載入 OCR 模型"""
+    global _creator
+
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads_per_worker)
+
+    import cv2
+    cv2.setNumThreads(threads_per_worker)
+
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+    from create_receipt_dataset import ReceiptDatasetCreator
+
+    # annotations={}: 工作進程不需要載入已有的標註
+    _creator = ReceiptDatasetCreator(**creator_args, annotations={})
+    _creator.reader = _creator.get_reader(_creator.OCR_LANGS, _creator.OCR_GPU)
+
+
+def _ping(hold: float = 0.0) -> int:
+    """返回工作進程的 pid; hold 秒內佔住該進程, 讓其他進程接到後續的 _ping"""
+    time.sleep(hold)
+    return os.getpid()
+
+
+def _ocr_chunk(image_paths: List[str], digests: List[Optional[str]], batch_size: int
+               ) -> List[Tuple[str, Optional[Dict], Optional[str], float]]:
+    """在工作進程中 OCR 一組圖片, 返回 [(路徑, 標註, 錯誤訊息, 秒數), ...]"""
+    results = []
+    start = time.perf_counter()
+
+    if batch_size > 1 and len(image_paths) > 1:
+        done = list(_creator.ocr_images_batched([Path(p) for p in image_paths], batch_size,
+                                                 digests))
+        seconds = (time.perf_counter() - start) / len(done)
+        for path, annotation, error in done:
+            results.append((str(path), annotation,
+                            None if error is None else f"{type(error).__name__}: {error}", seconds))
+        return results
+
+    for path, digest in zip(image_paths, digests):
+        start = time.perf_counter()
+        try:
+            annotation = _creator.ocr_image(Path(path), content_digest=digest)
+            results.append((path, annotation, None, time.perf_counter() - start))
+        except Exception as e:
+            results.append((path, None, f"{type(e).__name__}: {e}", time.perf_counter() - start))
+    return results
+
+
+class OcrProcessPool:
+    """
+    OCR 工作進程池
+
+    使用 spawn 啟動工作進程 (不繼承父進程的線程和 CUDA 狀態);
+    工作進程在第一次使用時載入模型, 可呼叫 warm_up() 提前載入
+    """
+
+    # warm_up 時每個 _ping 佔住工作進程的秒數
+    WARM_UP_HOLD = 0.2
+
+    def __init__(self, creator_args: Dict, workers: int, threads_per_worker: int = 1,
+                 batch_size: int = 1):
+        """
+        Args:
+            creator_args: 工作進程中 ReceiptDatasetCreator 的參數
+                (input_dir, processed_dir, crops_dir, dataset_dir, use_ocr_cache)
+            workers: 工作進程數
+            threads_per_worker: 每個進程的 torch / OpenCV 線程數
+            batch_size: 每個任務的圖片數 (大於 1 時工作進程使用批量 OCR)
+        """
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        if threads_per_worker < 1:
+            raise ValueError(f"threads_per_worker must be positive, got {threads_per_worker}")
+        self.creator_args = creator_args
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(self.creator_args, self.threads_per_worker))
+
+    def _rebuild(self, broken: ProcessPoolExecutor) -> None:
+        """替換已損壞的進程池 (其他線程已替換時不重複建立)"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            logger.warning("OCR 工作進程池已損壞, 重新建立")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+
+    def _submit(self, fn, *args) -> Tuple[ProcessPoolExecutor, Future]:
+        """提交到當前進程池; 進程池已損壞時重建後再提交"""
+        executor = self._executor
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._rebuild(executor)
+            executor = self._executor
+            return executor, executor.submit(fn, *args)
+
+    def warm_up(self) -> None:
+        """
+        啟動所有工作進程並等待模型載入完成
+
+        已就緒的進程可能連續接走多個 _ping, 因此持續提交直到收到 workers 個不同的 pid
+        """
+        pids = set()
+        while len(pids) < self.workers:
+            futures = [self._executor.submit(_ping, self.WARM_UP_HOLD)
+                       for _ in range(self.workers)]
+            pids.update(future.result() for future in futures)
+
+    def map(self, image_paths: List[Path], digests: Optional[List[Optional[str]]] = None
+            ) -> Iterator[Tuple[Path, Optional[Dict], Optional[Exception], float]]:
+        """
+        OCR 多張圖片, 按完成順序返回 (路徑, 標註, 錯誤, 秒數)
+
+        工作進程崩潰會使進程池中所有未完成的圖片組失敗, 無法判斷是哪一組導致:
+        重建進程池後重試這些組; 再次崩潰的組等其他組完成後單獨執行,
+        單獨執行仍崩潰才把這一組標記為失敗
+        """
+        if digests is None:
+            digests = [None] * len(image_paths)
+        by_name = {str(p): Path(p) for p in image_paths}
+
+        # future -> (進程池, 圖片路徑, 摘要, 嘗試次數)
+        running: Dict[Future, Tuple[ProcessPoolExecutor, List[str], List[Optional[str]], int]] = {}
+        # 重試後仍崩潰, 等待單獨執行的 (圖片路徑, 摘要)
+        suspects: List[Tuple[List[str], List[Optional[str]]]] = []
+
+        def submit(chunk: List[str], chunk_digests: List[Optional[str]], attempt: int) -> None:
+            executor, future = self._submit(_ocr_chunk, chunk, chunk_digests, self.batch_size)
+            running[future] = (executor, chunk, chunk_digests, attempt)
+
+        for i in range(0, len(image_paths), self.batch_size):
+            submit([str(p) for p in image_paths[i:i + self.batch_size]],
+                   list(digests[i:i + self.batch_size]), 1)
+
+        try:
+            while running or suspects:
+                if not running:
+                    submit(*suspects.pop(0), 3)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    executor, chunk, chunk_digests, attempt = running.pop(future)
+                    try:
+                        results = future.result()
+                    except BrokenProcessPool as e:
+                        logger.error(f"OCR 工作進程崩潰 ({len(chunk)} 張圖片, 第 {attempt} 次): {e}")
+                        self._rebuild(executor)
+                        if attempt == 1:
+                            submit(chunk, chunk_digests, 2)
+                            continue
+                        if attempt == 2:
+                            suspects.append((chunk, chunk_digests))
+                            continue
+                        results = [(path, None, f"{type(e).__name__}: {e}", 0.0) for path in chunk]
+
+                    for path, annotation, error, seconds in results:
+                        yield (by_name.get(path, Path(path)), annotation,
+                               None if error is None else RuntimeError(error), seconds)
+        finally:
+            for future in running:
+                future.cancel()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> 'OcrProcessPool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
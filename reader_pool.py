@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+預熱的 OCR Reader 池
+
+伺服器啟動時建立固定數量的 EasyOCR Reader, 每個 Reader 先對一張合成圖片執行一次推理
+(載入權重、初始化 CUDA/cuDNN 和記憶體池), 之後每次 OCR 從池中借出一個 Reader, 用完歸還。
+同一個 Reader 同一時間只會被一個線程使用。
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 預熱用的合成圖片: 白底黑字, 同時觸發檢測和識別
+WARMUP_TEXT = 'RECEIPT 123.45'
+WARMUP_IMAGE_SIZE = (64, 320)  # (高, 寬)
+
+
+def make_warmup_image() -> np.ndarray:
+    """產生預熱用的合成圖片"""
+    img = np.full((*WARMUP_IMAGE_SIZE, 3), 255, dtype=np.uint8)
+    cv2.putText(img, WARMUP_TEXT, (8, 42), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return img
+
+
+class ReaderPool:
+    """
+    固定大小的 Reader 池 (線程安全的借出/歸還)
+
+    Reader 在背景線程中建立和預熱, 不會阻塞伺服器啟動;
+    池還沒準備好時 checkout() 會等待第一個可用的 Reader
+    """
+
+    def __init__(self, factory: Callable[[], object], size: int = 1, warmup: bool = True):
+        if size < 1:
+            raise ValueError(f"size must be positive, got {size}")
+        self.factory = factory
+        self.size = size
+        self.warmup = warmup
+        self._idle: "queue.Queue[object]" = queue.Queue()
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._created = 0
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> 'ReaderPool':
+        """在背景線程建立並預熱所有 Reader (重複呼叫無作用)"""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._fill, name='reader-pool', daemon=True)
+                self._thread.start()
+        return self
+
+    def _fill(self) -> None:
+        warmup_image = make_warmup_image() if self.warmup else None
+        try:
+            for i in range(self.size):
+                start = time.perf_counter()
+                reader = self.factory()
+                if warmup_image is not None:
+                    reader.readtext(warmup_image)
+                self._created += 1
+                self._idle.put(reader)
+                logger.info(f"OCR Reader {i + 1}/{self.size} 已就緒 "
+                            f"({time.perf_counter() - start:.1f}s)")
+        except Exception as e:
+            # 至少有一個 Reader 時繼續使用較小的池
+            logger.error(f"建立 OCR Reader 失敗: {e}")
+            if self._created == 0:
+                self._error = e
+        finally:
+            self._ready.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """等待所有 Reader 建立完成 (或建立失敗)"""
+        return self._ready.wait(timeout)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self._error is None
+
+    @property
+    def created(self) -> int:
+        """已建立的 Reader 數量 (包括借出中的)"""
+        return self._created
+
+    @property
+    def available(self) -> int:
+        """目前閒置的 Reader 數量"""
+        return self._idle.qsize()
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[object]:
+        """
+        借出一個 Reader, 離開 with 區塊時歸還
+
+        Raises:
+            RuntimeError: Reader 無法建立
+            TimeoutError: timeout 秒內沒有可用的 Reader
+        """
+        self.start()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._error is not None:
+                raise RuntimeError(f"OCR Reader 無法載入: {self._error}")
+            try:
+                # 分段等待, 以便在背景建立失敗時及時返回錯誤
+                wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+                reader = self._idle.get(timeout=max(0.0, wait))
+                break
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError('沒有可用的 OCR Reader')
+
+        try:
+            yield reader
+        finally:
+            self._idle.put(reader)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+按請求的性能剖析 (預設關閉)
+
+包裝選定的 Flask 路由, 每個被剖析的請求寫出一個文件:
+- pstats: cProfile 結果 (.prof), 可用 `python -m pstats` 或 snakeviz 查看
+- collapsed: 取樣的調用棧 (.collapsed, 每行 "a;b;c 次數"), 可直接交給 flamegraph.pl / speedscope
+
+目錄超過文件數或總大小上限時刪除最舊的文件。
+同一時間只剖析一個請求 (cProfile 不能同時啟用多個), 其他請求照常處理、不剖析。
+"""
+
+import sys
+import time
+import uuid
+import cProfile
+import logging
+import functools
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable
+
+from flask import make_response, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('off', 'all', 'query')
+PROFILE_FORMATS = ('pstats', 'collapsed')
+
+# query 模式下觸發剖析的查詢參數 (?profile=1)
+PROFILE_QUERY_PARAM = 'profile'
+
+# 取樣間隔 (秒)
+SAMPLE_INTERVAL = 0.005
+
+PROFILE_SUFFIXES = {'pstats': '.prof', 'collapsed': '.collapsed'}
+
+
+class StackSampler:
+    """定時取樣指定線程的調用棧, 累計為 collapsed 格式"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def dump(self, path: Path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """
+    Flask 路由的按請求剖析
+
+    mode:
+        'off'   不剖析
+        'all'   剖析選定路由的每個請求
+        'query' 只剖析帶 ?profile=1 的請求
+    """
+
+    def __init__(self, output_dir: Path, mode: str = 'off', fmt: str = 'pstats',
+                 max_files: int = 200, max_bytes: int = 100 * 1024 * 1024, min_ms: float = 0.0):
+        """
+        Args:
+            output_dir: 剖析文件目錄
+            mode: 'off' / 'all' / 'query'
+            fmt: 'pstats' (cProfile) 或 'collapsed' (取樣調用棧)
+            max_files: 最多保留的文件數
+            max_bytes: 文件總大小上限
+            min_ms: 只保留耗時不少於此值的請求
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        if fmt not in PROFILE_FORMATS:
+            raise ValueError(f"Unknown profile format: {fmt}")
+        self.output_dir = Path(output_dir)
+        self.mode = mode
+        self.fmt = fmt
+        self.max_files = max(1, max_files)
+        self.max_bytes = max_bytes
+        self.min_ms = min_ms
+        self._active = threading.Lock()
+        self._files_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off'
+
+    def install(self, app, routes: Iterable[str]) -> int:
+        """
+        包裝 app 中的路由
+
+        Args:
+            routes: URL 規則 (如 '/api/convert_to_lmdb') 或端點名稱
+
+        Returns:
+            已包裝的端點數量
+        """
+        if not self.enabled:
+            return 0
+        wanted = {route.strip() for route in routes if route.strip()}
+        endpoints = {rule.endpoint for rule in app.url_map.iter_rules()
+                     if rule.rule in wanted or rule.endpoint in wanted}
+        for endpoint in endpoints:
+            app.view_functions[endpoint] = self.wrap(app.view_functions[endpoint], endpoint)
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"請求剖析已啟用 ({self.mode}, {self.fmt}): {sorted(endpoints)} → {self.output_dir}")
+        return len(endpoints)
+
+    def should_profile(self) -> bool:
+        if self.mode == 'all':
+            return True
+        return self.mode == 'query' and \
+            request.args.get(PROFILE_QUERY_PARAM, '').lower() in ('1', 'true', 'yes')
+
+    def wrap(self, view: Callable, name: str) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.should_profile() or not self._active.acquire(blocking=False):
+                return view(*args, **kwargs)
+            try:
+                return self._profile(view, name, args, kwargs)
+            finally:
+                self._active.release()
+        return wrapper
+
+    def _profile(self, view: Callable, name: str, args, kwargs):
+        profiler = sampler = None
+        if self.fmt == 'pstats':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = StackSampler(threading.get_ident()).start()
+
+        start = time.perf_counter()
+        try:
+            response = make_response(view(*args, **kwargs))
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if profiler is not None:
+                profiler.disable()
+            else:
+                sampler.stop()
+
+        if elapsed_ms < self.min_ms:
+            return response
+
+        path = self.output_dir / (f"{datetime.now():%Y%m%d-%H%M%S}-{name}-{elapsed_ms:.0f}ms-"
+                                  f"{uuid.uuid4().hex[:6]}{PROFILE_SUFFIXES[self.fmt]}")
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            if profiler is not None:
+                profiler.dump_stats(str(path))
+            else:
+                sampler.dump(path)
+            self.rotate()
+            response.headers['X-Profile-File'] = path.name
+        except OSError as e:
+            logger.error(f"寫入剖析文件失敗: {e}")
+        return response
+
+    def rotate(self) -> None:
+        """刪除最舊的剖析文件, 直到文件數和總大小都在上限內"""
+        with self._files_lock:
+            files = []
+            for path in self.output_dir.iterdir():
+                if path.suffix not in PROFILE_SUFFIXES.values():
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime_ns, path, stat.st_size))
+            files.sort()
+
+            total = sum(size for _, _, size in files)
+            while files and (len(files) > self.max_files or total > self.max_bytes):
+                _, path, size = files.pop(0)
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
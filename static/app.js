@@ -1,8 +1,189 @@
-// 在頁面載入時恢復過濾器狀態
+// 在頁面載入時恢復過濾器狀態並載入第一頁
 document.addEventListener('DOMContentLoaded', function () {
     loadFilterState();
+    setupInfiniteScroll();
 });
 
+// ========== 分頁載入 (/api/items) ==========
+const ITEMS_PAGE_SIZE = 50;
+const LOW_CONFIDENCE_THRESHOLD = 0.8;
+
+const itemsState = {
+    cursor: null,
+    done: false,
+    loading: false,
+    generation: 0  // 篩選/排序變更時遞增,丟棄過期的回應
+};
+
+function escapeHtml(value) {
+    return String(value == null ? '' : value)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
+function confidenceClass(confidence) {
+    if (confidence >= 0.9) return 'confidence-high';
+    if (confidence >= 0.7) return 'confidence-medium';
+    return 'confidence-low';
+}
+
+function createItemCard(item) {
+    const card = document.createElement('div');
+    card.className = 'item-card';
+    if (item.verified) card.classList.add('verified');
+    if (item.confidence < LOW_CONFIDENCE_THRESHOLD) card.classList.add('low-confidence');
+    card.dataset.id = item.id;
+    card.dataset.imageName = item.image_name;
+    card.dataset.regionIdx = item.region_idx;
+    card.dataset.verified = item.verified ? 'true' : 'false';
+    card.dataset.confidence = item.confidence;
+
+    card.innerHTML = `
+        <img src="${escapeHtml(item.crop_url)}" class="item-image" alt="Cropped text" loading="lazy" decoding="async" />
+        <div class="item-meta">
+            <span class="item-confidence">
+                信心度:
+                <span class="${confidenceClass(item.confidence)}">${item.confidence.toFixed(2)}</span>
+            </span>
+            <span class="item-source" title="來源圖片">📄 ${escapeHtml(item.image_name)}</span>
+        </div>
+        <input type="text" class="item-input"
+            value="${escapeHtml(item.corrected_text || item.text)}"
+            data-original="${escapeHtml(item.text)}"
+            data-image-name="${escapeHtml(item.image_name)}"
+            data-region-idx="${item.region_idx}"
+            placeholder="修正文字..." />
+        <div class="item-actions">
+            <label class="checkbox-label">
+                <input type="checkbox" class="verify-checkbox" ${item.verified ? 'checked' : ''} />
+                已驗證
+            </label>
+            <label class="checkbox-label">
+                <input type="checkbox" class="select-checkbox" />
+                選擇
+            </label>
+            <button class="btn btn-primary btn-save">💾 保存</button>
+            <button class="btn btn-danger btn-delete">🗑️ 刪除</button>
+        </div>`;
+
+    const input = card.querySelector('.item-input');
+    input.addEventListener('keypress', event => {
+        if (event.key === 'Enter') {
+            event.preventDefault();
+            card.querySelector('.btn-save').click();
+            focusNextInput(input);
+        }
+    });
+    card.querySelector('.verify-checkbox').addEventListener('change', updateStats);
+
+    const saveBtn = card.querySelector('.btn-save');
+    saveBtn.addEventListener('click', () => saveItem(saveBtn, item.image_name, item.region_idx));
+    const deleteBtn = card.querySelector('.btn-delete');
+    deleteBtn.addEventListener('click', () => deleteItem(deleteBtn, item.image_name, item.region_idx));
+
+    return card;
+}
+
+function setItemsStatus(text) {
+    const status = document.getElementById('itemsStatus');
+    if (status) status.textContent = text;
+}
+
+async function loadNextPage() {
+    if (itemsState.loading || itemsState.done) return;
+
+    const filterSelect = document.getElementById('filterSelect');
+    const sortSelect = document.getElementById('sortSelect');
+    const params = new URLSearchParams({
+        limit: ITEMS_PAGE_SIZE,
+        filter: filterSelect ? filterSelect.value : 'all',
+        sort: sortSelect ? sortSelect.value : 'confidence-asc'
+    });
+    if (itemsState.cursor) params.set('cursor', itemsState.cursor);
+
+    const generation = itemsState.generation;
+    itemsState.loading = true;
+    setItemsStatus('載入中...');
+
+    try {
+        const response = await fetch('/api/items?' + params.toString());
+        const result = await response.json();
+        if (generation !== itemsState.generation) return;
+
+        if (!result.success) {
+            setItemsStatus('❌ 載入失敗: ' + (result.error || '未知錯誤'));
+            itemsState.done = true;
+            return;
+        }
+
+        const container = document.getElementById('itemsContainer');
+        const fragment = document.createDocumentFragment();
+        result.data.items.forEach(item => fragment.appendChild(createItemCard(item)));
+        container.appendChild(fragment);
+
+        itemsState.cursor = result.data.next_cursor;
+        itemsState.done = !result.data.next_cursor;
+
+        const shown = container.querySelectorAll('.item-card').length;
+        setItemsStatus(itemsState.done
+            ? (shown === 0 ? '沒有符合條件的項目' : '已顯示全部 ' + shown + ' 個項目')
+            : '已顯示 ' + shown + ' / ' + result.data.total + ' 個項目');
+        updateSelectAllButton();
+    } catch (error) {
+        if (generation === itemsState.generation) {
+            setItemsStatus('❌ 載入失敗: ' + error);
+        }
+    } finally {
+        if (generation === itemsState.generation) {
+            itemsState.loading = false;
+            // 第一頁未填滿畫面時繼續載入
+            maybeLoadMore();
+        }
+    }
+}
+
+function maybeLoadMore() {
+    const sentinel = document.getElementById('itemsSentinel');
+    if (!sentinel || itemsState.done) return;
+    if (sentinel.getBoundingClientRect().top <= window.innerHeight + 600) {
+        loadNextPage();
+    }
+}
+
+function reloadItems() {
+    itemsState.generation += 1;
+    itemsState.cursor = null;
+    itemsState.done = false;
+    itemsState.loading = false;
+    document.getElementById('itemsContainer').innerHTML = '';
+    loadNextPage();
+}
+
+function setupInfiniteScroll() {
+    const sentinel = document.getElementById('itemsSentinel');
+    if (!sentinel || !('IntersectionObserver' in window)) {
+        window.addEventListener('scroll', maybeLoadMore);
+        return;
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadNextPage();
+        }
+    }, { rootMargin: '600px 0px' });
+    observer.observe(sentinel);
+}
+
+function cardItemRef(card) {
+    return {
+        image_name: card.dataset.imageName,
+        region_idx: parseInt(card.dataset.regionIdx)
+    };
+}
+
 function focusNextInput(currentInput) {
     // 獲取所有可見的輸入框
     const allInputs = Array.from(document.querySelectorAll('.item-input'))
@@ -36,7 +217,6 @@ function loadFilterState() {
 
     if (saved && filterSelect) {
         filterSelect.value = saved;
-        filterItems();
     }
 
     // 載入排序狀態
@@ -45,8 +225,9 @@ function loadFilterState() {
 
     if (savedSort && sortSelect) {
         sortSelect.value = savedSort;
-        sortItems();
     }
+
+    reloadItems();
 }
 
 function saveSortState() {
@@ -56,40 +237,9 @@ function saveSortState() {
     }
 }
 
+// 排序和篩選都在伺服器端完成,變更時重新從第一頁載入
 function sortItems() {
-    const container = document.getElementById('itemsContainer');
-    const cards = Array.from(container.querySelectorAll('.item-card'));
-    const sortSelect = document.getElementById('sortSelect');
-    const sortType = sortSelect ? sortSelect.value : 'confidence-asc';
-
-    cards.sort((a, b) => {
-        const aConfidence = parseFloat(a.dataset.confidence);
-        const bConfidence = parseFloat(b.dataset.confidence);
-        const aVerified = a.dataset.verified === 'true';
-        const bVerified = b.dataset.verified === 'true';
-
-        switch (sortType) {
-            case 'confidence-asc':
-                return aConfidence - bConfidence;
-            case 'confidence-desc':
-                return bConfidence - aConfidence;
-            case 'verified-first':
-                if (aVerified === bVerified) {
-                    return aConfidence - bConfidence;
-                }
-                return aVerified ? 1 : -1;
-            case 'verified-last':
-                if (aVerified === bVerified) {
-                    return aConfidence - bConfidence;
-                }
-                return aVerified ? -1 : 1;
-            default:
-                return aConfidence - bConfidence;
-        }
-    });
-
-    // 重新排列 DOM
-    cards.forEach(card => container.appendChild(card));
+    reloadItems();
 }
 
 function executeBatchAction() {
@@ -153,52 +303,15 @@ document.addEventListener('change', function (e) {
 });
 
 function filterItems() {
-    const filterSelect = document.getElementById('filterSelect');
-    if (!filterSelect) return;
-
-    const filterValue = filterSelect.value;
-
-    document.querySelectorAll('.item-card').forEach(card => {
-        const isVerified = card.dataset.verified === 'true';
-        const isLowConf = parseFloat(card.dataset.confidence) < 0.8;
-
-        let show = false;
-
-        switch (filterValue) {
-            case 'all':
-                show = true;
-                break;
-            case 'verified':
-                show = isVerified;
-                break;
-            case 'unverified':
-                show = !isVerified;
-                break;
-            case 'low-confidence':
-                show = isLowConf;
-                break;
-        }
-
-        card.style.display = show ? 'block' : 'none';
-    });
-
-    // 更新全選按鈕狀態
-    updateSelectAllButton();
+    reloadItems();
 }
 
 function batchVerifySelected() {
     const selected = [];
     document.querySelectorAll('.select-checkbox:checked').forEach(cb => {
         const card = cb.closest('.item-card');
-        const id = card.dataset.id;
-        const parts = id.split('_');
-        const regionIdx = parts.pop();
-        const imageName = parts.join('_');
-
-        selected.push({
-            image_name: imageName,
-            region_idx: parseInt(regionIdx)
-        });
+
+        selected.push(cardItemRef(card));
         card.querySelector('.verify-checkbox').checked = true;
         cb.checked = false;
     });
@@ -231,15 +344,8 @@ function batchDeleteSelected() {
     const selected = [];
     document.querySelectorAll('.select-checkbox:checked').forEach(cb => {
         const card = cb.closest('.item-card');
-        const id = card.dataset.id;
-        const parts = id.split('_');
-        const regionIdx = parts.pop();
-        const imageName = parts.join('_');
-
-        selected.push({
-            image_name: imageName,
-            region_idx: parseInt(regionIdx)
-        });
+
+        selected.push(cardItemRef(card));
     });
 
     if (selected.length === 0) {
@@ -360,12 +466,6 @@ function saveItem(button, imageName, regionIdx) {
 
                 // 更新統計數據
                 updateStats();
-
-                // 重新排序 (如果選擇了驗證相關排序)
-                const sortSelect = document.getElementById('sortSelect');
-                if (sortSelect && (sortSelect.value === 'verified-first' || sortSelect.value === 'verified-last')) {
-                    sortItems();
-                }
             } else {
                 alert('❌ 保存失敗: ' + (data.error || '未知錯誤'));
                 button.disabled = false;
@@ -383,10 +483,7 @@ function saveAll() {
     const updates = [];
 
     document.querySelectorAll('.item-card').forEach(card => {
-        const id = card.dataset.id;
-        const parts = id.split('_');
-        const regionIdx = parts.pop();
-        const imageName = parts.join('_');
+        const ref = cardItemRef(card);
 
         const input = card.querySelector('.item-input');
         const verified = card.querySelector('.verify-checkbox').checked;
@@ -394,8 +491,8 @@ function saveAll() {
         const currentText = input.value;
 
         updates.push({
-            image_name: imageName,
-            region_idx: parseInt(regionIdx),
+            image_name: ref.image_name,
+            region_idx: ref.region_idx,
             verified: verified,
             label: currentText !== originalText ? currentText : null
         });
@@ -435,6 +532,27 @@ document.addEventListener('keydown', e => {
     }
 });
 
+// ========== 背景 OCR 任務 ==========
+const JOB_POLL_INTERVAL_MS = 1000;
+
+// 輪詢 /api/jobs/<id> 直到任務結束
+async function waitForJob(jobId, onProgress) {
+    while (true) {
+        const response = await fetch('/api/jobs/' + encodeURIComponent(jobId));
+        const result = await response.json();
+        if (!result.success) {
+            throw new Error(result.error || '查詢任務失敗');
+        }
+
+        const job = result.data;
+        if (onProgress) onProgress(job);
+        if (job.status === 'done' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+}
+
 // 上傳圖片功能
 async function uploadImage(input) {
     const file = input.files[0];
@@ -443,6 +561,10 @@ async function uploadImage(input) {
     const formData = new FormData();
     formData.append('file', file);
 
+    const modal = document.getElementById('processingModal');
+    const text = document.getElementById('processingText');
+    const subtext = document.getElementById('processingSubtext');
+
     try {
         const response = await fetch('/api/upload', {
             method: 'POST',
@@ -452,12 +574,25 @@ async function uploadImage(input) {
         const result = await response.json();
 
         if (result.success) {
-            alert('✅ ' + result.message + '\n發現 ' + result.regions_found + ' 個文字區域');
-            location.reload();
+            text.textContent = '🔍 OCR 處理中...';
+            subtext.textContent = result.message;
+            modal.classList.add('active');
+
+            const job = await waitForJob(result.job_id);
+            modal.classList.remove('active');
+
+            if (job.status === 'done' && job.failed === 0) {
+                alert('✅ 成功上傳並處理: ' + file.name + '\n發現 ' + job.regions_found + ' 個文字區域');
+                location.reload();
+            } else {
+                const error = job.error || (job.failures[0] && job.failures[0].error) || '未知錯誤';
+                alert('❌ 處理失敗: ' + error);
+            }
         } else {
             alert('❌ 上傳失敗: ' + result.error);
         }
     } catch (error) {
+        modal.classList.remove('active');
         alert('❌ 上傳失敗: ' + error.message);
     }
 
@@ -581,35 +716,16 @@ window.reprocessImages = async function () {
     confirmBtn.classList.remove('show');
     resetSpinner.style.display = 'inline-block';
 
-    // 模擬進度更新
-    let progress = 0;
-    const progressInterval = setInterval(() => {
-        if (progress < 90) {
-            progress += Math.random() * 10;
-            if (progress > 90) progress = 90;
-            progressFill.style.width = progress + '%';
-            progressText.textContent = Math.floor(progress) + '%';
-        }
-    }, 300);
+    const setProgress = fraction => {
+        const percent = Math.min(100, Math.max(0, fraction * 100));
+        progressFill.style.width = percent + '%';
+        progressText.textContent = Math.floor(percent) + '%';
+    };
+    setProgress(0);
 
     try {
-        resetMessage.textContent = '步驟 1/4: 清空數據...';
-        resetStatus.textContent = '正在清空 annotations.json';
-
-        await new Promise(resolve => setTimeout(resolve, 300));
-
-        resetMessage.textContent = '步驟 2/4: 清空裁切圖片...';
-        resetStatus.textContent = '正在清空 crops 目錄';
-
-        await new Promise(resolve => setTimeout(resolve, 300));
-
-        resetMessage.textContent = '步驟 3/4: 清空已刪除文件...';
-        resetStatus.textContent = '正在清空 deleted 目錄';
-
-        await new Promise(resolve => setTimeout(resolve, 300));
-
-        resetMessage.textContent = '步驟 4/4: 重新處理...';
-        resetStatus.textContent = '正在執行 OCR 並生成裁切圖片';
+        resetMessage.textContent = '正在加入重新處理任務...';
+        resetStatus.textContent = '準備中...';
 
         const response = await fetch('/api/reprocess_images', {
             method: 'POST',
@@ -619,24 +735,42 @@ window.reprocessImages = async function () {
         });
 
         const result = await response.json();
+        if (!result.success) {
+            resetSpinner.style.display = 'none';
+            resetMessage.textContent = '❌ 處理失敗';
+            resetStatus.textContent = result.error;
+            confirmBtn.classList.add('show');
+            return;
+        }
+
+        // 根據背景任務的實際進度更新
+        const job = await waitForJob(result.job_id, job => {
+            if (job.status === 'queued') {
+                resetMessage.textContent = '等待中...';
+                resetStatus.textContent = '任務已加入隊列';
+                return;
+            }
+            resetMessage.textContent = '正在執行 OCR 並生成裁切圖片...';
+            resetStatus.textContent = job.done + ' / ' + job.total + ' 張圖片';
+            setProgress(job.progress);
+        });
 
-        clearInterval(progressInterval);
-        progress = 100;
-        progressFill.style.width = '100%';
-        progressText.textContent = '100%';
+        setProgress(1);
         resetSpinner.style.display = 'none';
 
-        if (result.success) {
+        if (job.status === 'done') {
+            let message = '成功: ' + job.processed + ' | 失敗: ' + job.failed;
+            if (job.skipped > 0) {
+                message += ' | 跳過重複: ' + job.skipped;
+            }
             resetMessage.textContent = '✅ 重置完成！';
-            resetStatus.textContent = result.message.replace(/\n/g, ' | ');
-            confirmBtn.classList.add('show');
+            resetStatus.textContent = message;
         } else {
             resetMessage.textContent = '❌ 處理失敗';
-            resetStatus.textContent = result.error;
-            confirmBtn.classList.add('show');
+            resetStatus.textContent = job.error || '未知錯誤';
         }
+        confirmBtn.classList.add('show');
     } catch (error) {
-        clearInterval(progressInterval);
         console.error('Error:', error);
         resetMessage.textContent = '❌ 處理失敗';
         resetStatus.textContent = error.message;
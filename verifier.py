@@ -5,15 +5,31 @@
 """
 
 
+import os
 import json
-import base64
+import time
+import uuid
+import queue
 import shutil
+import base64
+import bisect
 import logging
-import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, abort
-import cv2
-from typing import List, Dict, Optional, Tuple
+from flask import Flask, render_template, request, jsonify, abort, send_from_directory, url_for, g
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+
+from annotation_store import STORE_BACKENDS, open_annotation_store
+from create_receipt_dataset import ReceiptDatasetCreator
+from digest_cache import DIGEST_CACHE_FILE, DigestCache
+from input_watcher import InputWatcher
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from ocr_workers import OcrProcessPool
+from reader_pool import ReaderPool
+from request_profiler import PROFILE_FORMATS, PROFILE_MODES, RequestProfiler
 
 # 配置日誌
 logging.basicConfig(
@@ -22,17 +38,223 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 低信心度閾值 (與前端標記一致)
+LOW_CONFIDENCE_THRESHOLD = 0.8
+
+# 進程內指標 (/metrics); 計數類的狀態在抓取時才從各物件讀取, 見 Flask 應用部分
+METRICS = MetricsRegistry()
+REQUEST_SECONDS = METRICS.histogram(
+    'verifier_http_request_duration_seconds', 'HTTP request latency by route',
+    ('route', 'method', 'status'))
+FUNCTION_SECONDS = METRICS.histogram(
+    'verifier_function_duration_seconds', 'Duration of expensive verifier operations',
+    ('function',))
+OCR_IMAGE_SECONDS = METRICS.histogram(
+    'verifier_ocr_image_duration_seconds', 'OCR latency per image',
+    ('kind', 'result'), buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0))
+STORE_WRITE_SECONDS = METRICS.histogram(
+    'annotation_store_write_duration_seconds', 'Annotation store write latency',
+    ('backend', 'op'))
+STORE_WRITE_BYTES = METRICS.counter(
+    'annotation_store_written_bytes_total', 'Bytes written by the annotation store',
+    ('backend', 'op'))
+CROP_REQUESTS = METRICS.counter(
+    'verifier_crop_requests_total',
+    'Crop image requests (not_modified means the browser cache was still valid)', ('result',))
+
+
+def observe_store_write(backend: str, op: str, seconds: float, nbytes: int) -> None:
+    """標註存儲的 on_write 回調"""
+    STORE_WRITE_SECONDS.observe(seconds, backend=backend, op=op)
+    STORE_WRITE_BYTES.inc(nbytes, backend=backend, op=op)
+
+
+def synchronized(method):
+    """以 self.lock 保護方法 (背景 OCR 任務與請求線程共用標註)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class RegionIndex:
+    """
+    按信心度排序的文字區域索引
+
+    維護 (confidence, crop_filename) 有序列表, 另按驗證狀態各維護一份,
+    新增/刪除/改變驗證狀態都是 bisect 插入, 分頁時只需從游標位置往後讀取
+    """
+
+    FILTERS = ('all', 'verified', 'unverified', 'low-confidence')
+    SORTS = ('confidence-asc', 'confidence-desc', 'verified-first', 'verified-last')
+
+    def __init__(self):
+        self._all: List[Tuple[float, str]] = []
+        self._by_status: Dict[bool, List[Tuple[float, str]]] = {False: [], True: []}
+        # crop_filename -> (confidence, verified, image_name)
+        self._entries: Dict[str, Tuple[float, bool, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def __contains__(self, crop_filename: str) -> bool:
+        return crop_filename in self._entries
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._all = []
+        self._by_status = {False: [], True: []}
+        self._entries = {}
+
+    def load(self, entries: Iterable[Tuple[str, str, float, bool]]) -> None:
+        """
+        以 (crop_filename, image_name, confidence, verified) 重建整個索引
+
+        只排序一次, 不逐個 bisect 插入 (啟動和重置時的全量重建)
+        """
+        self.clear()
+        for crop_filename, image_name, confidence, verified in entries:
+            self._entries[crop_filename] = (float(confidence), bool(verified), image_name)
+        self._all = sorted((confidence, crop_filename)
+                           for crop_filename, (confidence, _, _) in self._entries.items())
+        for key in self._all:
+            self._by_status[self._entries[key[1]][1]].append(key)
+
+    def add(self, crop_filename: str, image_name: str, confidence: float, verified: bool) -> None:
+        """加入區域 (已存在則先移除舊記錄)"""
+        if crop_filename in self._entries:
+            self.remove(crop_filename)
+
+        key = (float(confidence), crop_filename)
+        bisect.insort(self._all, key)
+        bisect.insort(self._by_status[bool(verified)], key)
+        self._entries[crop_filename] = (float(confidence), bool(verified), image_name)
+
+    def remove(self, crop_filename: str) -> None:
+        """移除區域"""
+        entry = self._entries.pop(crop_filename, None)
+        if entry is None:
+            return
+
+        confidence, verified, _ = entry
+        key = (confidence, crop_filename)
+        for lst in (self._all, self._by_status[verified]):
+            pos = bisect.bisect_left(lst, key)
+            if pos < len(lst) and lst[pos] == key:
+                del lst[pos]
+
+    def set_verified(self, crop_filename: str, verified: bool) -> None:
+        """更新區域的驗證狀態"""
+        entry = self._entries.get(crop_filename)
+        if entry is None or entry[1] == bool(verified):
+            return
+
+        confidence, _, image_name = entry
+        self.add(crop_filename, image_name, confidence, verified)
+
+    def count(self, filter_name: str = 'all') -> int:
+        """返回符合篩選條件的區域數量"""
+        if filter_name == 'verified':
+            return len(self._by_status[True])
+        if filter_name == 'unverified':
+            return len(self._by_status[False])
+        if filter_name == 'low-confidence':
+            return bisect.bisect_left(self._all, (LOW_CONFIDENCE_THRESHOLD,))
+        return len(self._all)
+
+    def _segments(self, sort: str, filter_name: str) -> List[Tuple[List[Tuple[float, str]], bool]]:
+        """按排序方式組合要依次讀取的有序列表 (列表, 是否反向)"""
+        unverified, verified = self._by_status[False], self._by_status[True]
+
+        if filter_name == 'verified':
+            lists = [verified]
+        elif filter_name == 'unverified':
+            lists = [unverified]
+        elif sort == 'verified-first':
+            # 未驗證優先
+            lists = [unverified, verified]
+        elif sort == 'verified-last':
+            lists = [verified, unverified]
+        else:
+            lists = [self._all]
+
+        descending = sort == 'confidence-desc'
+        return [(lst, descending) for lst in lists]
+
+    @staticmethod
+    def encode_cursor(segment: int, key: Tuple[float, str]) -> str:
+        """將 (列表位置, 最後一個鍵) 編碼為不透明游標"""
+        raw = json.dumps([segment, key[0], key[1]], ensure_ascii=False)
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[int, Tuple[float, str]]:
+        """
+        解析游標
+
+        Raises:
+            ValueError: 游標格式錯誤
+        """
+        try:
+            segment, confidence, crop_filename = json.loads(
+                base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            return int(segment), (float(confidence), str(crop_filename))
+        except Exception as e:
+            raise ValueError(f"無效的游標: {cursor}") from e
+
+    def page(self, sort: str = 'confidence-asc', filter_name: str = 'all',
+             cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[str], Optional[str]]:
+        """
+        游標分頁讀取
+
+        Returns:
+            (crop_filename 列表, 下一頁游標; 沒有更多數據時為 None)
+        """
+        if sort not in self.SORTS:
+            raise ValueError(f"無效的排序方式: {sort}")
+        if filter_name not in self.FILTERS:
+            raise ValueError(f"無效的篩選條件: {filter_name}")
+
+        start_segment, after_key = (0, None) if not cursor else self.decode_cursor(cursor)
+        low_conf_key = (LOW_CONFIDENCE_THRESHOLD,)
+
+        results: List[str] = []
+        segments = self._segments(sort, filter_name)
+        for seg_idx in range(start_segment, len(segments)):
+            lst, descending = segments[seg_idx]
+
+            lo, hi = 0, len(lst)
+            if filter_name == 'low-confidence':
+                hi = bisect.bisect_left(lst, low_conf_key)
+
+            if after_key is not None and seg_idx == start_segment:
+                if descending:
+                    hi = min(hi, bisect.bisect_left(lst, after_key))
+                else:
+                    lo = bisect.bisect_right(lst, after_key)
+
+            positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+            for pos in positions:
+                results.append(lst[pos][1])
+                if len(results) >= limit:
+                    return results, self.encode_cursor(seg_idx, lst[pos])
+
+        return results, None
+
 
 class QuickVerifier:
     """輕量級驗證工具"""
 
-    def __init__(self, processed_dir: str = "./processed", input_dir: str = "./input"):
+    def __init__(self, processed_dir: str = "./processed", input_dir: str = "./input",
+                 store: str = 'json'):
         """
         初始化驗證器
 
         Args:
             processed_dir: 處理結果目錄路徑
             input_dir: 輸入圖片目錄路徑
+            store: 標註存儲後端 ('json' 或 'sqlite')
 
         Raises:
             FileNotFoundError: 標註文件不存在
@@ -44,22 +266,28 @@ class QuickVerifier:
         self.annotations_file = self.processed_dir / "annotations.json"
         self.deleted_dir = self.processed_dir / "deleted"
 
+        # 保護標註和索引 (背景 OCR 任務會在其他線程寫入)
+        self.lock = threading.RLock()
+
         # 創建所有必要的目錄
         self.processed_dir.mkdir(parents=True, exist_ok=True)
         self.deleted_dir.mkdir(parents=True, exist_ok=True)
         self.input_dir.mkdir(parents=True, exist_ok=True)
         self.crops_dir.mkdir(parents=True, exist_ok=True)
 
+        # 標註存儲 (JSON 文件或 SQLite)
+        self.store = open_annotation_store(self.processed_dir, store)
+        self.store.on_write = observe_store_write
+
         # 驗證文件存在
-        if not self.annotations_file.exists():
+        if not self.store.exists():
             logger.warning(f"標註文件不存在，將創建新文件: {self.annotations_file}")
             self.annotations = {}
             self.save_annotations()
         else:
             # 載入標註
             try:
-                with open(self.annotations_file, 'r', encoding='utf-8') as f:
-                    self.annotations = json.load(f)
+                self.annotations = self.store.load()
                 logger.info(f"成功載入 {len(self.annotations)} 個標註")
             except json.JSONDecodeError as e:
                 logger.error(f"標註文件格式錯誤: {e}")
@@ -68,14 +296,25 @@ class QuickVerifier:
                 logger.error(f"載入標註失敗: {e}")
                 raise
 
-        # 統計
-        self.total_regions = sum(
-            len(anno.get('ocr_results', []))
-            for anno in self.annotations.values()
-        )
-
+        # 統計 (增量維護, 由索引新增/移除區域和 save_verification 更新)
+        self.total_regions = 0
         self.verified_regions = 0
         self.corrected_regions = 0
+        self.low_confidence_regions = 0
+
+        # 數據集狀態 (生成/轉換後刷新, 避免輪詢時訪問磁碟)
+        self.dataset_exists = False
+        self.lmdb_exists = False
+        self.refresh_dataset_status()
+
+        # 按信心度排序的區域索引 (用於分頁 API)
+        self.region_index = RegionIndex()
+        # crop_filename -> (image_name, 區域) 反查索引 (驗證/刪除時定位區域)
+        self.crop_index: Dict[str, Tuple[str, Dict]] = {}
+        self.rebuild_region_index()
+
+        # 圖片 MD5 快取 (文件未變化時不重新讀取)
+        self.digest_cache = DigestCache(self.processed_dir / DIGEST_CACHE_FILE)
 
         # 初始化 MD5 映射 (用於檢查重複圖片)
         self.md5_to_filename = {}
@@ -83,30 +322,37 @@ class QuickVerifier:
             if 'md5' in anno:
                 self.md5_to_filename[anno['md5']] = img_name
 
-        # 自動檢測並處理 input 目錄中的新圖片
-        self.process_input_folder()
+    @FUNCTION_SECONDS.timed(function='find_new_images')
+    def find_new_images(self, image_files: Optional[List[Path]] = None) -> List[Path]:
+        """
+        找出 input 目錄中尚未處理的圖片 (排除已標註的檔名和內容重複的圖片)
+
+        計算 MD5 時不持有 self.lock, 不會阻塞驗證請求; 計算完成後在鎖內重新檢查
 
-    def process_input_folder(self):
-        """自動處理 input 目錄中的新圖片"""
-        try:
-            # 檢查 input 目錄中的圖片
+        Args:
+            image_files: 要檢查的圖片; None 時掃描整個 input 目錄
+
+        Returns:
+            需要 OCR 的圖片列表
+        """
+        if image_files is None:
             image_files = list(self.input_dir.glob('*.jpg')) + \
                 list(self.input_dir.glob('*.jpeg')) + \
                 list(self.input_dir.glob('*.png'))
 
-            if not image_files:
-                logger.info("input 目錄中沒有新圖片")
-                return
+        with self.lock:
+            candidates = [img for img in image_files if img.name not in self.annotations]
+
+        # 計算 MD5 檢查是否為重複圖片
+        digests = [(img, self.calculate_md5(img)) for img in candidates]
 
-            # 過濾出未處理的圖片 (檢查檔名和 MD5)
-            new_images = []
-            duplicate_count = 0
-            for img in image_files:
+        new_images = []
+        duplicate_count = 0
+        with self.lock:
+            for img, md5 in digests:
+                # 計算期間可能已被其他任務處理
                 if img.name in self.annotations:
                     continue
-
-                # 計算 MD5 檢查是否為重複圖片
-                md5 = self.calculate_md5(img)
                 if md5 in self.md5_to_filename:
                     logger.info(
                         f"⚠️  跳過重複圖片: {img.name} (與 {self.md5_to_filename[md5]} 相同)")
@@ -115,81 +361,224 @@ class QuickVerifier:
 
                 new_images.append(img)
 
-            if not new_images:
-                if duplicate_count > 0:
-                    logger.info(f"發現 {duplicate_count} 張重複圖片已跳過")
-                logger.info(f"input 目錄中的 {len(image_files)} 張圖片都已處理")
-                return
+        self.digest_cache.save()
 
-            logger.info(f"發現 {len(new_images)} 張新圖片，開始自動處理...")
-            if duplicate_count > 0:
-                logger.info(f"跳過 {duplicate_count} 張重複圖片")
+        if duplicate_count > 0:
+            logger.info(f"跳過 {duplicate_count} 張重複圖片")
+        if new_images:
+            logger.info(f"發現 {len(new_images)} 張新圖片")
+        return new_images
 
-            # 導入並使用 ReceiptDatasetCreator 處理新圖片
-            import sys
-            sys.path.insert(0, str(Path(__file__).parent))
-            from create_receipt_dataset import ReceiptDatasetCreator
+    @FUNCTION_SECONDS.timed(function='save_annotations')
+    def save_annotations(self):
+        """保存完整標註到存儲後端"""
+        try:
+            self.processed_dir.mkdir(parents=True, exist_ok=True)
+            self.store.save(self.annotations)
+            logger.info(f"保存標註 ({self.store.backend})")
+        except Exception as e:
+            logger.error(f"保存標註失敗: {e}")
+
+    def calculate_md5(self, file_path: Path) -> str:
+        """計算文件的 MD5 值 (文件未變化時從快取返回)"""
+        return self.digest_cache.digest(file_path)
+
+    def refresh_dataset_status(self) -> None:
+        """檢查 dataset_gt 和 dataset_lmdb 是否存在"""
+        self.dataset_exists = Path('./dataset_gt/train/gt.txt').exists()
+        self.lmdb_exists = Path('./dataset_lmdb/train').exists()
+
+    def _track_region(self, ocr_result: Dict, delta: int) -> None:
+        """按區域狀態增減統計計數器"""
+        self.total_regions += delta
+        if ocr_result.get('verified', False):
+            self.verified_regions += delta
+        if ocr_result.get('corrected_text'):
+            self.corrected_regions += delta
+        if ocr_result.get('confidence', 0.0) < LOW_CONFIDENCE_THRESHOLD:
+            self.low_confidence_regions += delta
+
+    def _index_region(self, image_name: str, ocr_result: Dict) -> None:
+        """將單個區域加入索引和統計"""
+        crop_filename = ocr_result.get('crop_filename')
+        if not crop_filename:
+            return
+        if crop_filename in self.region_index:
+            return
+
+        self.region_index.add(crop_filename, image_name,
+                              ocr_result.get('confidence', 0.0),
+                              ocr_result.get('verified', False))
+        self.crop_index[crop_filename] = (image_name, ocr_result)
+        self._track_region(ocr_result, 1)
+
+    def _unindex_region(self, ocr_result: Dict) -> None:
+        """將單個區域從索引和統計移除"""
+        crop_filename = ocr_result.get('crop_filename')
+        if not crop_filename or crop_filename not in self.region_index:
+            return
+
+        self.region_index.remove(crop_filename)
+        del self.crop_index[crop_filename]
+        self._track_region(ocr_result, -1)
+
+    def rebuild_region_index(self) -> None:
+        """根據目前的標註重建區域索引和統計"""
+        self.region_index.clear()
+        self.crop_index = {}
+        self.total_regions = 0
+        self.verified_regions = 0
+        self.corrected_regions = 0
+        self.low_confidence_regions = 0
+
+        entries = []
+        for image_name, anno in self.annotations.items():
+            for ocr_result in anno.get('ocr_results', []):
+                crop_filename = ocr_result.get('crop_filename')
+                if not crop_filename or crop_filename in self.crop_index:
+                    continue
+                self.crop_index[crop_filename] = (image_name, ocr_result)
+                self._track_region(ocr_result, 1)
+                entries.append((crop_filename, image_name, ocr_result.get('confidence', 0.0),
+                                ocr_result.get('verified', False)))
+        self.region_index.load(entries)
+
+    def index_image(self, image_name: str) -> None:
+        """將圖片的所有文字區域加入索引"""
+        anno = self.annotations.get(image_name)
+        if not anno:
+            return
+
+        for ocr_result in anno.get('ocr_results', []):
+            self._index_region(image_name, ocr_result)
+
+    def unindex_image(self, image_name: str) -> None:
+        """將圖片的所有文字區域從索引移除"""
+        anno = self.annotations.get(image_name)
+        if not anno:
+            return
+
+        for ocr_result in anno.get('ocr_results', []):
+            self._unindex_region(ocr_result)
+
+    def get_stats(self) -> Dict:
+        """返回統計數據 (只讀取記憶體中的計數器)"""
+        return {
+            'total': self.total_regions,
+            'verified': self.verified_regions,
+            'corrected': self.corrected_regions,
+            'low_confidence': self.low_confidence_regions,
+            'dataset_exists': self.dataset_exists,
+            'lmdb_exists': self.lmdb_exists,
+        }
+
+    @synchronized
+    def add_annotation(self, image_name: str, annotation: Dict) -> None:
+        """加入 (或替換) 一張圖片的標註並更新索引"""
+        self.unindex_image(image_name)
+        self.annotations[image_name] = annotation
+        self.index_image(image_name)
+        if 'md5' in annotation:
+            self.md5_to_filename[annotation['md5']] = image_name
+
+    @synchronized
+    def reset(self) -> None:
+        """清空所有標註、crops 和 deleted 目錄"""
+        logger.info("步驟 1/4: 清空 annotations.json...")
+        self.annotations = {}
+        self.md5_to_filename = {}
+        self.rebuild_region_index()
+        self.save_annotations()
 
-            creator = ReceiptDatasetCreator()
+        logger.info("步驟 2/4: 清空 crops 目錄...")
+        if self.crops_dir.exists():
+            for crop_file in self.crops_dir.glob('*'):
+                try:
+                    crop_file.unlink()
+                except Exception as e:
+                    logger.warning(f"無法刪除 {crop_file}: {e}")
+        self.crops_dir.mkdir(parents=True, exist_ok=True)
 
-            for img_path in new_images:
+        logger.info("步驟 3/4: 清空 deleted 目錄...")
+        if self.deleted_dir.exists():
+            for deleted_file in self.deleted_dir.glob('*'):
                 try:
-                    logger.info(f"處理: {img_path.name}")
-                    # 計算並保存 MD5
-                    md5 = self.calculate_md5(img_path)
-                    annotation = creator.ocr_image(img_path)
-                    annotation['md5'] = md5
-                    creator.annotations[img_path.name] = annotation
-                    self.annotations[img_path.name] = annotation
-                    self.md5_to_filename[md5] = img_path.name
-                    logger.info(
-                        f"✓ {img_path.name}: 發現 {len(annotation.get('ocr_results', []))} 個文字區域")
+                    deleted_file.unlink()
                 except Exception as e:
-                    logger.error(f"處理 {img_path.name} 失敗: {e}")
+                    logger.warning(f"無法刪除 {deleted_file}: {e}")
+        self.deleted_dir.mkdir(parents=True, exist_ok=True)
 
-            # 保存更新的標註
-            creator.save_annotations()
-            self.save_annotations()
+    def _build_item(self, image_name: str, anno: Dict, idx: int, ocr_result: Dict) -> Dict:
+        """構建單個驗證項目"""
+        return {
+            'id': f"{image_name}_{idx}",
+            'image_name': ocr_result['crop_filename'],  # 裁切圖片檔名
+            'region_idx': idx,
+            # 重新處理後同名 crop 內容會改變, 用標註時間戳作為快取版本
+            'crop_version': anno.get('timestamp', ''),
+            'text': ocr_result['text'],
+            'confidence': ocr_result['confidence'],
+            'verified': ocr_result.get('verified', False),
+            'corrected_text': ocr_result.get('corrected_text', None)
+        }
 
-            # 更新統計
-            self.total_regions = sum(
-                len(anno.get('ocr_results', []))
-                for anno in self.annotations.values()
-            )
+    @synchronized
+    def get_items_page(self, sort: str = 'confidence-asc', filter_name: str = 'all',
+                       cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict], Optional[str]]:
+        """
+        按索引順序分頁返回驗證項目
 
-            logger.info(f"✅ 成功處理 {len(new_images)} 張新圖片")
+        Args:
+            sort: 排序方式 (見 RegionIndex.SORTS)
+            filter_name: 篩選條件 (見 RegionIndex.FILTERS)
+            cursor: 上一頁返回的游標
+            limit: 每頁數量
 
-        except Exception as e:
-            logger.error(f"自動處理 input 目錄失敗: {e}")
+        Returns:
+            (驗證項目列表, 下一頁游標)
 
-    def save_annotations(self):
-        """保存標註到文件"""
-        try:
-            self.processed_dir.mkdir(parents=True, exist_ok=True)
-            with open(self.annotations_file, 'w', encoding='utf-8') as f:
-                json.dump(self.annotations, f, ensure_ascii=False, indent=2)
-            logger.info(f"保存標註: {self.annotations_file}")
-        except Exception as e:
-            logger.error(f"保存標註失敗: {e}")
+        Raises:
+            ValueError: 參數無效
+        """
+        crop_filenames, next_cursor = self.region_index.page(
+            sort, filter_name, cursor, limit)
+
+        items = []
+        # 每張圖片只計算一次區域位置 (region_idx), 不為每個區域掃描整個列表
+        positions: Dict[str, Dict[int, int]] = {}
+        for crop_filename in crop_filenames:
+            image_name, region = self.crop_index[crop_filename]
+            anno = self.annotations[image_name]
 
-    def calculate_md5(self, file_path: Path) -> str:
-        """計算文件的 MD5 值"""
-        md5_hash = hashlib.md5()
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                md5_hash.update(chunk)
-        return md5_hash.hexdigest()
+            image_positions = positions.get(image_name)
+            if image_positions is None:
+                image_positions = positions[image_name] = {
+                    id(ocr_result): idx for idx, ocr_result in enumerate(anno.get('ocr_results', []))}
+            idx = image_positions.get(id(region))
+            if idx is None:
+                continue
+
+            if (self.crops_dir / crop_filename).exists():
+                items.append(self._build_item(image_name, anno, idx, region))
+            else:
+                logger.warning(f"裁切圖片不存在: {crop_filename}")
+
+        return items, next_cursor
 
+    @FUNCTION_SECONDS.timed(function='get_verification_data')
     def get_verification_data(self) -> List[Dict]:
         """
         準備驗證數據
 
+        裁切圖片不再內嵌為 base64, 前端透過 /crops/<name> 載入,
+        這裡只整理元數據, 不讀取任何圖片內容
+
         返回格式:
         [
             {
-                'image_name': 'receipt001.jpg',
+                'image_name': 'receipt001_crop_000.jpg',
                 'region_idx': 0,
-                'cropped_image': 'base64...',
+                'crop_version': '2025-11-19T10:30:00',
                 'text': 'SUPERNORMAL',
                 'confidence': 0.95,
                 'verified': False
@@ -205,9 +594,6 @@ class QuickVerifier:
         for image_name, anno in self.annotations.items():
             for idx, ocr_result in enumerate(anno.get('ocr_results', [])):
                 try:
-                    text = ocr_result['text']
-                    confidence = ocr_result['confidence']
-
                     # 使用已保存的裁切圖片
                     crop_filename = ocr_result.get('crop_filename')
                     if not crop_filename:
@@ -219,30 +605,8 @@ class QuickVerifier:
                         logger.warning(f"裁切圖片不存在: {crop_path}")
                         continue
 
-                    # 讀取裁切圖片
-                    cropped = cv2.imread(str(crop_path))
-                    if cropped is None:
-                        logger.error(f"無法讀取裁切圖片: {crop_path}")
-                        continue
-
-                    if cropped.size == 0:
-                        logger.warning(f"空白裁剪區域: {image_name}_{idx}")
-                        continue
-
-                    # 轉為 base64
-                    _, buffer = cv2.imencode('.jpg', cropped)
-                    img_base64 = base64.b64encode(buffer).decode('utf-8')
-
-                    verification_items.append({
-                        'id': f"{image_name}_{idx}",
-                        'image_name': crop_filename,  # 裁切圖片檔名
-                        'region_idx': idx,
-                        'cropped_image': img_base64,
-                        'text': text,
-                        'confidence': confidence,
-                        'verified': ocr_result.get('verified', False),
-                        'corrected_text': ocr_result.get('corrected_text', None)
-                    })
+                    verification_items.append(
+                        self._build_item(image_name, anno, idx, ocr_result))
                 except Exception as e:
                     logger.error(f"處理區域失敗 {image_name}_{idx}: {e}")
                     continue
@@ -250,6 +614,7 @@ class QuickVerifier:
         logger.info(f"準備了 {len(verification_items)} 個驗證項目")
         return verification_items
 
+    @synchronized
     def save_verification(self, updates: List[Dict]) -> bool:
         """
         保存驗證結果
@@ -260,6 +625,9 @@ class QuickVerifier:
         Returns:
             是否成功保存
         """
+        changes = []
+        # 修改前的區域內容, 寫入存儲失敗時還原 (記憶體與磁碟保持一致)
+        originals: List[Tuple[str, Dict, Dict]] = []
         try:
             for update in updates:
                 # 驗證輸入
@@ -274,62 +642,56 @@ class QuickVerifier:
                     logger.error(f"缺少必要欄位: {update}")
                     continue
 
-                # 從裁切檔名提取原始圖片名稱 (例如: "IMG_1234_crop_000.jpg" -> "IMG_1234.jpg")
-                # 格式: {original_name}_crop_{idx}.jpg
-                if '_crop_' in crop_filename:
-                    original_name_part = crop_filename.split('_crop_')[0]
-                    # 找到對應的原始圖片 (可能有不同副檔名)
-                    image_name = None
-                    for key in self.annotations.keys():
-                        if key.startswith(original_name_part + '.'):
-                            image_name = key
-                            break
-
-                    if not image_name:
-                        logger.error(f"找不到對應的原始圖片: {crop_filename}")
-                        continue
-                else:
-                    logger.error(f"無效的裁切檔名格式: {crop_filename}")
+                # 從裁切檔名反查所屬圖片和區域
+                entry = self.crop_index.get(crop_filename)
+                if entry is None:
+                    logger.error(f"找不到對應的原始圖片: {crop_filename}")
                     continue
+                image_name, region = entry
 
-                if image_name in self.annotations:
-                    ocr_results = self.annotations[image_name]['ocr_results']
-                    if region_idx < len(ocr_results):
-                        ocr_results[region_idx]['verified'] = update.get(
-                            'verified', False)
+                label = update.get('label')
+                if label:
+                    # 清理文字,防止 CSV 注入
+                    label = label.strip()
+                    label = label.replace('\n', ' ').replace('\r', '')
 
-                        label = update.get('label')
-                        if label:
-                            # 清理文字,防止 CSV 注入
-                            label = label.strip()
-                            label = label.replace('\n', ' ').replace('\r', '')
+                originals.append((crop_filename, region, dict(region)))
+                self._track_region(region, -1)
 
-                            ocr_results[region_idx]['corrected_text'] = label
-                            ocr_results[region_idx]['text'] = label
-                            logger.info(
-                                f"修正文字: {image_name}_{region_idx} -> {label}")
+                region['verified'] = update.get('verified', False)
 
-            # 備份原文件
-            backup_file = self.annotations_file.with_suffix('.json.bak')
-            shutil.copy2(self.annotations_file, backup_file)
-            logger.info(f"備份標註文件: {backup_file}")
+                if label:
+                    region['corrected_text'] = label
+                    region['text'] = label
+                    logger.info(
+                        f"修正文字: {image_name}_{region_idx} -> {label}")
 
-            # 保存
-            with open(self.annotations_file, 'w', encoding='utf-8') as f:
-                json.dump(self.annotations, f, ensure_ascii=False, indent=2)
+                self._track_region(region, 1)
+                self.region_index.set_verified(crop_filename, region['verified'])
+
+                changes.append((image_name, region))
+
+            # 保存 (SQLite 後端只更新修改過的區域)
+            self.store.update_regions(self.annotations, changes)
 
             logger.info(f"成功保存 {len(updates)} 個更新")
             return True
 
         except Exception as e:
             logger.error(f"保存驗證失敗: {e}")
-            # 恢復備份
-            backup_file = self.annotations_file.with_suffix('.json.bak')
-            if backup_file.exists():
-                shutil.copy2(backup_file, self.annotations_file)
-                logger.info("已從備份恢復")
+            self._restore_regions(originals)
             return False
 
+    def _restore_regions(self, originals: List[Tuple[str, Dict, Dict]]) -> None:
+        """把區域、統計和索引還原為修改前的內容 (倒序, 同一區域多次修改時還原到最初)"""
+        for crop_filename, region, original in reversed(originals):
+            self._track_region(region, -1)
+            region.clear()
+            region.update(original)
+            self._track_region(region, 1)
+            self.region_index.set_verified(crop_filename, region.get('verified', False))
+
+    @synchronized
     def delete_regions(self, delete_items: List[Dict]) -> Tuple[bool, int]:
         """
         刪除指定的文字區域
@@ -341,8 +703,6 @@ class QuickVerifier:
             (是否成功, 刪除數量)
         """
         try:
-            deleted_count = 0
-
             # 按圖片分組刪除項目
             delete_by_image = {}
             for item in delete_items:
@@ -357,105 +717,103 @@ class QuickVerifier:
                     logger.error(f"缺少必要欄位: {item}")
                     continue
 
-                # 從裁切檔名提取原始圖片名稱
-                if '_crop_' in crop_filename:
-                    original_name_part = crop_filename.split('_crop_')[0]
-                    # 找到對應的原始圖片
-                    image_name = None
-                    for key in self.annotations.keys():
-                        if key.startswith(original_name_part + '.'):
-                            image_name = key
-                            break
-
-                    if not image_name:
-                        logger.warning(f"找不到對應的原始圖片: {crop_filename}")
-                        continue
-                else:
-                    logger.warning(f"無效的裁切檔名格式: {crop_filename}")
+                # 從裁切檔名反查所屬圖片
+                entry = self.crop_index.get(crop_filename)
+                if entry is None:
+                    logger.warning(f"找不到對應的原始圖片: {crop_filename}")
                     continue
 
-                if image_name not in delete_by_image:
-                    delete_by_image[image_name] = []
-                delete_by_image[image_name].append(region_idx)
-
-            # 備份原文件
-            backup_file = self.annotations_file.with_suffix('.json.bak')
-            shutil.copy2(self.annotations_file, backup_file)
-            logger.info(f"備份標註文件: {backup_file}")
+                delete_by_image.setdefault(entry[0], set()).add(crop_filename)
 
-            # 執行刪除
-            for image_name, indices in delete_by_image.items():
+            # 先更新記憶體中的標註和索引, 寫入存儲成功後才移動文件;
+            # 寫入失敗時按記錄還原, 記憶體、索引和 crops/ 與存儲保持一致
+            deletions = []
+            removed: List[Tuple[str, int, Dict]] = []  # (圖片, 原位置, 區域), 按刪除順序
+            emptied: Dict[str, Dict] = {}  # 區域全部刪除的圖片 -> 標註
+            for image_name, crop_filenames in delete_by_image.items():
                 if image_name not in self.annotations:
                     logger.warning(f"圖片不存在於標註中: {image_name}")
                     continue
 
                 ocr_results = self.annotations[image_name]['ocr_results']
 
-                # 按降序排序，避免索引混亂
-                indices_sorted = sorted(set(indices), reverse=True)
-
-                for idx in indices_sorted:
-                    if 0 <= idx < len(ocr_results):
+                # 從後往前刪除，避免索引混亂
+                for idx in range(len(ocr_results) - 1, -1, -1):
+                    if ocr_results[idx].get('crop_filename') in crop_filenames:
                         deleted_region = ocr_results.pop(idx)
-
-                        # 刪除對應的 crop 圖片
-                        crop_filename = deleted_region.get('crop_filename')
-                        if crop_filename:
-                            crop_path = self.crops_dir / crop_filename
-                            deleted_crop_path = self.deleted_dir / crop_filename
-
-                            if crop_path.exists():
-                                shutil.move(str(crop_path),
-                                            str(deleted_crop_path))
-                                logger.info(
-                                    f"移動 crop 到 deleted: {crop_filename}")
-                            else:
-                                logger.warning(f"Crop 檔案不存在: {crop_path}")
-
-                        deleted_count += 1
+                        removed.append((image_name, idx, deleted_region))
+                        self._unindex_region(deleted_region)
+                        deletions.append((image_name, deleted_region))
                         logger.info(
                             f"刪除區域: {image_name}_{idx} - {deleted_region.get('text', '')}")
-                    else:
-                        logger.warning(f"無效的索引: {image_name}_{idx}")
 
-                # 如果圖片沒有任何 OCR 結果了，移動圖片到 deleted 資料夾
+                # 如果圖片沒有任何 OCR 結果了，整個圖片標註一併刪除
                 if len(ocr_results) == 0:
-                    self._move_image_to_deleted(image_name)
-                    del self.annotations[image_name]
-                    logger.info(f"刪除整個圖片標註: {image_name}")
+                    emptied[image_name] = self.annotations[image_name]
+
+            order = list(self.annotations) if emptied else None
+            for image_name in emptied:
+                del self.annotations[image_name]
 
             # 保存更新後的標註
-            with open(self.annotations_file, 'w', encoding='utf-8') as f:
-                json.dump(self.annotations, f, ensure_ascii=False, indent=2)
+            try:
+                self.store.delete_regions(self.annotations, deletions)
+            except Exception:
+                self._restore_deleted_regions(removed, emptied, order)
+                raise
 
-            # 更新統計
-            self.total_regions -= deleted_count
+            # 移動對應的 crop 圖片和已清空的圖片到 deleted 資料夾
+            for _, _, deleted_region in removed:
+                crop_filename = deleted_region.get('crop_filename')
+                if not crop_filename:
+                    continue
+                crop_path = self.crops_dir / crop_filename
+                if crop_path.exists():
+                    shutil.move(str(crop_path), str(self.deleted_dir / crop_filename))
+                    logger.info(f"移動 crop 到 deleted: {crop_filename}")
+                else:
+                    logger.warning(f"Crop 檔案不存在: {crop_path}")
 
+            for image_name, anno in emptied.items():
+                self._move_image_to_deleted(image_name, anno)
+                logger.info(f"刪除整個圖片標註: {image_name}")
+
+            deleted_count = len(removed)
             logger.info(f"成功刪除 {deleted_count} 個區域")
             return True, deleted_count
 
         except Exception as e:
             logger.error(f"刪除區域失敗: {e}")
-            # 恢復備份
-            backup_file = self.annotations_file.with_suffix('.json.bak')
-            if backup_file.exists():
-                shutil.copy2(backup_file, self.annotations_file)
-                logger.info("已從備份恢復")
             return False, 0
 
-    def _move_image_to_deleted(self, image_name: str) -> None:
+    def _restore_deleted_regions(self, removed: List[Tuple[str, int, Dict]],
+                                 emptied: Dict[str, Dict], order: Optional[List[str]]) -> None:
+        """還原 delete_regions 中已從記憶體移除的區域和圖片 (存儲寫入失敗時)"""
+        if emptied:
+            # 原地重建以保留圖片順序 (dataset_creator 共用同一個字典)
+            restored = {name: self.annotations.get(name, emptied.get(name)) for name in order}
+            self.annotations.clear()
+            self.annotations.update(restored)
+
+        # 倒序還原, 同一圖片的區域按原位置從小到大插回
+        for image_name, idx, region in reversed(removed):
+            self.annotations[image_name]['ocr_results'].insert(idx, region)
+            self._index_region(image_name, region)
+
+    def _move_image_to_deleted(self, image_name: str, anno: Optional[Dict] = None) -> None:
         """
         將圖片移動到 deleted 資料夾
 
         Args:
             image_name: 圖片名稱
+            anno: 圖片標註 (已從 annotations 移除時傳入)
         """
         try:
-            if image_name not in self.annotations:
+            if anno is None:
+                anno = self.annotations.get(image_name)
+            if anno is None:
                 return
 
-            anno = self.annotations[image_name]
-
             # 移動所有 crop 圖片
             for ocr_result in anno.get('ocr_results', []):
                 crop_filename = ocr_result.get('crop_filename')
@@ -484,6 +842,7 @@ class QuickVerifier:
         except Exception as e:
             logger.error(f"移動圖片失敗 {image_name}: {e}")
 
+    @synchronized
     def delete_image(self, image_name: str) -> bool:
         """
         刪除整個圖片及其所有標註
@@ -499,12 +858,9 @@ class QuickVerifier:
                 logger.warning(f"圖片不存在: {image_name}")
                 return False
 
-            # 備份
-            backup_file = self.annotations_file.with_suffix('.json.bak')
-            shutil.copy2(self.annotations_file, backup_file)
-
             # 移動圖片
             self._move_image_to_deleted(image_name)
+            self.unindex_image(image_name)
 
             # 刪除標註
             region_count = len(
@@ -512,28 +868,328 @@ class QuickVerifier:
             del self.annotations[image_name]
 
             # 保存
-            with open(self.annotations_file, 'w', encoding='utf-8') as f:
-                json.dump(self.annotations, f, ensure_ascii=False, indent=2)
-
-            # 更新統計
-            self.total_regions -= region_count
+            self.store.delete_image(self.annotations, image_name)
 
             logger.info(f"成功刪除圖片: {image_name} ({region_count} 個區域)")
             return True
 
         except Exception as e:
             logger.error(f"刪除圖片失敗 {image_name}: {e}")
-            # 恢復備份
-            backup_file = self.annotations_file.with_suffix('.json.bak')
-            if backup_file.exists():
-                shutil.copy2(backup_file, self.annotations_file)
-                logger.info("已從備份恢復")
             return False
 
 
+class OcrJob:
+    """背景 OCR 任務 (上傳、input 目錄新圖片或重新處理)"""
+
+    def __init__(self, kind: str, image_paths: List[Path]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.image_paths = list(image_paths)
+        self.status = 'queued'  # queued / running / done / failed
+        self.total = len(self.image_paths)
+        self.processed = 0
+        self.skipped = 0
+        self.failures: List[Dict] = []
+        self.timings: List[Dict] = []
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record_success(self, image_name: str, seconds: float, regions: int) -> None:
+        with self._lock:
+            self.processed += 1
+            self.timings.append({'image': image_name, 'seconds': round(seconds, 3),
+                                 'regions': regions})
+
+    def record_failure(self, image_name: str, error: str) -> None:
+        with self._lock:
+            self.failures.append({'image': image_name, 'error': error})
+
+    def record_skip(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            done = self.processed + len(self.failures) + self.skipped
+            return {
+                'id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'total': self.total,
+                'done': done,
+                'processed': self.processed,
+                'failed': len(self.failures),
+                'skipped': self.skipped,
+                'progress': done / self.total if self.total else 1.0,
+                'failures': list(self.failures),
+                'timings': list(self.timings),
+                'regions_found': sum(t['regions'] for t in self.timings),
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+
+
+class OcrJobQueue:
+    """
+    有界 OCR 任務隊列
+
+    上傳、監聽到的新圖片和重新處理只負責入隊並立即返回任務 ID, 由工作線程在背景執行 OCR;
+    隊列已滿時 submit 返回 None, 由路由回應 429 (背壓)
+    """
+
+    def __init__(self, verifier: QuickVerifier, creator: ReceiptDatasetCreator,
+                 workers: int = 1, max_queued: int = 16, max_finished: int = 100,
+                 process_pool: Optional[OcrProcessPool] = None):
+        self.verifier = verifier
+        self.creator = creator
+        # 提供時 OCR 改由工作進程執行 (每個進程一個 Reader)
+        self.process_pool = process_pool
+        self.max_finished = max_finished
+        self._queue: "queue.Queue[OcrJob]" = queue.Queue(maxsize=max_queued)
+        self._jobs: "OrderedDict[str, OcrJob]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+
+        for i in range(max(1, workers)):
+            threading.Thread(target=self._worker, name=f"ocr-worker-{i}", daemon=True).start()
+
+    def depth(self) -> int:
+        """返回等待中的任務數量"""
+        return self._queue.qsize()
+
+    def status_counts(self) -> Dict[str, int]:
+        """返回保留中的任務按狀態的數量"""
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        with self._jobs_lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def submit(self, kind: str, image_paths: List[Path]) -> Optional[OcrJob]:
+        """提交任務; 隊列已滿時返回 None"""
+        with self._jobs_lock:
+            return self._enqueue(OcrJob(kind, image_paths))
+
+    def submit_new(self, kind: str, image_paths: List[Path]) -> bool:
+        """
+        只提交不在等待中或執行中任務裡的圖片
+
+        檢查和入隊在同一把鎖內完成, 同時從上傳和監聽提交同一張圖片時只會入隊一次
+
+        Returns:
+            False 表示隊列已滿
+        """
+        with self._jobs_lock:
+            pending = {p.name for job in self._jobs.values()
+                       if job.status in ('queued', 'running') for p in job.image_paths}
+            new_paths = [p for p in image_paths if p.name not in pending]
+            if not new_paths:
+                return True
+            return self._enqueue(OcrJob(kind, new_paths)) is not None
+
+    def get(self, job_id: str) -> Optional[OcrJob]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def _enqueue(self, job: OcrJob) -> Optional[OcrJob]:
+        """放入隊列並登記任務 (調用方需持有 _jobs_lock)"""
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            logger.warning(f"OCR 任務隊列已滿, 拒絕 {job.kind} 任務")
+            return None
+
+        self._jobs[job.id] = job
+        self._prune()
+        logger.info(f"已加入 OCR 任務 {job.id} ({job.kind}, {job.total} 張圖片)")
+        return job
+
+    def _prune(self) -> None:
+        """只保留最近 max_finished 個已結束的任務"""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.status in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            job.status = 'running'
+            job.started_at = datetime.now().isoformat()
+            try:
+                self._run(job)
+                job.status = 'done'
+            except Exception as e:
+                logger.error(f"OCR 任務失敗 {job.id}: {e}")
+                job.error = str(e)
+                job.status = 'failed'
+            finally:
+                job.finished_at = datetime.now().isoformat()
+                self._queue.task_done()
+
+    def _run(self, job: OcrJob) -> None:
+        verifier = self.verifier
+
+        if job.kind == 'reprocess':
+            logger.info("=== 開始完全重置 ===")
+            verifier.reset()
+            logger.info(f"步驟 4/4: 重新處理 {job.total} 張圖片...")
+
+        md5_seen: Dict[str, str] = {}
+        pending: List[Tuple[Path, str]] = []
+
+        for img_path in job.image_paths:
+            md5 = verifier.calculate_md5(img_path)
+
+            # 重新處理時跳過內容重複的圖片
+            if job.kind == 'reprocess' and md5 in md5_seen:
+                logger.info(f"⚠️  跳過重複圖片: {img_path.name} (與 {md5_seen[md5]} 相同)")
+                job.record_skip()
+                continue
+
+            # 監聽到的新圖片: 入隊後可能已被其他任務處理
+            if job.kind == 'ingest' and (img_path.name in verifier.annotations or
+                                         md5 in verifier.md5_to_filename or md5 in md5_seen):
+                job.record_skip()
+                continue
+            md5_seen[md5] = img_path.name
+            pending.append((img_path, md5))
+
+        digests = {img_path.name: md5 for img_path, md5 in pending}
+        for img_path, annotation, error, seconds in self._ocr(pending):
+            OCR_IMAGE_SECONDS.observe(seconds, kind=job.kind,
+                                      result='failure' if error is not None else 'success')
+            if error is not None:
+                logger.error(f"處理 {img_path.name} 失敗: {error}")
+                job.record_failure(img_path.name, str(error))
+                continue
+
+            annotation['md5'] = digests[img_path.name]
+            # 每張圖片完成後立即寫入存儲 (存儲按圖片更新), 中途重啟不會丟失已完成的圖片
+            with verifier.lock:
+                verifier.add_annotation(img_path.name, annotation)
+                verifier.store.upsert_images(verifier.annotations, [img_path.name])
+            regions = len(annotation.get('ocr_results', []))
+            job.record_success(img_path.name, seconds, regions)
+            logger.info(f"✓ {img_path.name}: 發現 {regions} 個文字區域")
+
+        verifier.digest_cache.save()
+
+        if job.kind == 'reprocess':
+            logger.info("=== 重置完成 ===")
+
+    def _ocr(self, pending: List[Tuple[Path, str]]
+             ) -> Iterator[Tuple[Path, Optional[Dict], Optional[Exception], float]]:
+        """OCR 圖片, 返回 (路徑, 標註, 錯誤, 秒數); 多進程模式下按完成順序返回"""
+        if self.process_pool is not None:
+            yield from self.process_pool.map([path for path, _ in pending],
+                                             [md5 for _, md5 in pending])
+            return
+
+        for img_path, md5 in pending:
+            start = time.perf_counter()
+            try:
+                logger.info(f"處理: {img_path.name}")
+                annotation = self.creator.ocr_image(img_path, content_digest=md5)
+                yield img_path, annotation, None, time.perf_counter() - start
+            except Exception as e:
+                yield img_path, None, e, time.perf_counter() - start
+
+
+def _warm_up_process_pool(process_pool: OcrProcessPool) -> None:
+    """背景預熱 OCR 工作進程; 失敗時記錄錯誤 (之後的任務會重建進程池)"""
+    try:
+        process_pool.warm_up()
+        logger.info(f"✓ {process_pool.workers} 個 OCR 工作進程已就緒")
+    except Exception as e:
+        logger.error(f"OCR 工作進程預熱失敗: {type(e).__name__}: {e}")
+
+
+@FUNCTION_SECONDS.timed(function='queue_new_images')
+def queue_new_images(image_files: Optional[List[Path]] = None) -> bool:
+    """
+    把 input 目錄中尚未處理的圖片加入背景 OCR 隊列
+
+    Returns:
+        False 表示隊列已滿, 需要稍後重試
+    """
+    new_images = verifier.find_new_images(image_files)
+    if not new_images:
+        return True
+    return job_queue.submit_new('ingest', new_images)
+
+
 # Flask 應用
 app = Flask(__name__)
 verifier: Optional[QuickVerifier] = None
+dataset_creator: Optional[ReceiptDatasetCreator] = None
+job_queue: Optional[OcrJobQueue] = None
+
+# 裁切圖片的瀏覽器快取時間 (秒); URL 帶有版本參數, 內容變更時會換新 URL
+CROP_CACHE_MAX_AGE = 365 * 24 * 3600
+
+# /api/items 分頁大小
+ITEMS_PAGE_SIZE = 50
+ITEMS_MAX_PAGE_SIZE = 500
+
+
+def _region_counts() -> Optional[Dict[Tuple[str], int]]:
+    if verifier is None:
+        return None
+    return {('total',): verifier.total_regions, ('verified',): verifier.verified_regions,
+            ('corrected',): verifier.corrected_regions,
+            ('low_confidence',): verifier.low_confidence_regions}
+
+
+def _cache_counts(cache) -> Optional[Dict[Tuple[str], int]]:
+    if cache is None:
+        return None
+    return {('hit',): cache.hits, ('miss',): cache.misses}
+
+
+METRICS.gauge('verifier_regions', 'Text regions by verification state', ('state',),
+              fn=_region_counts)
+METRICS.gauge('verifier_images', 'Annotated images',
+              fn=lambda: None if verifier is None else len(verifier.annotations))
+METRICS.gauge('verifier_ocr_queue_depth', 'OCR jobs waiting in the queue',
+              fn=lambda: None if job_queue is None else job_queue.depth())
+METRICS.gauge('verifier_ocr_jobs', 'Retained OCR jobs by status', ('status',),
+              fn=lambda: None if job_queue is None else
+              {(status,): count for status, count in job_queue.status_counts().items()})
+METRICS.counter('digest_cache_lookups_total', 'Image digest cache lookups', ('result',),
+                fn=lambda: None if verifier is None else _cache_counts(verifier.digest_cache))
+METRICS.counter('ocr_result_cache_lookups_total',
+                'OCR result cache lookups (in-process OCR only)', ('result',),
+                fn=lambda: None if dataset_creator is None else
+                _cache_counts(dataset_creator.ocr_cache))
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route=route,
+                                method=request.method, status=response.status_code)
+    if request.endpoint == 'serve_crop':
+        result = {200: 'served', 304: 'not_modified', 404: 'missing'}.get(response.status_code, 'other')
+        CROP_REQUESTS.inc(result=result)
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 文本格式的進程內指標"""
+    return app.response_class(METRICS.render(), content_type=METRICS_CONTENT_TYPE)
 
 
 @app.route('/')
@@ -542,27 +1198,64 @@ def index():
     if verifier is None:
         abort(500, "Verifier not initialized")
 
-    # 每次訪問首頁時檢查新圖片
-    verifier.process_input_folder()
+    # 新圖片由 input 目錄監聽器在背景處理, 首頁不做任何 OCR 工作
+    # 項目由前端透過 /api/items 分頁載入, 首頁只需要統計數據
+    verifier.refresh_dataset_status()
+    stats = verifier.get_stats()
 
-    items = verifier.get_verification_data()
+    return render_template('index.html', stats=stats)
 
-    # 按信心度排序 (低信心度優先)
-    items_sorted = sorted(items, key=lambda x: x['confidence'])
 
-    # 檢查 dataset_gt 和 dataset_lmdb 是否存在
-    dataset_exists = (Path('./dataset_gt/train/gt.txt').exists())
-    lmdb_exists = (Path('./dataset_lmdb/train').exists())
+@app.route('/api/items', methods=['GET'])
+def get_items():
+    """游標分頁獲取驗證項目 (按信心度排序)"""
+    if verifier is None:
+        return jsonify({'success': False, 'error': 'Verifier not initialized'}), 500
 
-    stats = {
-        'total': len(items),
-        'verified': sum(1 for item in items if item['verified']),
-        'low_confidence': sum(1 for item in items if item['confidence'] < 0.8),
-        'dataset_exists': dataset_exists,
-        'lmdb_exists': lmdb_exists,
-    }
+    try:
+        limit = int(request.args.get('limit', ITEMS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'success': False, 'error': '無效的 limit 參數'}), 400
+    limit = max(1, min(limit, ITEMS_MAX_PAGE_SIZE))
 
-    return render_template('index.html', items=items_sorted, stats=stats)
+    cursor = request.args.get('cursor') or None
+    filter_name = request.args.get('filter', 'all')
+    sort = request.args.get('sort', 'confidence-asc')
+
+    try:
+        items, next_cursor = verifier.get_items_page(
+            sort=sort, filter_name=filter_name, cursor=cursor, limit=limit)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    for item in items:
+        item['crop_url'] = url_for(
+            'serve_crop', filename=item['image_name'], v=item['crop_version'])
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'items': items,
+            'next_cursor': next_cursor,
+            'total': verifier.region_index.count(filter_name)
+        }
+    })
+
+
+@app.route('/crops/<filename>')
+def serve_crop(filename):
+    """直接串流已保存的裁切圖片 (不重新編碼), 支援 ETag / Last-Modified 條件請求"""
+    if verifier is None:
+        abort(500, "Verifier not initialized")
+
+    return send_from_directory(
+        verifier.crops_dir,
+        filename,
+        mimetype='image/jpeg',
+        conditional=True,
+        etag=True,
+        max_age=CROP_CACHE_MAX_AGE
+    )
 
 
 @app.route('/api/verify', methods=['POST'])
@@ -665,19 +1358,7 @@ def get_stats():
         return jsonify({'success': False, 'error': 'Verifier not initialized'}), 500
 
     try:
-        items = verifier.get_verification_data()
-
-        # 檢查 dataset_gt 和 dataset_lmdb 是否存在
-        dataset_exists = (Path('./dataset_gt/train/gt.txt').exists())
-        lmdb_exists = (Path('./dataset_lmdb/train').exists())
-
-        stats = {
-            'total': len(items),
-            'verified': sum(1 for item in items if item['verified']),
-            'low_confidence': sum(1 for item in items if item['confidence'] < 0.8),
-            'dataset_exists': dataset_exists,
-            'lmdb_exists': lmdb_exists,
-        }
+        stats = verifier.get_stats()
 
         return jsonify({
             'success': True,
@@ -716,8 +1397,8 @@ def delete_image():
 
 @app.route('/api/upload', methods=['POST'])
 def upload_image():
-    """上傳收據圖片到 input/ 目錄並自動處理"""
-    if verifier is None:
+    """上傳收據圖片到 input/ 目錄並加入背景 OCR 隊列"""
+    if verifier is None or job_queue is None:
         return jsonify({'success': False, 'error': 'Verifier not initialized'}), 500
 
     try:
@@ -739,24 +1420,16 @@ def upload_image():
         file.save(str(file_path))
         logger.info(f"已上傳文件: {file.filename}")
 
-        # 自動處理
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent))
-        from create_receipt_dataset import ReceiptDatasetCreator
-
-        creator = ReceiptDatasetCreator()
-        annotation = creator.ocr_image(file_path)
-        creator.annotations[file.filename] = annotation
-        creator.save_annotations()
-
-        # 重新載入 verifier 的標註
-        verifier.annotations = creator.annotations
+        # 加入背景 OCR 隊列
+        job = job_queue.submit('upload', [file_path])
+        if job is None:
+            return jsonify({'success': False, 'error': 'OCR 任務隊列已滿，請稍後再試'}), 429
 
         return jsonify({
             'success': True,
-            'message': f'成功上傳並處理: {file.filename}',
-            'regions_found': len(annotation.get('ocr_results', []))
-        })
+            'message': f'已上傳，正在處理: {file.filename}',
+            'job_id': job.id
+        }), 202
 
     except Exception as e:
         logger.error(f"上傳處理失敗: {e}")
@@ -766,33 +1439,32 @@ def upload_image():
 @app.route('/api/generate_dataset', methods=['POST'])
 def generate_dataset():
     """生成訓練數據集（gt.txt 格式）"""
-    if verifier is None:
+    if verifier is None or dataset_creator is None:
         return jsonify({'success': False, 'error': 'Verifier not initialized'}), 500
 
     try:
-        # 檢查是否有已驗證的數據（檢查每個 OCR 結果）
-        verified_count = 0
-        for anno in verifier.annotations.values():
-            for ocr_result in anno.get('ocr_results', []):
-                if ocr_result.get('verified', False):
-                    verified_count += 1
-
-        if verified_count == 0:
-            return jsonify({
-                'success': False,
-                'error': '沒有已驗證的數據！請先驗證至少一個文字區域。'
-            }), 400
-
-        # 調用數據集生成器
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent))
-        from create_receipt_dataset import ReceiptDatasetCreator
+        # 生成期間持有標註鎖: 背景 OCR 任務的 add_annotation / reset 和驗證/刪除請求
+        # 要等到生成結束, 數據集對應同一時刻的標註
+        with verifier.lock:
+            # 檢查是否有已驗證的數據（檢查每個 OCR 結果）
+            verified_count = 0
+            for anno in verifier.annotations.values():
+                for ocr_result in anno.get('ocr_results', []):
+                    if ocr_result.get('verified', False):
+                        verified_count += 1
+
+            if verified_count == 0:
+                return jsonify({
+                    'success': False,
+                    'error': '沒有已驗證的數據！請先驗證至少一個文字區域。'
+                }), 400
 
-        creator = ReceiptDatasetCreator()
-        creator.annotations = verifier.annotations
-        # 使用 8-1-1 比例 (train: 80%, valid: 10%, test: 10%)
-        creator.generate_training_dataset(
-            train_ratio=0.8, valid_ratio=0.1, test_ratio=0.1)
+            # 調用數據集生成器 (共用啟動時建立的實例)
+            dataset_creator.annotations = verifier.annotations
+            # 使用 8-1-1 比例 (train: 80%, valid: 10%, test: 10%)
+            dataset_creator.generate_training_dataset(
+                train_ratio=0.8, valid_ratio=0.1, test_ratio=0.1)
+        verifier.refresh_dataset_status()
 
         return jsonify({
             'success': True,
@@ -807,9 +1479,8 @@ def generate_dataset():
 
 @app.route('/api/convert_to_lmdb', methods=['POST'])
 def convert_to_lmdb():
-    """轉換 dataset 為 LMDB 格式"""
-    import subprocess
-    import sys
+    """轉換 dataset 為 LMDB 格式 (直接從 crops 目錄寫入, 各 split 並行)"""
+    from export_lmdb import convert_dataset
 
     if verifier is None:
         return jsonify({'success': False, 'error': 'Verifier not initialized'}), 500
@@ -826,84 +1497,32 @@ def convert_to_lmdb():
             }), 400
 
         # 檢查 gt.txt 檔案
-        train_gt = dataset_dir / 'train' / 'gt.txt'
-        valid_gt = dataset_dir / 'valid' / 'gt.txt'
-        test_gt = dataset_dir / 'test' / 'gt.txt'
-
-        if not train_gt.exists():
+        if not (dataset_dir / 'train' / 'gt.txt').exists():
             return jsonify({
                 'success': False,
                 'error': 'train/gt.txt 不存在！請先生成訓練數據集。'
             }), 400
 
-        # 創建 LMDB 輸出目錄
-        lmdb_output_dir.mkdir(parents=True, exist_ok=True)
-
-        # 檢查 create_lmdb_dataset.py 腳本
-        script_path = Path(
-            './deep-text-recognition-benchmark/create_lmdb_dataset.py')
-        if not script_path.exists():
-            return jsonify({
-                'success': False,
-                'error': 'create_lmdb_dataset.py 不存在！'
-            }), 400
-
-        # 轉換所有資料集 (train, valid, test)
-        splits_to_convert = []
-
-        if train_gt.exists():
-            splits_to_convert.append(('train', train_gt))
-        if valid_gt.exists():
-            splits_to_convert.append(('valid', valid_gt))
-        if test_gt.exists():
-            splits_to_convert.append(('test', test_gt))
-
-        if not splits_to_convert:
-            return jsonify({
-                'success': False,
-                'error': '沒有找到任何 gt.txt 檔案！'
-            }), 400
+        logger.info(f"開始 LMDB 轉換: {dataset_dir} -> {lmdb_output_dir}")
+        results = convert_dataset(dataset_dir, lmdb_output_dir, verifier.crops_dir)
 
         all_outputs = []
+        for split_name, stats in results.items():
+            logger.info(f"LMDB 轉換完成 ({split_name}): {stats['written']} 個樣本, "
+                        f"跳過 {stats['skipped']} 個無效圖片")
+            line = f"✅ {split_name}: Created dataset with {stats['written']} samples"
+            if stats['skipped']:
+                line += f" (skipped {stats['skipped']} invalid images)"
+            all_outputs.append(line)
 
-        for split_name, gt_file in splits_to_convert:
-            # 執行轉換命令
-            cmd = [
-                sys.executable,
-                str(script_path),
-                str(dataset_dir / split_name),  # inputPath
-                str(gt_file),                    # gtFile
-                str(lmdb_output_dir / split_name)  # outputPath
-            ]
-
-            logger.info(f"執行 LMDB 轉換 ({split_name}): {' '.join(cmd)}")
-
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5分鐘超時
-            )
-
-            if result.returncode != 0:
-                logger.error(f"LMDB 轉換失敗 ({split_name}): {result.stderr}")
-                return jsonify({
-                    'success': False,
-                    'error': f'LMDB 轉換失敗 ({split_name}): {result.stderr}'
-                }), 500
-
-            logger.info(f"LMDB 轉換輸出 ({split_name}): {result.stdout}")
-            all_outputs.append(f"✅ {split_name}: {result.stdout.strip()}")
+        verifier.refresh_dataset_status()
 
         return jsonify({
             'success': True,
-            'message': f'成功轉換 {len(splits_to_convert)} 個資料集為 LMDB 格式！',
+            'message': f'成功轉換 {len(results)} 個資料集為 LMDB 格式！',
             'output': '\n'.join(all_outputs)
         })
 
-    except subprocess.TimeoutExpired:
-        logger.error("LMDB 轉換超時")
-        return jsonify({'success': False, 'error': '轉換超時！請檢查數據集大小。'}), 500
     except Exception as e:
         logger.error(f"LMDB 轉換失敗: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -911,8 +1530,8 @@ def convert_to_lmdb():
 
 @app.route('/api/reprocess_images', methods=['POST'])
 def reprocess_images():
-    """完全重置並重新處理所有圖片（清空所有數據）"""
-    if verifier is None:
+    """完全重置並重新處理所有圖片（清空所有數據, 在背景執行）"""
+    if verifier is None or job_queue is None:
         return jsonify({'success': False, 'error': 'Verifier not initialized'}), 500
 
     try:
@@ -927,110 +1546,34 @@ def reprocess_images():
                 'error': 'input 目錄中沒有圖片！'
             }), 400
 
-        logger.info("=== 開始完全重置 ===")
-
-        # 1. 清空 annotations.json
-        logger.info("步驟 1/4: 清空 annotations.json...")
-        verifier.annotations = {}
-        verifier.md5_to_filename = {}
-        verifier.save_annotations()
-
-        # 2. 清空 crops 目錄
-        logger.info("步驟 2/4: 清空 crops 目錄...")
-        if verifier.crops_dir.exists():
-            for crop_file in verifier.crops_dir.glob('*'):
-                try:
-                    crop_file.unlink()
-                except Exception as e:
-                    logger.warning(f"無法刪除 {crop_file}: {e}")
-        verifier.crops_dir.mkdir(parents=True, exist_ok=True)
-
-        # 3. 清空 deleted 目錄
-        logger.info("步驟 3/4: 清空 deleted 目錄...")
-        if verifier.deleted_dir.exists():
-            for deleted_file in verifier.deleted_dir.glob('*'):
-                try:
-                    deleted_file.unlink()
-                except Exception as e:
-                    logger.warning(f"無法刪除 {deleted_file}: {e}")
-        verifier.deleted_dir.mkdir(parents=True, exist_ok=True)
-
-        # 4. 重新處理所有圖片
-        logger.info(f"步驟 4/4: 重新處理 {len(image_files)} 張圖片...")
-
-        # 導入 ReceiptDatasetCreator
-        import sys
-        sys.path.insert(0, str(Path(__file__).parent))
-        from create_receipt_dataset import ReceiptDatasetCreator
-
-        creator = ReceiptDatasetCreator()
-        processed_count = 0
-        failed_count = 0
-        skipped_count = 0
-
-        # 先計算所有圖片的 MD5,檢查重複
-        image_md5_map = {}
-        md5_seen = {}
-
-        for img_path in image_files:
-            md5 = verifier.calculate_md5(img_path)
-            if md5 in md5_seen:
-                logger.info(
-                    f"⚠️  跳過重複圖片: {img_path.name} (與 {md5_seen[md5]} 相同)")
-                skipped_count += 1
-            else:
-                image_md5_map[img_path.name] = md5
-                md5_seen[md5] = img_path.name
-
-        for img_path in image_files:
-            # 跳過重複圖片
-            if img_path.name not in image_md5_map:
-                continue
-
-            try:
-                logger.info(f"處理: {img_path.name}")
-                md5 = image_md5_map[img_path.name]
-                annotation = creator.ocr_image(img_path)
-                annotation['md5'] = md5
-                creator.annotations[img_path.name] = annotation
-                verifier.annotations[img_path.name] = annotation
-                verifier.md5_to_filename[md5] = img_path.name
-                processed_count += 1
-                logger.info(
-                    f"✓ {img_path.name}: 發現 {len(annotation.get('ocr_results', []))} 個文字區域")
-            except Exception as e:
-                logger.error(f"處理 {img_path.name} 失敗: {e}")
-                failed_count += 1
-
-        # 保存更新的標註
-        creator.save_annotations()
-        verifier.save_annotations()
-
-        # 更新統計
-        verifier.total_regions = sum(
-            len(anno.get('ocr_results', []))
-            for anno in verifier.annotations.values()
-        )
-
-        logger.info("=== 重置完成 ===")
-
-        message = f'重置完成！\n成功: {processed_count}\n失敗: {failed_count}'
-        if skipped_count > 0:
-            message += f'\n跳過重複: {skipped_count}'
+        job = job_queue.submit('reprocess', image_files)
+        if job is None:
+            return jsonify({'success': False, 'error': 'OCR 任務隊列已滿，請稍後再試'}), 429
 
         return jsonify({
             'success': True,
-            'message': message,
-            'processed': processed_count,
-            'failed': failed_count,
-            'skipped': skipped_count
-        })
+            'message': f'已加入重新處理任務 ({len(image_files)} 張圖片)',
+            'job_id': job.id
+        }), 202
 
     except Exception as e:
         logger.error(f"重新處理失敗: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """查詢背景 OCR 任務進度"""
+    if job_queue is None:
+        return jsonify({'success': False, 'error': 'Verifier not initialized'}), 500
+
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'任務不存在: {job_id}'}), 404
+
+    return jsonify({'success': True, 'data': job.to_dict()})
+
+
 def main():
     import argparse
 
@@ -1038,11 +1581,100 @@ def main():
     parser.add_argument('--processed', default='./processed', help='處理結果目錄')
     parser.add_argument('--input', default='./input', help='輸入圖片目錄')
     parser.add_argument('--port', type=int, default=5001, help='伺服器端口')
+    parser.add_argument('--ocr-workers', type=int, default=1, help='背景 OCR 工作線程數')
+    parser.add_argument('--reader-pool-size', type=int, default=None,
+                        help='啟動時預熱的 OCR Reader 數量 (默認與 --ocr-workers 相同)')
+    parser.add_argument('--ocr-processes', type=int, default=0,
+                        help='OCR 工作進程數 (>0 時改用多進程 OCR, 每個進程一個 Reader)')
+    parser.add_argument('--threads-per-worker', type=int, default=1,
+                        help='每個 OCR 工作進程的 torch / OpenCV 線程數')
+    parser.add_argument('--detect-max-side', type=int, default=None,
+                        help='文字檢測時把圖片縮小到此最長邊 (如 1280), 識別和切割仍使用原圖')
+    parser.add_argument('--tile-max-aspect', type=float, default=None,
+                        help='高寬比超過此值的長收據 (如 3) 切成重疊的橫帶分塊 OCR')
+    parser.add_argument('--store', choices=STORE_BACKENDS, default='json',
+                        help='標註存儲後端 (json 或 sqlite)')
+    parser.add_argument('--max-queued-jobs', type=int, default=16,
+                        help='OCR 任務隊列上限 (超過時拒絕新任務)')
+    parser.add_argument('--no-watch', action='store_true',
+                        help='不監聽 input 目錄 (只在啟動時處理已有的新圖片)')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        default=os.environ.get('VERIFIER_PROFILE') or 'off',
+                        help='按請求剖析: all 剖析每個請求, query 只剖析帶 ?profile=1 的請求 '
+                             '(環境變量 VERIFIER_PROFILE)')
+    parser.add_argument('--profile-routes',
+                        default=os.environ.get('VERIFIER_PROFILE_ROUTES') or '/,/api/convert_to_lmdb',
+                        help='要剖析的路由或端點, 以逗號分隔 (環境變量 VERIFIER_PROFILE_ROUTES)')
+    parser.add_argument('--profile-format', choices=PROFILE_FORMATS,
+                        default=os.environ.get('VERIFIER_PROFILE_FORMAT') or 'pstats',
+                        help='pstats (cProfile) 或 collapsed (取樣調用棧, 用於火焰圖)')
+    parser.add_argument('--profile-dir', default=os.environ.get('VERIFIER_PROFILE_DIR'),
+                        help='剖析文件目錄 (默認 <processed>/profiles)')
+    parser.add_argument('--profile-max-files', type=int, default=200,
+                        help='最多保留的剖析文件數 (超過時刪除最舊的)')
+    parser.add_argument('--profile-max-mb', type=float, default=100,
+                        help='剖析文件總大小上限 (MB)')
+    parser.add_argument('--profile-min-ms', type=float, default=0,
+                        help='只保留耗時不少於此值的請求')
 
     args = parser.parse_args()
 
-    global verifier
-    verifier = QuickVerifier(args.processed, args.input)
+    # argparse 不檢查默認值是否在 choices 中, 來自環境變量的值需要另外檢查
+    if args.profile not in PROFILE_MODES:
+        parser.error(f"VERIFIER_PROFILE 必須是 {', '.join(PROFILE_MODES)} 之一, 得到 {args.profile!r}")
+    if args.profile_format not in PROFILE_FORMATS:
+        parser.error(f"VERIFIER_PROFILE_FORMAT 必須是 {', '.join(PROFILE_FORMATS)} 之一, "
+                     f"得到 {args.profile_format!r}")
+
+    # debug 模式下 werkzeug 重載器會在子進程中再次執行 main(),
+    # 只在實際提供服務的子進程中載入標註和啟動背景線程
+    if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        app.run(host='0.0.0.0', port=args.port, debug=True)
+        return
+
+    global verifier, dataset_creator, job_queue
+    verifier = QuickVerifier(args.processed, args.input, store=args.store)
+
+    # 啟動時在背景載入並預熱 OCR Reader, 第一次上傳不必等待模型載入;
+    # 多進程模式下模型由工作進程載入, 不需要進程內的 Reader 池
+    reader_pool = None
+    if args.ocr_processes <= 0:
+        pool_size = args.reader_pool_size or args.ocr_workers
+        reader_pool = ReaderPool(
+            lambda: ReceiptDatasetCreator.create_reader(ReceiptDatasetCreator.OCR_LANGS,
+                                                        ReceiptDatasetCreator.OCR_GPU),
+            size=max(1, pool_size)).start()
+
+    dataset_creator = ReceiptDatasetCreator(str(verifier.input_dir), str(verifier.processed_dir),
+                                            str(verifier.crops_dir), store=verifier.store,
+                                            reader_pool=reader_pool,
+                                            annotations=verifier.annotations,
+                                            detect_max_side=args.detect_max_side,
+                                            tile_max_aspect=args.tile_max_aspect)
+
+    process_pool = None
+    if args.ocr_processes > 0:
+        process_pool = OcrProcessPool(dataset_creator.ocr_worker_args(), args.ocr_processes,
+                                      args.threads_per_worker)
+        threading.Thread(target=_warm_up_process_pool, args=(process_pool,),
+                         name='ocr-process-warmup', daemon=True).start()
+
+    job_queue = OcrJobQueue(verifier, dataset_creator, workers=args.ocr_workers,
+                            max_queued=args.max_queued_jobs, process_pool=process_pool)
+
+    if args.profile != 'off':
+        profiler = RequestProfiler(args.profile_dir or verifier.processed_dir / 'profiles',
+                                   mode=args.profile, fmt=args.profile_format,
+                                   max_files=args.profile_max_files,
+                                   max_bytes=int(args.profile_max_mb * 1024 * 1024),
+                                   min_ms=args.profile_min_ms)
+        if profiler.install(app, args.profile_routes.split(',')) == 0:
+            logger.warning(f"--profile-routes 沒有匹配任何路由: {args.profile_routes}")
+
+    # 啟動時已存在的新圖片放入背景隊列, 之後由監聽器處理新加入的圖片
+    queue_new_images()
+    if not args.no_watch:
+        InputWatcher(verifier.input_dir, queue_new_images).start()
 
     print("\n" + "="*70)
     print("🚀 香港收據 OCR 驗證工具啟動!")